@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for ProfessionalPDFToExcelConverter._clean_dataframe
+Times the vectorized cleaning against the previous per-value implementation
+(kept below as the reference) on a synthetic extracted table. That both give
+the same values and column types is checked by test_professional_pdf_converter.py.
+
+    python benchmark_clean_dataframe.py [--rows 20000] [--cols 12] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from professional_pdf_converter import ProfessionalPDFToExcelConverter
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+
+def _to_numeric_or_unchanged(values: pd.Series):
+    """pd.to_numeric(errors='ignore'), which pandas 3 no longer accepts"""
+    try:
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        return values
+
+
+def reference_clean_column(values: pd.Series) -> pd.Series:
+    """The previous per-column cleaning of _clean_dataframe: a float() check per value"""
+    values = values.astype(str)
+    values = values.str.strip()
+    values = values.replace(['nan', 'NaN', 'None', '', 'null'], None)
+
+    numeric_count = 0
+    total_count = values.notna().sum()
+
+    if total_count > 0:
+        for val in values.dropna():
+            try:
+                clean_val = str(val).replace(',', '').replace('$', '').replace('%', '').replace(' ', '')
+                float(clean_val)
+                numeric_count += 1
+            except:
+                pass
+
+        if numeric_count / total_count > 0.7:
+            values = _to_numeric_or_unchanged(
+                values.str.replace(',', '', regex=False).str.replace('$', '', regex=False)
+                .str.replace('%', '', regex=False).str.replace(' ', '', regex=False)
+            )
+
+    return values
+
+
+def reference_clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous _clean_dataframe: per-value float() checks and chained replaces"""
+    if df.empty:
+        return df
+
+    df = df.dropna(how='all').dropna(axis=1, how='all')
+
+    if df.empty:
+        return df
+
+    if len(df) > 0:
+        first_row = df.iloc[0].astype(str).str.lower().str.strip()
+        header_patterns = ['id', 'name', 'quantity', 'price', 'item', 'amount', 'total', 'description']
+        header_matches = sum(1 for cell in first_row if any(pattern in cell for pattern in header_patterns))
+        if header_matches >= len(first_row) / 2:
+            df = df.drop(df.index[0]).reset_index(drop=True)
+
+    df.columns = range(len(df.columns))
+
+    if len(df.columns) > 1:
+        first_col = df.iloc[:, 0]
+        completely_empty = first_col.isna().all() or (first_col.astype(str).str.strip() == '').all()
+        if completely_empty:
+            df = df.drop(df.columns[0], axis=1)
+            df.columns = range(len(df.columns))
+
+    for col in df.columns:
+        df[col] = reference_clean_column(df[col])
+
+    if len(df.columns) == 4:
+        df.columns = ['ID', 'Name', 'Quantity', 'Price']
+    elif len(df.columns) == 3:
+        df.columns = ['Column_1', 'Column_2', 'Column_3']
+    else:
+        df.columns = [f'Column_{i+1}' for i in range(len(df.columns))]
+
+    return df
+
+
+def make_table(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    """String table shaped like camelot output: a header row, then mixed column kinds"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for c in range(cols):
+        kind = c % 4
+        if kind == 0:
+            values = [f"{v:,}" for v in rng.integers(0, 10 ** 6, rows)]
+        elif kind == 1:
+            values = [f"${v:,.2f}" for v in rng.random(rows) * 10 ** 4]
+        elif kind == 2:
+            values = [f"Item {v}" for v in rng.integers(0, 500, rows)]
+        else:
+            # Mostly percentages with a few notes, blanks and placeholders
+            values = [f"{v:.1f} %" for v in rng.random(rows) * 100]
+            for i in rng.choice(rows, size=max(1, rows // 10), replace=False):
+                values[i] = rng.choice(['n/a', '', 'null', ' - '])
+        columns[c] = [('Item', 'Amount', 'Description', 'Total')[kind]] + values
+    return pd.DataFrame(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark _clean_dataframe against the previous implementation')
+    parser.add_argument('--rows', type=int, default=20000, help='Table rows')
+    parser.add_argument('--cols', type=int, default=12, help='Table columns')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation (best is reported)')
+
+    args = parser.parse_args()
+
+    table = make_table(args.rows, args.cols)
+    converter = ProfessionalPDFToExcelConverter()
+
+    timings = {}
+    outputs = {}
+    for name, clean in (('reference', reference_clean_dataframe), ('vectorized', converter._clean_dataframe)):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                outputs[name] = clean(table.copy())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+
+    print(f"Table: {args.rows} x {args.cols}")
+    for name, elapsed in timings.items():
+        print(f"  {name:<11} {elapsed * 1000:9.1f} ms")
+    print(f"  speedup     {timings['reference'] / timings['vectorized']:9.1f}x")
+    print(f"  dtypes      {dict(outputs['vectorized'].dtypes.astype(str))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-Time Benchmark for the Converters
+Measures each converter's cold import with `python -X importtime` in a fresh
+interpreter and fails when a heavy library is loaded by a path that does not
+use it:
+
+- importing pdf_ocr_converter loads no python-docx, python-pptx, pytesseract,
+  EasyOCR or torch; importing professional_pdf_converter loads no camelot,
+  tabula or JPype
+- a `--format docx` OCR conversion (of a generated text PDF) never loads
+  python-pptx, EasyOCR or torch
+
+    python benchmark_imports.py [--repeat 3] [--budget-ms 0] [--top 8]
+
+Exits with status 1 on a regression, so it can guard CI.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module -> top-level packages its import must not load
+IMPORT_FORBIDDEN = {
+    'pdf_ocr_converter': ['docx', 'pptx', 'pytesseract', 'easyocr', 'torch'],
+    'professional_pdf_converter': ['camelot', 'tabula', 'jpype', 'torch'],
+}
+# Top-level packages a --format docx OCR conversion must not load
+DOCX_PATH_FORBIDDEN = ['pptx', 'easyocr', 'torch']
+
+
+def parse_importtime(log: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        Module name -> (self microseconds, cumulative microseconds)
+    """
+    modules = {}
+    for line in log.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def run_importtime(args: List[str]) -> Dict[str, Tuple[int, int]]:
+    """Run the interpreter with -X importtime in the service directory and parse its imports"""
+    env = dict(os.environ, PYTHONPATH=SERVICE_DIR, CONVERSION_CACHE_ENABLED='false')
+    completed = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=SERVICE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        tail = '\n'.join(completed.stderr.splitlines()[-5:])
+        raise RuntimeError(f"{' '.join(args)} exited with {completed.returncode}:\n{tail}")
+    return parse_importtime(completed.stderr)
+
+
+def forbidden_loaded(modules: Dict[str, Tuple[int, int]], forbidden: List[str]) -> List[str]:
+    """Forbidden top-level packages that appear among the loaded modules"""
+    loaded = {name.split('.')[0] for name in modules}
+    return [package for package in forbidden if package in loaded]
+
+
+def heaviest_imports(modules: Dict[str, Tuple[int, int]], root: str, top: int) -> List[Tuple[str, int]]:
+    """Third-party top-level packages with the largest cumulative import time, excluding root"""
+    stdlib = set(sys.stdlib_module_names)
+    packages = {}
+    for name, (_, cumulative) in modules.items():
+        if '.' in name or name == root or name in stdlib or name.startswith('_'):
+            continue
+        packages[name] = max(packages.get(name, 0), cumulative)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def write_text_pdf(path: str):
+    """A two-page PDF with a text layer, so the OCR converter takes its native-text path"""
+    # PyMuPDF prints a deprecation notice to stdout on import
+    with contextlib.redirect_stdout(io.StringIO()):
+        import fitz  # PyMuPDF
+
+    with fitz.open() as doc:
+        for page_number in range(1, 3):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Import benchmark page {page_number}")
+            page.insert_text((72, 100), "The quick brown fox jumps over the lazy dog.")
+        doc.save(path)
+
+
+def benchmark_module(module: str, repeat: int, top: int, budget_ms: Optional[float]) -> bool:
+    """Time a cold import of `module` and check its forbidden imports; True when it passes"""
+    best = None
+    modules = {}
+    for _ in range(repeat):
+        modules = run_importtime(['-c', f'import {module}'])
+        cumulative = modules[module][1]
+        best = cumulative if best is None else min(best, cumulative)
+
+    print(f"{module}: {best / 1000:.1f} ms (best of {repeat})")
+    for name, cumulative in heaviest_imports(modules, module, top):
+        print(f"  {name:<20} {cumulative / 1000:8.1f} ms")
+
+    passed = True
+    loaded = forbidden_loaded(modules, IMPORT_FORBIDDEN[module])
+    if loaded:
+        print(f"  FAIL: import loads {', '.join(loaded)}")
+        passed = False
+    if budget_ms and best / 1000 > budget_ms:
+        print(f"  FAIL: {best / 1000:.1f} ms exceeds the {budget_ms:.0f} ms budget")
+        passed = False
+    return passed
+
+
+def check_docx_path() -> bool:
+    """Run a --format docx OCR conversion and check it loads no PowerPoint or torch modules"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_pdf = os.path.join(tmp_dir, 'input.pdf')
+        write_text_pdf(input_pdf)
+        modules = run_importtime(['pdf_ocr_converter.py', input_pdf, os.path.join(tmp_dir, 'output.docx'),
+                                  '--format', 'docx', '--workers', '1', '--no-cache'])
+
+    loaded = forbidden_loaded(modules, DOCX_PATH_FORBIDDEN)
+    if loaded:
+        print(f"OCR --format docx conversion: FAIL, loads {', '.join(loaded)}")
+        return False
+    print(f"OCR --format docx conversion: OK, no {', '.join(DOCX_PATH_FORBIDDEN)} "
+          f"({len(modules)} modules loaded)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure converter import times and guard against heavy imports')
+    parser.add_argument('--repeat', type=int, default=3, help='Cold imports per module (best is reported)')
+    parser.add_argument('--budget-ms', type=float, default=0,
+                        help='Fail when a module import takes longer than this (0 = no budget)')
+    parser.add_argument('--top', type=int, default=8, help='Heaviest imports listed per module')
+
+    args = parser.parse_args()
+
+    passed = True
+    for module in IMPORT_FORBIDDEN:
+        passed = benchmark_module(module, args.repeat, args.top, args.budget_ms) and passed
+    passed = check_docx_path() and passed
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent Conversion Worker
+Keeps the PDF converters (and their heavy imports: cv2, numpy, pdf2docx, fitz,
+pandas, camelot, EasyOCR models, tabula's JVM) loaded in one long-lived process and accepts
+conversion jobs as JSON lines over stdin/stdout or a local Unix socket.
+
+Request (one JSON object per line):
+    {"id": "42", "converter": "word", "input": "in.pdf", "output": "out.docx",
+     "options": {"is_scanned": true, "dpi": 300}}
+
+Response (one JSON object per line):
+    {"id": "42", "success": true, "result": {...}, "duration_ms": 812}
+
+Probe a PDF (page count, encryption, per-page text/scanned verdicts) without converting;
+the verdicts stay cached in the worker for the conversion that follows:
+    {"id": "43", "command": "probe", "input": "in.pdf", "options": {"max_pages": 8}}
+
+Control commands: {"id": "1", "command": "ping"} and {"id": "2", "command": "shutdown"}
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, TextIO
+
+from result_cache import cached_conversion
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Converter name -> (module, class) for every converter the worker can host
+CONVERTERS = {
+    'word': ('pdf_to_word_converter', 'PDFToWordConverter'),
+    'ocr': ('pdf_ocr_converter', 'PDFOCRConverter'),
+    'ppt': ('pdf_to_ppt_layout_preserving', 'PDFToPPTLayoutPreserver'),
+    'excel': ('professional_pdf_converter', 'ProfessionalPDFToExcelConverter'),
+}
+
+
+class ConversionWorker:
+    """Holds warm converter instances and dispatches jobs to their run_conversion helpers"""
+
+    def __init__(self):
+        self.converters = {}
+        self.jobs_processed = 0
+        self.started_at = time.time()
+
+    def get_converter(self, name: str, options: Optional[Dict] = None):
+        """Return the warm converter for `name`, creating it on first use"""
+        if name not in CONVERTERS:
+            raise ValueError(f"Unknown converter: {name}")
+
+        options = options or {}
+        # The OCR converter is bound to its engine, so keep one instance per engine
+        key = (name, options.get('ocr_engine', 'tesseract')) if name == 'ocr' else (name, None)
+
+        if key not in self.converters:
+            module_name, class_name = CONVERTERS[name]
+            module = importlib.import_module(module_name)
+            converter_class = getattr(module, class_name)
+
+            if name == 'ocr':
+                converter = converter_class(ocr_engine=key[1])
+            else:
+                converter = converter_class()
+
+            # Converters with per-process start-up costs (tabula's JVM) pay them now, not on the first job
+            if hasattr(converter, 'warm_up'):
+                converter.warm_up()
+
+            self.converters[key] = (module, converter)
+            print(f"INFO: Worker loaded {class_name}", file=sys.stderr)
+
+        return self.converters[key]
+
+    def preload(self, names: List[str]):
+        """Import and initialise converters up front so the first job is warm too"""
+        for name in names:
+            try:
+                self.get_converter(name)
+            except Exception as e:
+                print(f"WARNING: Could not preload converter '{name}': {e}", file=sys.stderr)
+
+    def run_job(self, name: str, input_path: str, output_path: str, options: Optional[Dict] = None) -> Dict:
+        """Run one conversion on a warm converter, or copy it from the result cache"""
+        options = dict(options or {})
+        use_cache = options.pop('use_cache', True)
+        # The cache key includes the engine, which is not a run_conversion argument
+        cache_options = dict(options)
+
+        def convert():
+            module, converter = self.get_converter(name, options)
+            run_options = dict(options)
+            if name == 'ocr':
+                # The engine is fixed per instance, so it is not a run_conversion argument
+                run_options.pop('ocr_engine', None)
+            return module.run_conversion(converter, input_path, output_path, **run_options)
+
+        return cached_conversion(name, input_path, output_path, cache_options, convert, use_cache=use_cache)
+
+    def handle_request(self, request: Dict) -> Dict:
+        """Handle one decoded request and build its response"""
+        request_id = request.get('id')
+        command = request.get('command', 'convert')
+        start_time = time.time()
+
+        try:
+            if command == 'ping':
+                return {
+                    'id': request_id,
+                    'success': True,
+                    'loaded': sorted({name for name, _ in self.converters}),
+                    'jobs_processed': self.jobs_processed,
+                    'uptime_s': round(time.time() - self.started_at, 1)
+                }
+
+            if command == 'shutdown':
+                return {'id': request_id, 'success': True, 'shutdown': True}
+
+            if command == 'probe':
+                # Imported on first use: PyMuPDF writes to stdout on import, before the protocol owns it
+                from pdf_probe import probe_pdf
+                result = probe_pdf(request['input'], **(request.get('options') or {}))
+                return {
+                    'id': request_id,
+                    'success': True,
+                    'result': result,
+                    'duration_ms': int((time.time() - start_time) * 1000)
+                }
+
+            if command != 'convert':
+                raise ValueError(f"Unknown command: {command}")
+
+            result = self.run_job(
+                request['converter'],
+                request['input'],
+                request['output'],
+                request.get('options')
+            )
+            self.jobs_processed += 1
+
+            return {
+                'id': request_id,
+                'success': bool(result.get('success')),
+                'result': result,
+                'error': result.get('error'),
+                'duration_ms': int((time.time() - start_time) * 1000)
+            }
+
+        except Exception as e:
+            print(f"ERROR: Worker job failed: {e}", file=sys.stderr)
+            traceback.print_exc()
+            return {
+                'id': request_id,
+                'success': False,
+                'error': str(e),
+                'traceback': traceback.format_exc(),
+                'duration_ms': int((time.time() - start_time) * 1000)
+            }
+
+    def serve_lines(self, lines, out: TextIO) -> bool:
+        """
+        Process JSON-line requests until the input ends or a shutdown is requested
+
+        Returns:
+            bool: True if a shutdown command was received
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response = {'id': None, 'success': False, 'error': f"Invalid JSON request: {e}"}
+            else:
+                response = self.handle_request(request)
+
+            out.write(json.dumps(response) + '\n')
+            out.flush()
+
+            if response.get('shutdown'):
+                return True
+
+        return False
+
+
+def _claim_protocol_stdout() -> TextIO:
+    """
+    Reserve the real stdout for protocol messages
+
+    The converters log freely to stdout (and native libraries may write to fd 1),
+    so fd 1 is pointed at stderr and the protocol gets a private duplicate.
+    """
+    sys.stdout.flush()
+    protocol_fd = os.dup(1)
+    os.dup2(2, 1)
+    return os.fdopen(protocol_fd, 'w', encoding='utf-8', buffering=1)
+
+
+class _SocketWriter:
+    """Minimal text writer over a socket's binary stream"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text: str):
+        self.wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def serve_socket(worker: ConversionWorker, socket_path: str):
+    """Serve jobs on a Unix domain socket, one connection at a time"""
+
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (raw.decode('utf-8') for raw in self.rfile)
+            out = _SocketWriter(self.wfile)
+            if worker.serve_lines(lines, out):
+                # shutdown() blocks until serve_forever() returns, so run it off-thread
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with socketserver.UnixStreamServer(socket_path, JobHandler) as server:
+        print(f"INFO: Conversion worker listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent PDF conversion worker')
+    parser.add_argument('--socket', help='Serve on this Unix domain socket path instead of stdin/stdout')
+    parser.add_argument('--preload', default=','.join(CONVERTERS),
+                        help='Comma-separated converters to load at startup (default: all)')
+
+    args = parser.parse_args()
+
+    # Converter modules live next to this file; make them importable from any cwd
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    protocol_out = None if args.socket else _claim_protocol_stdout()
+
+    worker = ConversionWorker()
+    preload = [name.strip() for name in args.preload.split(',') if name.strip()]
+    worker.preload(preload)
+
+    if args.socket:
+        serve_socket(worker, args.socket)
+    else:
+        # Tell the parent process the worker is warm and ready for jobs
+        protocol_out.write(json.dumps({'id': None, 'success': True, 'ready': True,
+                                       'loaded': sorted({name for name, _ in worker.converters})}) + '\n')
+        protocol_out.flush()
+        worker.serve_lines(sys.stdin, protocol_out)
+
+    print("INFO: Conversion worker stopped", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
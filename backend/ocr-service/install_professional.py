@@ -103,6 +103,7 @@ def test_installation():
         ("import pandas", "Pandas"),
         ("import openpyxl", "OpenPyXL"),
         ("import cv2", "OpenCV"),
+        ("import fitz", "PyMuPDF"),
         ("import PyPDF2", "PyPDF2"),
     ]
     
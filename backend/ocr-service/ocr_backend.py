@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR Engine Backends
+One interface over Tesseract: an in-process tesserocr API that stays initialised
+for the life of the process when the binding is installed, otherwise the
+pytesseract subprocess wrapper. Both return pytesseract's image_to_data dict.
+
+The bindings are only looked up at import; a backend imports its library when
+it is created, so checking ocr_available() loads neither.
+"""
+
+import importlib.util
+import os
+import platform
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+
+# Configure Tesseract path for cross-platform compatibility
+if platform.system() == 'Windows':
+    tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+elif platform.system() == 'Darwin':  # macOS
+    tesseract_path = '/usr/local/bin/tesseract'
+else:  # Linux
+    tesseract_path = '/usr/bin/tesseract'
+
+TESSEROCR_AVAILABLE = importlib.util.find_spec('tesserocr') is not None
+PYTESSERACT_AVAILABLE = importlib.util.find_spec('pytesseract') is not None
+
+# Column order of Tesseract's TSV output (and of the image_to_data dict)
+TSV_COLUMNS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text']
+
+
+def ocr_available() -> bool:
+    """True when either Tesseract binding (tesserocr or pytesseract) is installed"""
+    return TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE
+
+
+class PytesseractBackend:
+    """Runs the tesseract binary once per call through pytesseract"""
+
+    name = 'pytesseract'
+
+    def __init__(self):
+        import pytesseract
+
+        # Check if tesseract exists at the platform-specific path, otherwise use system PATH
+        if os.path.exists(tesseract_path):
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        self.pytesseract = pytesseract
+
+    def image_to_data(self, image: np.ndarray, psm: int = 3, oem: int = 3,
+                      variables: Optional[Dict] = None) -> Dict:
+        """Recognise an image and return word boxes in pytesseract's DICT layout"""
+        config = f'--oem {oem} --psm {psm}'
+        for name, value in (variables or {}).items():
+            config += f' -c {name}={value}'
+        return self.pytesseract.image_to_data(image, output_type=self.pytesseract.Output.DICT, config=config)
+
+    def version(self) -> str:
+        return str(self.pytesseract.get_tesseract_version())
+
+
+class TesserocrBackend:
+    """Keeps one initialised Tesseract API and feeds it numpy buffers directly"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang: str = 'eng'):
+        import tesserocr
+
+        self.tesserocr = tesserocr
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.DEFAULT)
+        # Original values of variables changed by a call, restored before the next one
+        self._variable_defaults = {}
+
+    def image_to_data(self, image: np.ndarray, psm: int = 3, oem: int = 3,
+                      variables: Optional[Dict] = None) -> Dict:
+        """Recognise an image and return word boxes in pytesseract's DICT layout"""
+        # The engine mode is fixed when the API is initialised; OEM 3 (default) is all we use
+        variables = variables or {}
+
+        for name, default in self._variable_defaults.items():
+            if name not in variables:
+                self.api.SetVariable(name, default)
+        for name, value in variables.items():
+            if name not in self._variable_defaults:
+                default = self.api.GetVariableAsString(name)
+                if default is not None:
+                    self._variable_defaults[name] = default
+            self.api.SetVariable(name, str(value))
+
+        self.api.SetPageSegMode(psm)
+
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        self.api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+
+        tsv = self.api.GetTSVText(0)
+        self.api.Clear()
+        return _tsv_to_dict(tsv)
+
+    def version(self) -> str:
+        return str(self.tesserocr.tesseract_version()).splitlines()[0]
+
+
+def _tsv_to_dict(tsv: str) -> Dict:
+    """Parse header-less Tesseract TSV the same way pytesseract's Output.DICT does"""
+    result = {column: [] for column in TSV_COLUMNS}
+    text_index = len(TSV_COLUMNS) - 1
+
+    for line in tsv.split('\n'):
+        if not line:
+            continue
+        cells = line.split('\t')
+        if len(cells) < len(TSV_COLUMNS):
+            # The text cell is dropped when a word is empty
+            cells.append('')
+
+        for i, column in enumerate(TSV_COLUMNS):
+            value = cells[i]
+            if i != text_index:
+                try:
+                    value = int(float(value))
+                except ValueError:
+                    pass
+            result[column].append(value)
+
+    return result
+
+
+# Backend owned by the current process; pool workers get their own after fork
+_backend = None
+_backend_pid = None
+
+
+def get_ocr_backend():
+    """
+    Return this process's Tesseract backend, creating it on first use
+
+    OCR_BACKEND=pytesseract forces the subprocess wrapper even when tesserocr is installed.
+    """
+    global _backend, _backend_pid
+
+    if _backend is not None and _backend_pid == os.getpid():
+        return _backend
+
+    backend = None
+    if TESSEROCR_AVAILABLE and os.environ.get('OCR_BACKEND', 'auto') != 'pytesseract':
+        try:
+            backend = TesserocrBackend()
+        except Exception as e:
+            print(f"WARNING: Could not initialise tesserocr, falling back to pytesseract: {e}", file=sys.stderr)
+
+    _backend = backend or PytesseractBackend()
+    _backend_pid = os.getpid()
+    return _backend
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Page-Parallel OCR
+Fans page rendering, preprocessing and OCR out over a process pool and
+reassembles the per-page results in page order.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, List, Optional
+
+from page_renderer import render_page
+
+# Converter instance owned by each pool process, created once by the initializer
+_worker_converter = None
+
+
+def default_worker_count() -> int:
+    """Worker count from OCR_WORKERS, or one per CPU core when unset or 0"""
+    try:
+        configured = int(os.environ.get('OCR_WORKERS', '0'))
+    except ValueError:
+        configured = 0
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+def resolve_worker_count(workers: Optional[int], page_count: int) -> int:
+    """Clamp a requested worker count to the number of pages to process"""
+    if workers is None or workers <= 0:
+        workers = default_worker_count()
+    return max(1, min(workers, page_count))
+
+
+def _init_worker(converter_factory: Callable, factory_kwargs: Dict):
+    """Create the per-process converter and stop OCR libraries oversubscribing cores"""
+    global _worker_converter
+
+    # Each pool process already owns a core; Tesseract's OpenMP threads and OpenCV's
+    # thread pool would only contend with the other workers
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+
+    _worker_converter = converter_factory(**factory_kwargs)
+
+
+def _process_page_task(pdf_path: str, page_number: int, dpi: int) -> Dict:
+    """Render and OCR one page inside a pool process"""
+    page_array = render_page(pdf_path, page_number, dpi=dpi, grayscale=True)
+    return _worker_converter._process_page(page_number, page_array)
+
+
+def map_pages(converter_factory: Callable, factory_kwargs: Dict, pdf_path: str,
+              dpi: int, page_numbers: List[int], workers: int) -> List[Dict]:
+    """
+    OCR pages of a PDF on a process pool
+
+    Args:
+        converter_factory: Converter class (or picklable callable) providing _process_page
+        factory_kwargs: Keyword arguments for the factory in each pool process
+        pdf_path: Path to the PDF file
+        dpi: Resolution for PDF to image conversion
+        page_numbers: 1-based pages to OCR
+        workers: Number of pool processes
+
+    Returns:
+        Page results in page order, identical to running _process_page serially
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(converter_factory, factory_kwargs)) as pool:
+        return list(pool.map(_process_page_task, repeat(pdf_path),
+                             page_numbers, repeat(dpi)))
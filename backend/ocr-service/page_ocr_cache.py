@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-Page OCR Cache
+Remembers the OCR result of every preprocessed page raster so identical pages
+(cover sheets, terms and conditions, boilerplate forms) are recognised once,
+even when they turn up inside otherwise different documents.
+
+Pages are fingerprinted by an exact hash of the preprocessed pixels. Entries are
+stored under a version string naming the OCR engine, its version and the
+recognition settings, so changing any of those never serves stale text; old
+versions can be dropped explicitly with invalidate().
+
+Environment:
+    OCR_PAGE_CACHE_ENABLED      - set to "false" to always run OCR
+    OCR_PAGE_CACHE_DIR          - store location (default: <tmp>/pdf_converter_cache)
+    OCR_PAGE_CACHE_MAX_ENTRIES  - pages kept before LRU eviction (default: 5000)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Bump when the shape of cached page results changes
+PAGE_CACHE_VERSION = 1
+
+
+def page_cache_enabled() -> bool:
+    """Whether the per-page OCR cache is enabled for this process"""
+    return os.environ.get('OCR_PAGE_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+
+def fingerprint_image(image: np.ndarray) -> str:
+    """Exact fingerprint of a raster: its shape, dtype and pixel bytes"""
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image.shape}|{image.dtype}".encode('ascii'))
+    digest.update(memoryview(image).cast('B'))
+    return digest.hexdigest()
+
+
+def make_version(engine: str, engine_version: str, config: Dict) -> str:
+    """Version string for cache entries: engine name and version plus the recognition settings"""
+    return f"{engine}:{engine_version}:v{PAGE_CACHE_VERSION}:{json.dumps(config, sort_keys=True, default=str)}"
+
+
+class PageOCRCache:
+    """Bounded SQLite store of page OCR results keyed by (raster fingerprint, version)"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Open (and create if needed) the page cache
+
+        Args:
+            cache_dir: Store location, defaults to OCR_PAGE_CACHE_DIR
+            max_entries: Pages kept before eviction, defaults to OCR_PAGE_CACHE_MAX_ENTRIES
+        """
+        self.cache_dir = cache_dir or os.environ.get(
+            'OCR_PAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pdf_converter_cache'))
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.environ.get('OCR_PAGE_CACHE_MAX_ENTRIES', '5000'))
+        # Counters for this process; the stats table keeps the running totals
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.cache_dir, 'page_ocr.sqlite3'), timeout=30)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'fingerprint TEXT NOT NULL, version TEXT NOT NULL, result TEXT NOT NULL, '
+            'last_access REAL NOT NULL, PRIMARY KEY (fingerprint, version))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self.db.commit()
+
+    def _count(self, name: str):
+        self.db.execute('INSERT INTO stats (name, value) VALUES (?, 1) '
+                        'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,))
+
+    def get(self, fingerprint: str, version: str) -> Optional[Dict]:
+        """Return the cached OCR result for a page raster, or None on a miss"""
+        row = self.db.execute('SELECT result FROM pages WHERE fingerprint = ? AND version = ?',
+                              (fingerprint, version)).fetchone()
+        if row is None:
+            self.misses += 1
+            self._count('misses')
+            self.db.commit()
+            return None
+
+        self.hits += 1
+        self.db.execute('UPDATE pages SET last_access = ? WHERE fingerprint = ? AND version = ?',
+                        (time.time(), fingerprint, version))
+        self._count('hits')
+        self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, fingerprint: str, version: str, result: Dict):
+        """Store a page's OCR result and evict the oldest pages past max_entries"""
+        self.db.execute('INSERT OR REPLACE INTO pages (fingerprint, version, result, last_access) '
+                        'VALUES (?, ?, ?, ?)', (fingerprint, version, json.dumps(result), time.time()))
+
+        excess = self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.db.execute('DELETE FROM pages WHERE rowid IN '
+                            '(SELECT rowid FROM pages ORDER BY last_access LIMIT ?)', (excess,))
+        self.db.commit()
+
+    def invalidate(self, version_prefix: str = '') -> int:
+        """
+        Drop cached pages whose version starts with `version_prefix` (everything by default)
+
+        Returns:
+            Number of pages removed
+        """
+        cursor = self.db.execute("DELETE FROM pages WHERE version LIKE ? ESCAPE '\\'",
+                                 (version_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%',))
+        self.db.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict:
+        """Page count per version and running hit/miss totals"""
+        counters = dict(self.db.execute('SELECT name, value FROM stats').fetchall())
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        versions = dict(self.db.execute('SELECT version, COUNT(*) FROM pages GROUP BY version').fetchall())
+        return {
+            'entries': sum(versions.values()),
+            'max_entries': self.max_entries,
+            'versions': versions,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0
+        }
+
+
+# Cache owned by the current process; pool workers open their own after fork
+_cache = None
+_cache_pid = None
+
+
+def get_page_ocr_cache() -> Optional[PageOCRCache]:
+    """Return this process's page cache, or None when it is disabled or cannot be opened"""
+    global _cache, _cache_pid
+
+    if not page_cache_enabled():
+        return None
+    if _cache is not None and _cache_pid == os.getpid():
+        return _cache
+
+    try:
+        _cache = PageOCRCache()
+    except Exception as e:
+        print(f"WARNING: Page OCR cache unavailable: {e}", file=sys.stderr)
+        _cache = None
+    _cache_pid = os.getpid()
+    return _cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the per-page OCR cache')
+    parser.add_argument('--invalidate', metavar='VERSION_PREFIX', nargs='?', const='',
+                        help='Drop pages whose version starts with this prefix (e.g. "tesserocr:"); '
+                             'no value drops everything')
+
+    args = parser.parse_args()
+
+    cache = PageOCRCache()
+    if args.invalidate is not None:
+        removed = cache.invalidate(args.invalidate)
+        print(f"INFO: Removed {removed} cached page(s)", file=sys.stderr)
+    print(json.dumps(cache.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Page Rendering Helpers
+Renders PDF pages in-process with PyMuPDF straight into numpy arrays (no
+pdftoppm subprocess, no temporary image files), one page at a time so OCR
+memory use stays flat regardless of how many pages a document has, and caches
+page rasters for converters that need the same page more than once.
+"""
+
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from pdf_metadata import get_page_count
+
+
+class _PixmapBuffer:
+    """Exposes a pixmap's samples to numpy without copying and keeps the pixmap alive"""
+
+    def __init__(self, pixmap: fitz.Pixmap):
+        self.pixmap = pixmap
+        if pixmap.n == 1:
+            shape, strides = (pixmap.height, pixmap.width), (pixmap.stride, 1)
+        else:
+            shape, strides = (pixmap.height, pixmap.width, pixmap.n), (pixmap.stride, pixmap.n, 1)
+        self.__array_interface__ = {
+            'version': 3,
+            'shape': shape,
+            'strides': strides,
+            'typestr': '|u1',
+            'data': (pixmap.samples_ptr, False)
+        }
+
+
+def pixmap_to_array(pixmap: fitz.Pixmap) -> np.ndarray:
+    """Wrap a pixmap's samples as a uint8 array (H x W for grayscale, H x W x n otherwise)"""
+    return np.asarray(_PixmapBuffer(pixmap))
+
+
+def render_page_array(page: fitz.Page, dpi: int = 200, grayscale: bool = False) -> np.ndarray:
+    """
+    Render an open PyMuPDF page to a numpy array
+
+    Args:
+        page: Page of an open fitz document
+        dpi: Resolution to render at
+        grayscale: Render a single-channel image (what OCR preprocessing wants) instead of RGB
+
+    Returns:
+        uint8 array, H x W when grayscale, H x W x 3 otherwise
+    """
+    zoom = dpi / 72.0
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    return pixmap_to_array(pixmap)
+
+
+def count_pages(pdf_path: str) -> int:
+    """Return the number of pages in a PDF without rendering any of them"""
+    return get_page_count(pdf_path)
+
+
+def iter_page_images(pdf_path: str, dpi: int = 200, grayscale: bool = False,
+                     page_numbers: Optional[List[int]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Render a PDF lazily, one page at a time
+
+    Args:
+        pdf_path: Path to the PDF file
+        dpi: Resolution for PDF to image conversion
+        grayscale: Yield single-channel arrays (for OCR) instead of RGB
+        page_numbers: 1-based pages to render (default: all)
+
+    Yields:
+        (page_number, image array) tuples in page order, 1-based
+    """
+    with fitz.open(pdf_path) as doc:
+        if page_numbers is None:
+            page_numbers = range(1, doc.page_count + 1)
+        for page_number in page_numbers:
+            yield page_number, render_page_array(doc[page_number - 1], dpi, grayscale)
+
+
+def render_page(pdf_path: str, page_number: int, dpi: int = 200, grayscale: bool = False) -> np.ndarray:
+    """Render a single 1-based page of a PDF"""
+    with fitz.open(pdf_path) as doc:
+        if not 1 <= page_number <= doc.page_count:
+            raise ValueError(f"Page {page_number} could not be rendered from {pdf_path}")
+        return render_page_array(doc[page_number - 1], dpi, grayscale)
+
+
+# Letter/A4 pages are about 792 points on their long side; glyph sizes are judged in points
+_PAGE_LONG_SIDE_POINTS = 792.0
+# A dark component is a glyph when it is at least this tall (points); dust and sensor
+# speckle on scans stay below it, while the x-height of 6pt text is above it
+MIN_GLYPH_HEIGHT_POINTS = 2.0
+# ... and no larger than this (a dark scanner edge or a punch hole shadow is not text)
+MAX_GLYPH_HEIGHT_POINTS = 72.0
+
+
+def _ink_mask(page_array: np.ndarray, max_side: int, margin: float) -> np.ndarray:
+    """Binary ink mask of the page content, downsampled only above `max_side` pixels"""
+    if page_array.ndim == 3:
+        page_array = cv2.cvtColor(page_array, cv2.COLOR_RGB2GRAY)
+
+    height, width = page_array.shape[:2]
+    scale = min(1.0, max_side / float(max(height, width)))
+    if scale < 1.0:
+        page_array = cv2.resize(page_array, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                interpolation=cv2.INTER_AREA)
+
+    height, width = page_array.shape[:2]
+    dy, dx = int(height * margin), int(width * margin)
+    content = page_array[dy:height - dy, dx:width - dx]
+    if content.size == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+
+    # Ink is clearly darker than the paper (the median), so grey or yellowed scans work too
+    paper = float(np.median(content))
+    return (content < paper * 0.6).astype(np.uint8)
+
+
+def ink_ratio(page_array: np.ndarray, max_side: int = 3600, margin: float = 0.05) -> float:
+    """
+    Fraction of "ink" pixels on a page
+
+    A pixel counts as ink when it is clearly darker than the paper (the page's
+    median brightness). A thin border is ignored because scanners often leave
+    dark edges.
+
+    Args:
+        page_array: Grayscale or RGB page raster
+        max_side: Longest side the raster is reduced to before measuring, in pixels
+        margin: Fraction of each side ignored as scanner border
+    """
+    mask = _ink_mask(page_array, max_side, margin)
+    if mask.size == 0:
+        return 0.0
+    return float(np.count_nonzero(mask)) / mask.size
+
+
+def count_glyphs(page_array: np.ndarray, max_side: int = 3600, margin: float = 0.05) -> int:
+    """
+    Count glyph-sized ink components on a page
+
+    The page is measured at (near) full resolution, since one line of small text
+    covers well under 0.1% of a page. Connected components of the ink mask are
+    kept when their height lies between MIN_GLYPH_HEIGHT_POINTS and
+    MAX_GLYPH_HEIGHT_POINTS, judged against the page's long side.
+
+    Args:
+        page_array: Grayscale or RGB page raster
+        max_side: Longest side the raster is reduced to before measuring, in pixels
+        margin: Fraction of each side ignored as scanner border
+    """
+    mask = _ink_mask(page_array, max_side, margin)
+    if mask.size == 0 or not mask.any():
+        return 0
+
+    long_side = max(page_array.shape[:2])
+    pixels_per_point = min(long_side, max_side) / _PAGE_LONG_SIDE_POINTS
+    min_height = max(2, int(MIN_GLYPH_HEIGHT_POINTS * pixels_per_point))
+    max_height = MAX_GLYPH_HEIGHT_POINTS * pixels_per_point
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    return int(np.count_nonzero((heights >= min_height) & (heights <= max_height)))
+
+
+def is_blank_page(page_array: np.ndarray, min_glyphs: Optional[int] = None) -> bool:
+    """
+    Whether a page holds no text worth OCR (separator sheets, blank backs)
+
+    A page is blank when it has fewer glyph-sized ink components than
+    `min_glyphs`, so a single short line ("Page 5") is still OCR'd while dust
+    and scanner noise are not.
+
+    Args:
+        page_array: Grayscale or RGB page raster
+        min_glyphs: Glyphs a page needs to be OCR'd, defaults to OCR_BLANK_MIN_GLYPHS (3)
+    """
+    if min_glyphs is None:
+        min_glyphs = int(os.environ.get('OCR_BLANK_MIN_GLYPHS', '3'))
+    return count_glyphs(page_array) < min_glyphs
+
+
+class PageRasterCache:
+    """
+    Per-document cache of page rasters, keyed by page and DPI
+
+    Pages are rendered with PyMuPDF from a single open document. Only the highest
+    resolution rendered so far is kept for each page; lower DPI requests are
+    downsampled from it instead of decoding the page again. Call release() once a
+    page is finished and close() (or use a with block) when the document is done.
+    """
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        self.doc = fitz.open(pdf_path)
+        # page_number -> (dpi, RGB array) at the highest DPI rendered so far
+        self._rasters: Dict[int, Tuple[int, np.ndarray]] = {}
+        self.renders = 0
+        self.hits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def page_rect(self, page_number: int) -> fitz.Rect:
+        """Return the size of a 1-based page in PDF points"""
+        return self.doc[page_number - 1].rect
+
+    def get(self, page_number: int, dpi: int) -> np.ndarray:
+        """
+        Return a 1-based page as an RGB array at the requested DPI
+
+        The array is shared with the cache; copy it before modifying it in place.
+        """
+        page = self.doc[page_number - 1]
+        zoom = dpi / 72.0
+        target = (page.rect * fitz.Matrix(zoom, zoom)).irect
+        cached = self._rasters.get(page_number)
+
+        if cached is not None and cached[0] >= dpi:
+            self.hits += 1
+            cached_dpi, raster = cached
+            if cached_dpi == dpi:
+                return raster
+            return cv2.resize(raster, (target.width, target.height), interpolation=cv2.INTER_AREA)
+
+        raster = render_page_array(page, dpi)
+        raster.flags.writeable = False
+        self.renders += 1
+
+        self._rasters[page_number] = (dpi, raster)
+        return raster
+
+    def release(self, page_number: int):
+        """Drop the cached raster for a page that is no longer needed"""
+        self._rasters.pop(page_number, None)
+
+    def close(self):
+        """Drop all rasters and close the document"""
+        self._rasters.clear()
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Metadata
+Page count, encryption and document properties for a PDF, read with PyMuPDF
+from the trailer, cross-reference table and page tree only: no page is loaded,
+no content stream is parsed. Every converter asks this module instead of
+opening the file with its own parser just to count pages.
+
+Results are cached per file version (absolute path, size and modification
+time), so the probe, the converter and its fallbacks share one lookup.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict
+
+import fitz  # PyMuPDF
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Files remembered per process; the worker lives long, so keep it bounded
+_MAX_CACHED_FILES = 256
+
+_metadata_cache: 'OrderedDict[str, Dict]' = OrderedDict()
+
+
+def file_key(pdf_path: str) -> str:
+    """Identify a file version by absolute path, size and modification time"""
+    stat = os.stat(pdf_path)
+    identity = f"{os.path.abspath(pdf_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def _read_metadata(pdf_path: str) -> Dict:
+    size_bytes = os.path.getsize(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        encrypted = bool(doc.is_encrypted)
+        needs_pass = bool(doc.needs_pass)
+        properties = doc.metadata or {}
+        return {
+            'pages': doc.page_count,
+            'size_mb': round(size_bytes / (1024 * 1024), 2),
+            'size_bytes': size_bytes,
+            'encrypted': encrypted or needs_pass,
+            'needs_pass': needs_pass,
+            'pdf_version': properties.get('format', ''),
+            'title': properties.get('title', ''),
+            'producer': properties.get('producer', ''),
+            'xref_count': doc.xref_length(),
+            # MuPDF rebuilt a damaged cross-reference table while opening the file
+            'repaired': bool(getattr(doc, 'is_repaired', False))
+        }
+
+
+def get_pdf_metadata(pdf_path: str) -> Dict:
+    """
+    Get basic PDF information, cached per file version
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Dict with pages, size_mb, size_bytes, encrypted, needs_pass, pdf_version,
+        title, producer, xref_count and repaired
+    """
+    key = file_key(pdf_path)
+    if key in _metadata_cache:
+        _metadata_cache.move_to_end(key)
+    else:
+        _metadata_cache[key] = _read_metadata(pdf_path)
+        while len(_metadata_cache) > _MAX_CACHED_FILES:
+            _metadata_cache.popitem(last=False)
+
+    # Callers may annotate the dict they get back
+    return dict(_metadata_cache[key])
+
+
+def get_page_count(pdf_path: str) -> int:
+    """Return the number of pages in a PDF"""
+    return get_pdf_metadata(pdf_path)['pages']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print page count, encryption and properties of a PDF')
+    parser.add_argument('input_pdf', help='Input PDF file path')
+
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps({'success': True, **get_pdf_metadata(args.input_pdf)}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
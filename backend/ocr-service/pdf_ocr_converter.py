@@ -6,11 +6,11 @@ Converts scanned/image-based PDFs to Office documents using OCR
 """
 
 import argparse
+import importlib.util
 import json
 import sys
-import os
 from pathlib import Path
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Tuple, Union, Optional
 import traceback
 
 # Ensure UTF-8 encoding for output
@@ -20,44 +20,24 @@ if sys.stderr.encoding != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8')
 
 # PDF and image processing
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
 import cv2
 import numpy as np
 
-# Configure Tesseract path for cross-platform compatibility
-import platform
-import os
-
-if platform.system() == 'Windows':
-    tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-elif platform.system() == 'Darwin':  # macOS
-    tesseract_path = '/usr/local/bin/tesseract'
-else:  # Linux
-    tesseract_path = '/usr/bin/tesseract'
-
-# Check if tesseract exists at the platform-specific path, otherwise use system PATH
-if os.path.exists(tesseract_path):
-    pytesseract.pytesseract.tesseract_cmd = tesseract_path
-
-# Try to import EasyOCR, but don't fail if it's not available
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-except ImportError as e:
-    print(f"WARNING: EasyOCR not available: {e}")
+# EasyOCR pulls in torch, so it is only looked up here and imported when that engine is chosen.
+# Likewise python-docx, python-pptx and pytesseract are imported by the code paths that use them.
+EASYOCR_AVAILABLE = importlib.util.find_spec('easyocr') is not None
+if not EASYOCR_AVAILABLE:
+    print("WARNING: EasyOCR not available: No module named 'easyocr'")
     print("INFO: Will use Tesseract OCR only")
-    easyocr = None
-    EASYOCR_AVAILABLE = False
 
-# Document generation (only Word and PowerPoint now)
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from pptx import Presentation
-from pptx.util import Inches as PptxInches, Pt as PptxPt
-from pptx.enum.text import PP_ALIGN
+import fitz  # PyMuPDF
+
+from page_renderer import is_blank_page, iter_page_images
+from pdf_metadata import get_pdf_metadata
+from pdf_probe import classify_pages, native_text_blocks
+from ocr_parallel import map_pages, resolve_worker_count
+from result_cache import cached_conversion
+from page_ocr_cache import fingerprint_image, get_page_ocr_cache, make_version
 
 
 class PDFOCRConverter:
@@ -75,60 +55,68 @@ class PDFOCRConverter:
         
         self.ocr_engine = ocr_engine
         self.reader = None
+        # Page OCR cache version, resolved on first use
+        self._ocr_cache_version = None
         
         if ocr_engine == 'easyocr' and EASYOCR_AVAILABLE:
             print("INFO: Initializing EasyOCR...")
-            self.reader = easyocr.Reader(['en'])
+            try:
+                import easyocr
+                self.reader = easyocr.Reader(['en'])
+            except ImportError as e:
+                print(f"WARNING: EasyOCR failed to import, falling back to Tesseract: {e}")
+                ocr_engine = self.ocr_engine = 'tesseract'
         else:
             print("INFO: Using Tesseract OCR")
             
         print(f"SUCCESS: OCR Converter initialized with {ocr_engine}")
 
-    def extract_text_from_pdf(self, pdf_path: str, dpi: int = 200) -> List[Dict]:
+    def extract_text_from_pdf(self, pdf_path: str, dpi: int = 200, workers: Optional[int] = None) -> List[Dict]:
         """
         Extract text from PDF using OCR
         
+        Pages with a usable text layer are read directly; only scanned pages are
+        rendered, preprocessed and OCR'd, one at a time, so peak memory does not
+        grow with the page count. Tesseract OCR is spread over a pool of worker
+        processes when more than one worker is available.
+        
         Args:
             pdf_path: Path to the PDF file
             dpi: Resolution for PDF to image conversion
+            workers: Number of OCR processes (None or 0 = OCR_WORKERS / CPU count, 1 = serial)
             
         Returns:
             List of pages with extracted text and layout info
         """
         try:
             print(f"INFO: Converting PDF to images: {pdf_path}")
-            
-            # Convert PDF pages to images
-            pages = convert_from_path(pdf_path, dpi=dpi)
-            print(f"INFO: Found {len(pages)} page(s)")
+            verdicts = classify_pages(pdf_path)
+            text_pages = [v['page'] for v in verdicts if v['verdict'] == 'text']
+            ocr_pages = [v['page'] for v in verdicts if v['verdict'] != 'text']
+            print(f"INFO: Found {len(verdicts)} page(s): {len(text_pages)} with a text layer, {len(ocr_pages)} to OCR")
             
             extracted_pages = []
             
-            for page_num, page_image in enumerate(pages, 1):
-                print(f"INFO: Processing page {page_num}...")
-                
-                # Convert PIL image to numpy array for OpenCV
-                page_array = np.array(page_image)
-                
-                # Preprocess image for better OCR
-                processed_image = self._preprocess_image(page_array)
-                
-                # Extract text using selected OCR engine
-                if self.ocr_engine == 'easyocr' and EASYOCR_AVAILABLE:
-                    text_data = self._extract_with_easyocr(processed_image)
+            # Text pages: take the native text layer, no rendering or OCR
+            if text_pages:
+                with fitz.open(pdf_path) as doc:
+                    for page_num in text_pages:
+                        extracted_pages.append(self._extract_native_page(doc[page_num - 1], page_num, dpi))
+            
+            # Scanned pages: render and OCR
+            if ocr_pages:
+                workers = resolve_worker_count(workers, len(ocr_pages))
+                # EasyOCR models are too heavy to load once per pool process
+                if workers > 1 and self.ocr_engine == 'tesseract':
+                    print(f"INFO: Running OCR on {workers} worker processes")
+                    extracted_pages.extend(map_pages(PDFOCRConverter, {'ocr_engine': self.ocr_engine},
+                                                     pdf_path, dpi, ocr_pages, workers))
                 else:
-                    text_data = self._extract_with_tesseract(processed_image)
-                
-                page_info = {
-                    'page_number': page_num,
-                    'text_blocks': text_data,
-                    'full_text': ' '.join([block['text'] for block in text_data if block['text'].strip()]),
-                    'image_size': page_image.size
-                }
-                
-                extracted_pages.append(page_info)
-                print(f"SUCCESS: Page {page_num}: {len(text_data)} text blocks, {len(page_info['full_text'])} characters")
+                    for page_num, page_image in iter_page_images(pdf_path, dpi=dpi, grayscale=True,
+                                                                 page_numbers=ocr_pages):
+                        extracted_pages.append(self._process_page(page_num, page_image))
             
+            extracted_pages.sort(key=lambda page: page['page_number'])
             return extracted_pages
             
         except Exception as e:
@@ -136,6 +124,90 @@ class PDFOCRConverter:
             traceback.print_exc()
             raise
 
+    def _extract_native_page(self, page: fitz.Page, page_num: int, dpi: int) -> Dict:
+        """Read a text page's own text layer into the same layout as an OCR'd page"""
+        text_data = [
+            {'text': block['text'], 'bbox': block['bbox'], 'confidence': block['confidence']}
+            for block in native_text_blocks(page, dpi)
+        ]
+        
+        zoom = dpi / 72.0
+        page_info = {
+            'page_number': page_num,
+            'text_blocks': text_data,
+            'full_text': ' '.join(block['text'] for block in text_data),
+            'image_size': (int(round(page.rect.width * zoom)), int(round(page.rect.height * zoom))),
+            'ocr_cached': False,
+            'text_layer': True
+        }
+        
+        print(f"SUCCESS: Page {page_num}: {len(text_data)} text blocks from the text layer")
+        return page_info
+
+    def _process_page(self, page_num: int, page_array: np.ndarray) -> Dict:
+        """Preprocess and OCR a single rendered page (grayscale or RGB array)"""
+        print(f"INFO: Processing page {page_num}...")
+        
+        # Separator sheets and blank backs: nothing to recognise
+        if is_blank_page(page_array):
+            print(f"INFO: Page {page_num} is blank, skipping OCR")
+            return {
+                'page_number': page_num,
+                'text_blocks': [],
+                'full_text': '',
+                'image_size': (page_array.shape[1], page_array.shape[0]),
+                'ocr_cached': False,
+                'blank': True
+            }
+        
+        # Preprocess image for better OCR
+        processed_image = self._preprocess_image(page_array)
+        
+        # Reuse the text of an identical page recognised earlier
+        page_cache = get_page_ocr_cache()
+        cached = None
+        if page_cache is not None:
+            fingerprint = fingerprint_image(processed_image)
+            cached = page_cache.get(fingerprint, self._get_ocr_cache_version())
+        
+        if cached is not None:
+            text_data = cached['text_blocks']
+            print(f"INFO: Page {page_num} found in page OCR cache")
+        else:
+            # Extract text using selected OCR engine
+            if self.ocr_engine == 'easyocr' and EASYOCR_AVAILABLE:
+                text_data = self._extract_with_easyocr(processed_image)
+            else:
+                text_data = self._extract_with_tesseract(processed_image)
+            
+            if page_cache is not None:
+                page_cache.put(fingerprint, self._get_ocr_cache_version(), {'text_blocks': text_data})
+        
+        page_info = {
+            'page_number': page_num,
+            'text_blocks': text_data,
+            'full_text': ' '.join([block['text'] for block in text_data if block['text'].strip()]),
+            'image_size': (page_array.shape[1], page_array.shape[0]),
+            'ocr_cached': cached is not None
+        }
+        
+        print(f"SUCCESS: Page {page_num}: {len(text_data)} text blocks, {len(page_info['full_text'])} characters")
+        return page_info
+
+    def _get_ocr_cache_version(self) -> str:
+        """Page cache version: OCR engine and version plus the settings that shape text_blocks"""
+        if self._ocr_cache_version is None:
+            if self.ocr_engine == 'easyocr' and EASYOCR_AVAILABLE:
+                import easyocr
+                self._ocr_cache_version = make_version('easyocr', getattr(easyocr, '__version__', 'unknown'),
+                                                       {'converter': 'ocr', 'languages': ['en'], 'min_confidence': 0.3})
+            else:
+                from ocr_backend import get_ocr_backend
+                backend = get_ocr_backend()
+                self._ocr_cache_version = make_version(backend.name, backend.version(),
+                                                       {'converter': 'ocr', 'psm': 3, 'min_confidence': 30})
+        return self._ocr_cache_version
+
     def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """Preprocess image for better OCR results"""
         # Convert to grayscale
@@ -156,8 +228,10 @@ class PDFOCRConverter:
 
     def _extract_with_tesseract(self, image: np.ndarray) -> List[Dict]:
         """Extract text using Tesseract OCR"""
+        from ocr_backend import get_ocr_backend
+        
         # Get detailed data from Tesseract
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        data = get_ocr_backend().image_to_data(image)
         
         text_blocks = []
         current_block = {'text': '', 'bbox': None, 'confidence': 0}
@@ -198,6 +272,10 @@ class PDFOCRConverter:
 
     def create_word_document(self, pages_data: List[Dict], output_path: str):
         """Create Word document from OCR data"""
+        from docx import Document
+        from docx.shared import Pt
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        
         print(f"INFO: Creating Word document: {output_path}")
         
         doc = Document()
@@ -227,6 +305,9 @@ class PDFOCRConverter:
 
     def create_powerpoint_document(self, pages_data: List[Dict], output_path: str):
         """Create PowerPoint document from OCR data"""
+        from pptx import Presentation
+        from pptx.util import Inches as PptxInches, Pt as PptxPt
+        
         print(f"INFO: Creating PowerPoint document: {output_path}")
         
         prs = Presentation()
@@ -313,6 +394,54 @@ class PDFOCRConverter:
         return paragraphs
 
 
+def run_conversion(converter: PDFOCRConverter, input_pdf: str, output_file: str,
+                   output_format: str = 'docx', dpi: int = 200, workers: Optional[int] = None) -> Dict:
+    """
+    Run a single OCR conversion and return the JSON-serialisable result
+    
+    Shared by the command line entry point and the persistent conversion worker.
+    """
+    file_info = get_pdf_metadata(input_pdf)
+    if file_info['needs_pass']:
+        return {
+            'success': False,
+            'error': 'PDF is password-protected'
+        }
+    print(f"INFO: {file_info['pages']} page(s), {file_info['size_mb']} MB")
+    
+    # Extract text from PDF
+    pages_data = converter.extract_text_from_pdf(input_pdf, dpi=dpi, workers=workers)
+    
+    if not pages_data:
+        return {
+            'success': False,
+            'error': 'No text could be extracted from the PDF'
+        }
+    
+    # Create output document based on format
+    if output_format == 'docx':
+        converter.create_word_document(pages_data, output_file)
+    elif output_format == 'pptx':
+        converter.create_powerpoint_document(pages_data, output_file)
+    else:
+        return {
+            'success': False,
+            'error': 'Excel conversion removed. Use professional_pdf_converter.py instead.'
+        }
+    
+    total_text = sum(len(page['full_text']) for page in pages_data)
+    return {
+        'success': True,
+        'pages_processed': len(pages_data),
+        'total_characters': total_text,
+        'cached_pages': sum(1 for page in pages_data if page.get('ocr_cached')),
+        'blank_pages': [page['page_number'] for page in pages_data if page.get('blank')],
+        'text_layer_pages': [page['page_number'] for page in pages_data if page.get('text_layer')],
+        'output_file': output_file,
+        'format': output_format
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description='Convert PDF to Office documents using OCR')
     parser.add_argument('input_pdf', help='Input PDF file path')
@@ -322,39 +451,30 @@ def main():
     parser.add_argument('--ocr-engine', choices=['tesseract', 'easyocr'], default='tesseract',
                        help='OCR engine to use')
     parser.add_argument('--dpi', type=int, default=200, help='DPI for PDF to image conversion')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='OCR worker processes (default: OCR_WORKERS or CPU count, 1 = serial)')
+    parser.add_argument('--no-cache', action='store_true', default=False,
+                       help='Always convert, bypassing the result cache')
     
     args = parser.parse_args()
     
     try:
-        # Initialize converter
-        converter = PDFOCRConverter(ocr_engine=args.ocr_engine)
-        
-        # Extract text from PDF
-        pages_data = converter.extract_text_from_pdf(args.input_pdf, dpi=args.dpi)
+        def convert():
+            # Initialize converter
+            converter = PDFOCRConverter(ocr_engine=args.ocr_engine)
+            
+            return run_conversion(converter, args.input_pdf, args.output_file,
+                                  output_format=args.format, dpi=args.dpi, workers=args.workers)
         
-        if not pages_data:
-            print("ERROR: No text could be extracted from the PDF")
-            sys.exit(1)
+        options = {'output_format': args.format, 'ocr_engine': args.ocr_engine, 'dpi': args.dpi}
+        result = cached_conversion('ocr', args.input_pdf, args.output_file, options, convert,
+                                   use_cache=not args.no_cache)
         
-        # Create output document based on format
-        if args.format == 'docx':
-            converter.create_word_document(pages_data, args.output_file)
-        elif args.format == 'pptx':
-            converter.create_powerpoint_document(pages_data, args.output_file)
-        elif args.format == 'xlsx':
-            print("ERROR: Excel conversion removed. Use professional_pdf_converter.py instead.")
+        if not result['success']:
+            print(f"ERROR: {result['error']}")
             sys.exit(1)
         
         # Return success info as JSON
-        total_text = sum(len(page['full_text']) for page in pages_data)
-        result = {
-            'success': True,
-            'pages_processed': len(pages_data),
-            'total_characters': total_text,
-            'output_file': args.output_file,
-            'format': args.format
-        }
-        
         print(f"\nSUCCESS: {json.dumps(result)}")
         
     except Exception as e:
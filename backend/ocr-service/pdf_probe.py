@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Probe and Page Classification
+Decides page by page whether a PDF page carries a usable text layer or is a
+scanned image that needs OCR, using PyMuPDF's text and image placement data
+(no rendering). Also turns a text page's native text layer into the same
+text_blocks layout the OCR converters produce, so both kinds of page can be
+merged into one document.
+
+Run as a command, it probes a bounded sample of pages and prints page count,
+encryption, text density, image coverage and per-page verdicts as JSON:
+
+    python pdf_probe.py input.pdf [--max-pages 8]
+
+Page verdicts are cached per file (path, size and modification time), in
+memory and on disk, so the converter that runs after a probe reuses them.
+Both caches are bounded: the worker lives long and every upload is a new file.
+
+Environment:
+    PROBE_CACHE_MAX_FILES - verdict files kept on disk before the oldest are removed (default: 1000)
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from pdf_metadata import file_key, get_pdf_metadata
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# A page this much covered by images, with little text, is a scan (stamps, headers or
+# page numbers added on top of the image do not make it a text page). Pages with little
+# text but no such image - blank separators, covers, vector figures - stay 'text':
+# there is nothing on them for OCR to read, and pdf2docx keeps what is there.
+SCANNED_IMAGE_COVERAGE = 0.7
+SCANNED_MAX_TEXT_CHARS = 200
+
+# PyMuPDF span flag for bold fonts
+_BOLD_FLAG = 16
+
+# Bump when the classification rules change, so verdict files written by older code are not reused
+VERDICT_VERSION = 2
+
+# Files whose verdicts are remembered per process; the worker lives long, so keep it bounded
+_MAX_CACHED_FILES = 256
+
+# Pages classified per file key, shared by every caller in this process
+_verdict_cache: 'OrderedDict[str, Dict[int, Dict]]' = OrderedDict()
+
+
+def _verdict_cache_dir() -> str:
+    cache_dir = os.environ.get('CONVERSION_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pdf_converter_cache'))
+    return os.path.join(cache_dir, 'probe')
+
+
+def _verdict_cache_path(key: str) -> str:
+    return os.path.join(_verdict_cache_dir(), f"{key}-v{VERDICT_VERSION}.json")
+
+
+def _max_cached_files_on_disk() -> int:
+    try:
+        return max(1, int(os.environ.get('PROBE_CACHE_MAX_FILES', '1000')))
+    except ValueError:
+        return 1000
+
+
+def _load_verdicts(key: str) -> Dict[int, Dict]:
+    """Cached page verdicts for a file version, from memory or from a previous process"""
+    if key in _verdict_cache:
+        _verdict_cache.move_to_end(key)
+        return _verdict_cache[key]
+
+    verdicts = {}
+    path = _verdict_cache_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            verdicts = {int(page): verdict for page, verdict in json.load(f).items()}
+        # Modification time is the recency used for eviction
+        os.utime(path)
+    except (OSError, ValueError):
+        pass
+
+    _verdict_cache[key] = verdicts
+    while len(_verdict_cache) > _MAX_CACHED_FILES:
+        _verdict_cache.popitem(last=False)
+    return verdicts
+
+
+def _evict_verdict_files():
+    """Remove the least recently used verdict files beyond PROBE_CACHE_MAX_FILES"""
+    cache_dir = _verdict_cache_dir()
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.json')]
+    except OSError:
+        return
+
+    excess = len(entries) - _max_cached_files_on_disk()
+    if excess <= 0:
+        return
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:excess]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _store_verdicts(key: str, verdicts: Dict[int, Dict]):
+    """Persist page verdicts so a converter in another process can reuse them"""
+    path = _verdict_cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(verdicts, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"WARNING: Could not cache page verdicts: {e}", file=sys.stderr)
+        return
+    _evict_verdict_files()
+
+
+def image_coverage(page: fitz.Page) -> float:
+    """Fraction of the page area covered by placed images (overlaps counted once per image, capped at 1)"""
+    page_rect = page.rect
+    page_area = abs(page_rect.width * page_rect.height)
+    if page_area == 0:
+        return 0.0
+
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info['bbox']) & page_rect
+        if not bbox.is_empty:
+            covered += abs(bbox.width * bbox.height)
+
+    return min(1.0, covered / page_area)
+
+
+def classify_page(page: fitz.Page) -> Dict:
+    """
+    Classify one page as 'text' (use the text layer) or 'scanned' (needs OCR)
+
+    Returns:
+        Dict with page (1-based), verdict, text_chars and image_coverage
+    """
+    text_chars = len(page.get_text('text').strip())
+    coverage = image_coverage(page)
+
+    if coverage >= SCANNED_IMAGE_COVERAGE and text_chars < SCANNED_MAX_TEXT_CHARS:
+        verdict = 'scanned'
+    else:
+        verdict = 'text'
+
+    return {
+        'page': page.number + 1,
+        'verdict': verdict,
+        'text_chars': text_chars,
+        'image_coverage': round(coverage, 3)
+    }
+
+
+def classify_pages(pdf_path: str, page_numbers: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Classify pages of a PDF
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 1-based pages to classify (default: all)
+
+    Returns:
+        One classify_page() result per page, in page order
+    """
+    key = file_key(pdf_path)
+    cached = _load_verdicts(key)
+
+    doc = None
+    try:
+        if page_numbers is None:
+            page_numbers = range(1, get_pdf_metadata(pdf_path)['pages'] + 1)
+
+        missing = [page_number for page_number in page_numbers if page_number not in cached]
+        if missing:
+            doc = fitz.open(pdf_path)
+            for page_number in missing:
+                cached[page_number] = classify_page(doc[page_number - 1])
+            _store_verdicts(key, cached)
+    finally:
+        if doc is not None:
+            doc.close()
+
+    return [cached[page_number] for page_number in page_numbers]
+
+
+def sample_page_numbers(page_count: int, max_pages: int) -> List[int]:
+    """
+    Pick at most `max_pages` 1-based pages: the first few plus an even spread to the end
+
+    Small documents are sampled in full.
+    """
+    if page_count <= max_pages:
+        return list(range(1, page_count + 1))
+
+    head = min(3, max_pages)
+    pages = list(range(1, head + 1))
+    remaining = max_pages - head
+    if remaining > 0:
+        step = (page_count - head) / remaining
+        pages.extend(head + int(round(step * (i + 1))) for i in range(remaining))
+    return sorted(set(pages))
+
+
+def probe_pdf(pdf_path: str, max_pages: Optional[int] = None) -> Dict:
+    """
+    Probe a PDF from a bounded sample of pages
+
+    Args:
+        pdf_path: Path to the PDF file
+        max_pages: Pages to sample, defaults to PDF_PROBE_MAX_PAGES (8)
+
+    Returns:
+        Dict with page_count, encrypted, sampled_pages, text_density (mean characters
+        per sampled page), image_coverage (mean), scanned_ratio, pdf_type
+        ('text-based', 'image-based' or 'mixed') and the per-page verdicts
+    """
+    start_time = time.time()
+    if max_pages is None:
+        max_pages = int(os.environ.get('PDF_PROBE_MAX_PAGES', '8'))
+
+    metadata = get_pdf_metadata(pdf_path)
+    page_count = metadata['pages']
+    encrypted = metadata['needs_pass']
+
+    result = {
+        'success': True,
+        'page_count': page_count,
+        'encrypted': encrypted
+    }
+
+    if encrypted or page_count == 0:
+        # Nothing can be read without the password (or at all)
+        result.update(sampled_pages=[], text_density=0.0, image_coverage=0.0,
+                      scanned_ratio=0.0, pdf_type=None, pages=[])
+    else:
+        verdicts = classify_pages(pdf_path, sample_page_numbers(page_count, max(1, max_pages)))
+        sampled = len(verdicts)
+        result.update(
+            sampled_pages=[verdict['page'] for verdict in verdicts],
+            text_density=round(sum(verdict['text_chars'] for verdict in verdicts) / sampled, 1),
+            image_coverage=round(sum(verdict['image_coverage'] for verdict in verdicts) / sampled, 3),
+            scanned_ratio=round(sum(1 for verdict in verdicts if verdict['verdict'] != 'text') / sampled, 3),
+            pdf_type=summarize_verdicts(verdicts),
+            pages=verdicts
+        )
+
+    result['duration_ms'] = round((time.time() - start_time) * 1000, 1)
+    return result
+
+
+def summarize_verdicts(verdicts: List[Dict]) -> str:
+    """Document-level label from page verdicts: 'text-based', 'image-based' or 'mixed'"""
+    scanned = sum(1 for verdict in verdicts if verdict['verdict'] == 'scanned')
+    if scanned == 0:
+        return 'text-based'
+    if scanned == len(verdicts):
+        return 'image-based'
+    return 'mixed'
+
+
+def native_text_blocks(page: fitz.Page, dpi: int) -> List[Dict]:
+    """
+    Read a page's text layer as OCR-style text blocks
+
+    Each text span becomes one block. Coordinates are scaled to pixels at `dpi`
+    so they line up with OCR'd pages rendered at the same resolution.
+
+    Returns:
+        Blocks with text, bbox, confidence (100), font_size (points), font_weight,
+        line_height and Tesseract-style block_num / par_num / line_num / word_num
+    """
+    scale = dpi / 72.0
+    text_blocks = []
+
+    text_dict = page.get_text('dict')
+    for block_index, block in enumerate(text_dict.get('blocks', [])):
+        if block.get('type', 0) != 0:  # Skip image blocks
+            continue
+
+        for line_index, line in enumerate(block.get('lines', [])):
+            for span_index, span in enumerate(line.get('spans', [])):
+                text = span.get('text', '').strip()
+                if not text:
+                    continue
+
+                x0, y0, x1, y1 = (int(round(value * scale)) for value in span['bbox'])
+                text_blocks.append({
+                    'text': text,
+                    'bbox': (x0, y0, x1, y1),
+                    'confidence': 100,
+                    'font_size': max(6, min(72, int(round(span.get('size', 11))))),
+                    'font_weight': 'bold' if span.get('flags', 0) & _BOLD_FLAG else 'normal',
+                    'line_height': y1 - y0,
+                    'word_num': span_index + 1,
+                    'line_num': line_index + 1,
+                    'par_num': 1,
+                    'block_num': block_index + 1
+                })
+
+    return text_blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe a PDF: page count, encryption and text/scanned verdicts')
+    parser.add_argument('input_pdf', help='Input PDF file path')
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help='Pages to sample (default: PDF_PROBE_MAX_PAGES or 8)')
+
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps(probe_pdf(args.input_pdf, args.max_pages)))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -32,31 +32,22 @@ from pptx.dml.color import RGBColor
 from pptx.enum.dml import MSO_THEME_COLOR
 
 # Image processing for fallback
-from pdf2image import convert_from_path
-import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
 
-# Configure Tesseract path for cross-platform compatibility
-import platform
-import os
-
-if platform.system() == 'Windows':
-    tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-elif platform.system() == 'Darwin':  # macOS
-    tesseract_path = '/usr/local/bin/tesseract'
-else:  # Linux
-    tesseract_path = '/usr/bin/tesseract'
-
-# Check if tesseract exists at the platform-specific path, otherwise use system PATH
-if os.path.exists(tesseract_path):
-    pytesseract.pytesseract.tesseract_cmd = tesseract_path
+from ocr_backend import get_ocr_backend
+from page_renderer import PageRasterCache
+from pdf_metadata import get_pdf_metadata
+from pdf_probe import classify_pages, summarize_verdicts
+from result_cache import cached_conversion
 
 
 class PDFToPPTLayoutPreserver:
     def __init__(self):
         """Initialize the layout-preserving PDF to PowerPoint converter"""
+        # Page rasters for the conversion in progress, so each page is decoded once
+        self.raster_cache = None
         print("INFO: PDF to PowerPoint Layout-Preserving Converter initialized", file=sys.stderr)
 
     def convert_pdf_to_powerpoint(self, pdf_path: str, output_path: str) -> bool:
@@ -73,6 +64,7 @@ class PDFToPPTLayoutPreserver:
         """
         try:
             print(f"INFO: Starting layout-preserving PDF to PowerPoint conversion: {pdf_path}", file=sys.stderr)
+            self.raster_cache = PageRasterCache(pdf_path)
             
             # Step 1: Detect PDF type
             pdf_type = self._detect_pdf_type(pdf_path)
@@ -106,33 +98,34 @@ class PDFToPPTLayoutPreserver:
             print(f"ERROR: Layout-preserving PDF to PowerPoint conversion failed: {e}", file=sys.stderr)
             traceback.print_exc()
             return False
+        
+        finally:
+            if self.raster_cache is not None:
+                print(f"INFO: Page rasters: {self.raster_cache.renders} rendered, {self.raster_cache.hits} reused", file=sys.stderr)
+                self.raster_cache.close()
+                self.raster_cache = None
+
+    def _get_page_raster(self, pdf_path: str, page_number: int, dpi: int) -> np.ndarray:
+        """Return a page as an RGB array, from the conversion's raster cache when one is open"""
+        if self.raster_cache is not None and self.raster_cache.pdf_path == pdf_path:
+            return self.raster_cache.get(page_number, dpi)
+        
+        with PageRasterCache(pdf_path) as cache:
+            return cache.get(page_number, dpi)
 
     def _detect_pdf_type(self, pdf_path: str) -> str:
         """
-        Detect if PDF is text-based or image-based (scanned)
+        Detect if PDF is text-based, image-based (scanned) or a mix of both, page by page
         
         Returns:
-            'text-based' or 'image-based'
+            'text-based', 'image-based' or 'mixed'
         """
         try:
-            doc = fitz.open(pdf_path)
-            total_text_length = 0
-            total_pages = len(doc)
-            
-            for page_num in range(min(3, total_pages)):  # Check first 3 pages
-                page = doc[page_num]
-                text = page.get_text()
-                total_text_length += len(text.strip())
-            
-            doc.close()
-            
-            # If we found substantial text, it's likely text-based
-            avg_text_per_page = total_text_length / min(3, total_pages)
-            
-            if avg_text_per_page > 100:  # Threshold for text-based
-                return 'text-based'
-            else:
-                return 'image-based'
+            verdicts = classify_pages(pdf_path)
+            scanned_pages = [v['page'] for v in verdicts if v['verdict'] != 'text']
+            if scanned_pages:
+                print(f"INFO: Pages without a text layer (OCR fallback): {scanned_pages}", file=sys.stderr)
+            return summarize_verdicts(verdicts)
                 
         except Exception as e:
             print(f"WARNING: Could not analyze PDF type: {e}", file=sys.stderr)
@@ -273,18 +266,14 @@ class PDFToPPTLayoutPreserver:
         """
         try:
             # Convert specific page to image
-            pages = convert_from_path(pdf_path, dpi=200, first_page=page_num, last_page=page_num)
-            if not pages:
-                return []
-            
-            page_image = pages[0]
-            page_array = np.array(page_image)
+            page_array = self._get_page_raster(pdf_path, page_num, 200)
+            image_height, image_width = page_array.shape[:2]
             
             # Preprocess image for better OCR
             processed_image = self._preprocess_image_for_ocr(page_array)
             
             # Extract text using Tesseract
-            ocr_data = pytesseract.image_to_data(processed_image, output_type=pytesseract.Output.DICT)
+            ocr_data = get_ocr_backend().image_to_data(processed_image)
             
             text_elements = []
             for i in range(len(ocr_data['text'])):
@@ -293,8 +282,8 @@ class PDFToPPTLayoutPreserver:
                     if text:
                         # Convert OCR coordinates to PDF coordinates
                         # OCR gives coordinates in image pixels, we need to scale to PDF points
-                        scale_x = page_rect.width / page_image.width
-                        scale_y = page_rect.height / page_image.height
+                        scale_x = page_rect.width / image_width
+                        scale_y = page_rect.height / image_height
                         
                         x = ocr_data['left'][i] * scale_x
                         y = ocr_data['top'][i] * scale_y
@@ -422,6 +411,10 @@ class PDFToPPTLayoutPreserver:
                     except:
                         pass
                 
+                # The slide is finished; its page raster is not needed again
+                if self.raster_cache is not None:
+                    self.raster_cache.release(page_num)
+                
                 print(f"SUCCESS: Created slide {page_num} with background image and {text_added} editable text elements", file=sys.stderr)
             
             # Save presentation
@@ -616,37 +609,28 @@ class PDFToPPTLayoutPreserver:
         """Convert PDF page to background image with text areas masked out"""
         try:
             # Convert PDF page to high-quality image
-            pages = convert_from_path(
-                pdf_path, 
-                dpi=150,  # Good balance between quality and file size
-                first_page=page_number, 
-                last_page=page_number
-            )
-            
-            if not pages:
-                return None
-            
-            page_image = pages[0]
-            
-            # Convert PIL image to numpy array for processing
-            img_array = np.array(page_image)
+            # 150 DPI is a good balance between quality and file size; copy because text areas are masked in place
+            img_array = self._get_page_raster(pdf_path, page_number, 150).copy()
+            image_height, image_width = img_array.shape[:2]
             
             # Mask out text areas to prevent doubling
             if text_elements:
-                # Get actual PDF page dimensions from the first text element or use standard A4
+                # Get actual PDF page dimensions, from the open document when there is one
                 try:
-                    doc = fitz.open(pdf_path)
-                    page = doc[page_number - 1]
-                    pdf_width = page.rect.width
-                    pdf_height = page.rect.height
-                    doc.close()
+                    if self.raster_cache is not None and self.raster_cache.pdf_path == pdf_path:
+                        page_rect = self.raster_cache.page_rect(page_number)
+                    else:
+                        with fitz.open(pdf_path) as doc:
+                            page_rect = doc[page_number - 1].rect
+                    pdf_width = page_rect.width
+                    pdf_height = page_rect.height
                 except:
                     pdf_width = 595.0  # Standard A4 width in points
                     pdf_height = 842.0  # Standard A4 height in points
                 
                 # Calculate scaling factor from PDF points to image pixels
-                scale_x = page_image.width / pdf_width
-                scale_y = page_image.height / pdf_height
+                scale_x = image_width / pdf_width
+                scale_y = image_height / pdf_height
                 
                 # Create a mask for text areas
                 for text_elem in text_elements:
@@ -657,10 +641,10 @@ class PDFToPPTLayoutPreserver:
                     y2 = int(bbox[3] * scale_y)
                     
                     # Ensure coordinates are within image bounds
-                    x1 = max(0, min(x1, page_image.width))
-                    y1 = max(0, min(y1, page_image.height))
-                    x2 = max(x1, min(x2, page_image.width))
-                    y2 = max(y1, min(y2, page_image.height))
+                    x1 = max(0, min(x1, image_width))
+                    y1 = max(0, min(y1, image_height))
+                    x2 = max(x1, min(x2, image_width))
+                    y2 = max(y1, min(y2, image_height))
                     
                     # Fill text area with white to remove background text
                     img_array[y1:y2, x1:x2] = [255, 255, 255]  # White fill
@@ -797,10 +781,47 @@ class PDFToPPTLayoutPreserver:
         return font_mapping.get(font_name, font_name if font_name else 'Arial')
 
 
+def run_conversion(converter: PDFToPPTLayoutPreserver, input_pdf: str, output_pptx: str) -> Dict:
+    """
+    Run a single PDF to PowerPoint conversion and return the JSON-serialisable result
+    
+    Shared by the command line entry point and the persistent conversion worker.
+    """
+    if not os.path.exists(input_pdf):
+        return {
+            'success': False,
+            'error': f"Input PDF file not found: {input_pdf}"
+        }
+    
+    file_info = get_pdf_metadata(input_pdf)
+    if file_info['needs_pass']:
+        return {
+            'success': False,
+            'error': 'PDF is password-protected'
+        }
+    print(f"INFO: {file_info['pages']} page(s), {file_info['size_mb']} MB", file=sys.stderr)
+    
+    success = converter.convert_pdf_to_powerpoint(input_pdf, output_pptx)
+    
+    if not success:
+        return {
+            'success': False,
+            'error': 'PDF to PowerPoint conversion failed'
+        }
+    
+    return {
+        'success': True,
+        'output_file': output_pptx,
+        'file_info': file_info
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description='Convert PDF to PowerPoint with preserved layout')
     parser.add_argument('input_pdf', help='Input PDF file path')
     parser.add_argument('output_pptx', help='Output PowerPoint file path')
+    parser.add_argument('--no-cache', action='store_true', default=False,
+                       help='Always convert, bypassing the result cache')
     
     args = parser.parse_args()
     
@@ -808,11 +829,14 @@ def main():
         print(f"ERROR: Input PDF file not found: {args.input_pdf}", file=sys.stderr)
         sys.exit(1)
     
-    # Create converter and convert
-    converter = PDFToPPTLayoutPreserver()
-    success = converter.convert_pdf_to_powerpoint(args.input_pdf, args.output_pptx)
+    # Create converter and convert (a cached result skips both)
+    result = cached_conversion(
+        'ppt', args.input_pdf, args.output_pptx, {},
+        lambda: run_conversion(PDFToPPTLayoutPreserver(), args.input_pdf, args.output_pptx),
+        use_cache=not args.no_cache
+    )
     
-    if success:
+    if result['success']:
         print(f"SUCCESS: PDF successfully converted to PowerPoint: {args.output_pptx}")
         sys.exit(0)
     else:
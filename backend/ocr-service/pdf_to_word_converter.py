@@ -3,17 +3,15 @@
 """
 PDF to Word Conversion Service
 Converts PDFs to Word documents using pdf2docx for text-based PDFs
-and OCR + pdf2docx for scanned PDFs
+and OCR + a native python-docx layout writer for scanned PDFs
 """
 
 import argparse
 import json
 import sys
-import os
 from pathlib import Path
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Tuple, Union, Optional
 import traceback
-import tempfile
 
 # Ensure UTF-8 encoding for output
 if sys.stdout.encoding != 'utf-8':
@@ -25,36 +23,55 @@ if sys.stderr.encoding != 'utf-8':
 from pdf2docx import Converter
 
 # PDF and image processing for OCR
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
-
-# Configure Tesseract path for cross-platform compatibility
-import platform
-import os
-
-if platform.system() == 'Windows':
-    tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-elif platform.system() == 'Darwin':  # macOS
-    tesseract_path = '/usr/local/bin/tesseract'
-else:  # Linux
-    tesseract_path = '/usr/bin/tesseract'
-
-# Check if tesseract exists at the platform-specific path, otherwise use system PATH
-if os.path.exists(tesseract_path):
-    pytesseract.pytesseract.tesseract_cmd = tesseract_path
 import cv2
 import numpy as np
 
 # Document generation for OCR results
 from docx import Document
 from docx.shared import Inches, Pt
+from docx.enum.section import WD_SECTION
+from docx.oxml.ns import qn
+from docx.section import Section
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+import fitz  # PyMuPDF
+
+from page_renderer import is_blank_page, iter_page_images
+from pdf_metadata import get_pdf_metadata
+from pdf_probe import classify_pages, native_text_blocks
+from ocr_parallel import map_pages, resolve_worker_count
+from ocr_backend import get_ocr_backend
+from result_cache import cached_conversion
+from page_ocr_cache import fingerprint_image, get_page_ocr_cache, make_version
+
+
+# Tesseract configurations: the primary pass, plus the extra page segmentation
+# modes that are only tried when the primary pass looks weak
+# PSM 3 = Fully automatic page segmentation, but no OSD
+# PSM 6 = Uniform block of text
+# PSM 1 = Automatic page segmentation with OSD
+PRIMARY_TESSERACT_CONFIG = {'psm': 3, 'variables': {'preserve_interword_spaces': 1, 'textord_heavy_nr': 1}}
+FALLBACK_TESSERACT_CONFIGS = [
+    {'psm': 6, 'variables': {'preserve_interword_spaces': 1, 'textord_heavy_nr': 1}},
+    {'psm': 1, 'variables': {'preserve_interword_spaces': 1}}
+]
+
 
 class PDFToWordConverter:
-    def __init__(self):
-        """Initialize the PDF to Word converter"""
+    def __init__(self, min_confidence: float = 70.0, min_words: int = 5):
+        """
+        Initialize the PDF to Word converter
+        
+        Args:
+            min_confidence: Mean word confidence the primary Tesseract pass must reach
+                            to skip the extra PSM passes
+            min_words: Number of words the primary pass must find to skip the extra passes
+        """
+        self.min_confidence = min_confidence
+        self.min_words = min_words
+        self.last_ocr_report = None
+        # Page OCR cache version, resolved on first use (needs the Tesseract version)
+        self._ocr_cache_version = None
         print("INFO: PDF to Word Converter initialized", file=sys.stderr)
 
     def convert_text_based_pdf(self, pdf_path: str, output_path: str) -> bool:
@@ -86,101 +103,180 @@ class PDFToWordConverter:
             traceback.print_exc()
             return False
 
-    def convert_scanned_pdf(self, pdf_path: str, output_path: str, dpi: int = 300) -> bool:
+    def convert_scanned_pdf(self, pdf_path: str, output_path: str, dpi: int = 300,
+                            workers: Optional[int] = None) -> bool:
         """
-        Convert scanned PDF to Word using OCR + pdf2docx
+        Convert scanned PDF to Word using OCR and write the DOCX directly from the OCR layout
         
         Args:
             pdf_path: Path to the input PDF file
             output_path: Path for the output Word document
             dpi: Resolution for PDF to image conversion
+            workers: Number of OCR processes (None = OCR_WORKERS / CPU count, 1 = serial)
             
         Returns:
             bool: True if conversion successful, False otherwise
         """
         try:
-            print(f"INFO: Converting scanned PDF using OCR + pdf2docx: {pdf_path}", file=sys.stderr)
+            print(f"INFO: Converting scanned PDF using OCR: {pdf_path}", file=sys.stderr)
+            self.last_ocr_report = None
             
             # Step 1: Extract text using OCR with post-processing
-            pages_data = self._extract_text_with_ocr(pdf_path, dpi)
+            pages_data = self._extract_text_with_ocr(pdf_path, dpi, workers)
             
             if not pages_data:
                 print("ERROR: No text could be extracted from the scanned PDF", file=sys.stderr)
                 return False
             
+            self.last_ocr_report = self._build_ocr_report(pages_data)
+            
             # Step 1.5: Post-process OCR results to improve accuracy
             pages_data = self._post_process_ocr_results(pages_data)
             
-            # Step 2: Create a temporary PDF with the OCR text
-            temp_pdf_path = self._create_text_pdf_from_ocr(pages_data, pdf_path)
-            
-            if not temp_pdf_path:
-                print("ERROR: Failed to create temporary text PDF from OCR results", file=sys.stderr)
+            # Step 2: Lay out the OCR content straight into the final Word document
+            if not self._write_docx_from_ocr(pages_data, output_path, dpi):
                 return False
             
-            try:
-                # Step 3: Convert the temporary text PDF to Word using pdf2docx
-                print(f"INFO: Converting OCR-generated PDF to Word using pdf2docx", file=sys.stderr)
-                cv = Converter(temp_pdf_path)
-                cv.convert(output_path, start=0, end=None)
-                cv.close()
-                
-                print(f"SUCCESS: Scanned PDF converted to Word via OCR + pdf2docx: {output_path}", file=sys.stderr)
-                return True
-                
-            finally:
-                # Clean up temporary PDF
-                if os.path.exists(temp_pdf_path):
-                    os.remove(temp_pdf_path)
-                    print(f"INFO: Cleaned up temporary PDF: {temp_pdf_path}", file=sys.stderr)
+            print(f"SUCCESS: Scanned PDF converted to Word via OCR: {output_path}", file=sys.stderr)
+            return True
             
         except Exception as e:
             print(f"ERROR: Failed to convert scanned PDF: {e}", file=sys.stderr)
             traceback.print_exc()
             return False
 
-    def _extract_text_with_ocr(self, pdf_path: str, dpi: int = 300) -> List[Dict]:
+    def convert_mixed_pdf(self, pdf_path: str, output_path: str, scanned_pages: List[int], dpi: int = 300,
+                          workers: Optional[int] = None) -> bool:
+        """
+        Convert a text-based PDF that contains some scanned pages
+        
+        pdf2docx converts the whole document, so the text pages keep their images,
+        tables and formatting. Only the scanned pages are OCR'd; the recognised text
+        of each one replaces the page raster pdf2docx placed in that page's section.
+        Scanned pages where OCR finds no text keep pdf2docx's image.
+        
+        Args:
+            pdf_path: Path to the input PDF file
+            output_path: Path for the output Word document
+            scanned_pages: 1-based pages without a usable text layer
+            dpi: Resolution the scanned pages are rendered at for OCR
+            workers: Number of OCR processes (None = OCR_WORKERS / CPU count, 1 = serial)
+            
+        Returns:
+            bool: True if conversion successful, False otherwise
+        """
+        if not self.convert_text_based_pdf(pdf_path, output_path):
+            return False
+        
+        try:
+            print(f"INFO: OCR of scanned pages {scanned_pages}", file=sys.stderr)
+            self.last_ocr_report = None
+            pages_data = self._ocr_pages(pdf_path, scanned_pages, dpi, workers)
+            self.last_ocr_report = self._build_ocr_report(pages_data)
+            pages_data = self._post_process_ocr_results(pages_data)
+            
+            doc = Document(output_path)
+            docx_pages = self._split_docx_pages(doc)
+            page_count = get_pdf_metadata(pdf_path)['pages']
+            if len(docx_pages) != page_count:
+                print(f"WARNING: pdf2docx wrote {len(docx_pages)} sections for {page_count} pages, "
+                      f"keeping scanned pages as images", file=sys.stderr)
+                return True
+            
+            px_to_pt = 72.0 / dpi
+            merged = []
+            for page_data in pages_data:
+                if not page_data['full_text'].strip():
+                    continue
+                
+                content, section_properties, anchor = docx_pages[page_data['page_number'] - 1]
+                section = Section(section_properties, doc.part)
+                paragraphs = self._add_ocr_paragraphs(doc, page_data, px_to_pt,
+                                                      section.left_margin.pt if section.left_margin else 0,
+                                                      section.top_margin.pt if section.top_margin else 0)
+                
+                # The paragraphs were appended to the end of the body; move them into the page's section
+                for paragraph in paragraphs:
+                    anchor.addprevious(paragraph._p)
+                for element in content:
+                    element.getparent().remove(element)
+                merged.append(page_data['page_number'])
+            
+            doc.save(output_path)
+            print(f"SUCCESS: Merged OCR text of pages {merged} into the pdf2docx document", file=sys.stderr)
+            return True
+            
+        except Exception as e:
+            # The pdf2docx document is complete on its own, with the scanned pages as images
+            print(f"WARNING: Could not merge OCR text, keeping the pdf2docx document: {e}", file=sys.stderr)
+            traceback.print_exc()
+            return True
+
+    @staticmethod
+    def _split_docx_pages(doc) -> List[Tuple[List, object, object]]:
+        """
+        Split a pdf2docx document body into its pages
+        
+        pdf2docx starts a new section for every PDF page, so a page's content runs up to
+        the paragraph carrying the next section break (the last page up to the body's
+        own section properties).
+        
+        Returns:
+            Per page: (content elements, sectPr element, element to insert new content before)
+        """
+        pages = []
+        content = []
+        for element in doc.element.body.iterchildren():
+            if element.tag == qn('w:sectPr'):
+                pages.append((content, element, element))
+                break
+            
+            section_properties = element.find(f"{qn('w:pPr')}/{qn('w:sectPr')}") if element.tag == qn('w:p') else None
+            if section_properties is not None:
+                # The section break paragraph itself stays; it carries the page's size and margins
+                pages.append((content, section_properties, element))
+                content = []
+            else:
+                content.append(element)
+        return pages
+
+    def _extract_text_with_ocr(self, pdf_path: str, dpi: int = 300, workers: Optional[int] = None) -> List[Dict]:
         """
         Extract text from PDF using OCR
         
+        Each page is classified first: pages with a usable text layer are read
+        directly and only scanned pages are OCR'd. Those are rendered, preprocessed
+        and OCR'd one at a time, so peak memory does not grow with the page count
+        even at 300 DPI, and spread over a pool of worker processes when more than
+        one worker is available.
+        
         Args:
             pdf_path: Path to the PDF file
             dpi: Resolution for PDF to image conversion
+            workers: Number of OCR processes (None or 0 = OCR_WORKERS / CPU count, 1 = serial)
             
         Returns:
             List of pages with extracted text and layout info
         """
         try:
             print(f"INFO: Converting PDF to images for OCR: {pdf_path}", file=sys.stderr)
-            
-            # Convert PDF pages to images
-            pages = convert_from_path(pdf_path, dpi=dpi)
-            print(f"INFO: Found {len(pages)} page(s)", file=sys.stderr)
+            verdicts = classify_pages(pdf_path)
+            text_pages = [v['page'] for v in verdicts if v['verdict'] == 'text']
+            ocr_pages = [v['page'] for v in verdicts if v['verdict'] != 'text']
+            print(f"INFO: Found {len(verdicts)} page(s): {len(text_pages)} with a text layer, {len(ocr_pages)} to OCR", file=sys.stderr)
             
             extracted_pages = []
             
-            for page_num, page_image in enumerate(pages, 1):
-                print(f"INFO: Processing page {page_num} with OCR...", file=sys.stderr)
-                
-                # Convert PIL image to numpy array for OpenCV
-                page_array = np.array(page_image)
-                
-                # Preprocess image for better OCR
-                processed_image = self._preprocess_image(page_array)
-                
-                # Extract text using Tesseract
-                text_data = self._extract_with_tesseract(processed_image)
-                
-                page_info = {
-                    'page_number': page_num,
-                    'text_blocks': text_data,
-                    'full_text': ' '.join([block['text'] for block in text_data if block['text'].strip()]),
-                    'image_size': page_image.size
-                }
-                
-                extracted_pages.append(page_info)
-                print(f"SUCCESS: Page {page_num}: {len(text_data)} text blocks, {len(page_info['full_text'])} characters", file=sys.stderr)
+            # Text pages: take the native text layer, no rendering or OCR
+            if text_pages:
+                with fitz.open(pdf_path) as doc:
+                    for page_num in text_pages:
+                        extracted_pages.append(self._extract_native_page(doc[page_num - 1], page_num, dpi))
+            
+            # Scanned pages: render and OCR
+            extracted_pages.extend(self._ocr_pages(pdf_path, ocr_pages, dpi, workers))
             
+            extracted_pages.sort(key=lambda page: page['page_number'])
             return extracted_pages
             
         except Exception as e:
@@ -188,6 +284,115 @@ class PDFToWordConverter:
             traceback.print_exc()
             return []
 
+    def _ocr_pages(self, pdf_path: str, page_numbers: List[int], dpi: int = 300,
+                   workers: Optional[int] = None) -> List[Dict]:
+        """Render and OCR the given 1-based pages, on a process pool when more than one worker is available"""
+        if not page_numbers:
+            return []
+        
+        workers = resolve_worker_count(workers, len(page_numbers))
+        if workers > 1:
+            print(f"INFO: Running OCR on {workers} worker processes", file=sys.stderr)
+            converter_options = {'min_confidence': self.min_confidence, 'min_words': self.min_words}
+            return map_pages(PDFToWordConverter, converter_options, pdf_path, dpi, page_numbers, workers)
+        
+        return [self._process_page(page_num, page_image)
+                for page_num, page_image in iter_page_images(pdf_path, dpi=dpi, grayscale=True,
+                                                             page_numbers=page_numbers)]
+
+    def _process_page(self, page_num: int, page_array: np.ndarray) -> Dict:
+        """Preprocess and OCR a single rendered page (grayscale or RGB array)"""
+        print(f"INFO: Processing page {page_num} with OCR...", file=sys.stderr)
+        
+        # Separator sheets and blank backs: nothing to recognise
+        if is_blank_page(page_array):
+            print(f"INFO: Page {page_num} is blank, skipping OCR", file=sys.stderr)
+            return {
+                'page_number': page_num,
+                'text_blocks': [],
+                'full_text': '',
+                'image_size': (page_array.shape[1], page_array.shape[0]),
+                'ocr_pass': 'skipped-blank',
+                'ocr_confidence': None,
+                'ocr_cached': False,
+                'blank': True
+            }
+        
+        # Preprocess image for better OCR
+        processed_image = self._preprocess_image(page_array)
+        
+        # Extract text using Tesseract, unless this exact page has been recognised before
+        page_cache = get_page_ocr_cache()
+        cached = None
+        if page_cache is not None:
+            fingerprint = fingerprint_image(processed_image)
+            cached = page_cache.get(fingerprint, self._get_ocr_cache_version())
+        
+        if cached is not None:
+            text_data, ocr_pass, confidence = cached['text_blocks'], cached['ocr_pass'], cached['confidence']
+            for block in text_data:
+                block['bbox'] = tuple(block['bbox'])
+        else:
+            text_data, ocr_pass, confidence = self._extract_with_tesseract(processed_image)
+            if page_cache is not None:
+                page_cache.put(fingerprint, self._get_ocr_cache_version(),
+                               {'text_blocks': text_data, 'ocr_pass': ocr_pass, 'confidence': confidence})
+        
+        page_info = {
+            'page_number': page_num,
+            'text_blocks': text_data,
+            'full_text': ' '.join([block['text'] for block in text_data if block['text'].strip()]),
+            'image_size': (page_array.shape[1], page_array.shape[0]),
+            'ocr_pass': ocr_pass,
+            'ocr_confidence': confidence,
+            'ocr_cached': cached is not None
+        }
+        
+        source = 'page cache' if cached is not None else ocr_pass
+        print(f"SUCCESS: Page {page_num}: {len(text_data)} text blocks, {len(page_info['full_text'])} characters ({source}, confidence {confidence})", file=sys.stderr)
+        return page_info
+
+    def _extract_native_page(self, page: fitz.Page, page_num: int, dpi: int) -> Dict:
+        """Read a text page's own text layer into the same layout as an OCR'd page"""
+        text_data = native_text_blocks(page, dpi)
+        
+        # Classify whole lines, the unit the native layer gives us reliably
+        lines = {}
+        for block in text_data:
+            lines.setdefault((block['block_num'], block['line_num']), []).append(block)
+        for line_blocks in lines.values():
+            line_text = ' '.join(block['text'] for block in line_blocks)
+            text_type = self._classify_text_type(line_text, max(block['font_size'] for block in line_blocks),
+                                                 min(block['bbox'][1] for block in line_blocks))
+            for block in line_blocks:
+                block['text_type'] = text_type
+        
+        zoom = dpi / 72.0
+        print(f"SUCCESS: Page {page_num}: {len(text_data)} text blocks from the text layer", file=sys.stderr)
+        return {
+            'page_number': page_num,
+            'text_blocks': text_data,
+            'full_text': ' '.join(block['text'] for block in text_data),
+            'image_size': (int(round(page.rect.width * zoom)), int(round(page.rect.height * zoom))),
+            'ocr_pass': 'text-layer',
+            'ocr_confidence': None,
+            'ocr_cached': False,
+            'text_layer': True
+        }
+
+    def _get_ocr_cache_version(self) -> str:
+        """Page cache version: OCR backend and version plus every setting that shapes text_blocks"""
+        if self._ocr_cache_version is None:
+            backend = get_ocr_backend()
+            self._ocr_cache_version = make_version(backend.name, backend.version(), {
+                'converter': 'word',
+                'primary': PRIMARY_TESSERACT_CONFIG,
+                'fallbacks': FALLBACK_TESSERACT_CONFIGS,
+                'min_confidence': self.min_confidence,
+                'min_words': self.min_words
+            })
+        return self._ocr_cache_version
+
     def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """Ultra-advanced image preprocessing for maximum OCR accuracy"""
         # Convert to grayscale
@@ -239,35 +444,19 @@ class PDFToWordConverter:
         
         return final_image
 
-    def _extract_with_tesseract(self, image: np.ndarray) -> List[Dict]:
-        """Extract text using Tesseract OCR with enhanced layout and font detection"""
-        # Configure Tesseract for maximum accuracy and layout preservation
-        # PSM 3 = Fully automatic page segmentation, but no OSD
-        # PSM 6 = Uniform block of text
-        # Try multiple PSM modes for better results
-        configs = [
-            r'--oem 3 --psm 3 -c preserve_interword_spaces=1 -c textord_heavy_nr=1',
-            r'--oem 3 --psm 6 -c preserve_interword_spaces=1 -c textord_heavy_nr=1',
-            r'--oem 3 --psm 1 -c preserve_interword_spaces=1'
-        ]
-        
-        best_data = None
-        best_confidence = 0
+    def _extract_with_tesseract(self, image: np.ndarray) -> Tuple[List[Dict], str, float]:
+        """
+        Extract text using Tesseract OCR with enhanced layout and font detection
         
-        # Try different configurations and pick the best result
-        for config in configs:
-            try:
-                data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=config)
-                avg_conf = np.mean([int(conf) for conf in data['conf'] if int(conf) > 0])
-                if avg_conf > best_confidence:
-                    best_confidence = avg_conf
-                    best_data = data
-            except:
-                continue
+        Returns:
+            (text blocks, OCR path taken for the page, mean word confidence)
+        """
+        best_data, ocr_pass, best_confidence = self._run_tesseract_adaptive(image)
         
-        if best_data is None:
-            # Fallback to basic configuration
-            best_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        # Per-paragraph statistics, built once so every word lookup below is O(1)
+        structure = self._build_structure_index(best_data)
+        # Full-page edge/stroke maps, built once so per-word weight checks are O(1)
+        weight_maps = self._build_weight_maps(image)
         
         text_blocks = []
         
@@ -280,9 +469,9 @@ class PDFToWordConverter:
                 x, y, w, h = best_data['left'][i], best_data['top'][i], best_data['width'][i], best_data['height'][i]
                 
                 # More accurate font characteristics detection
-                font_size = self._estimate_font_size_accurate(w, h, len(text), best_data, i)
-                font_weight = self._detect_font_weight_improved(image, x, y, w, h)
-                text_type = self._classify_text_type_improved(text, font_size, y, best_data, i)
+                font_size = self._estimate_font_size_accurate(w, h, len(text), best_data, i, structure)
+                font_weight = self._detect_font_weight_improved(image, x, y, w, h, weight_maps)
+                text_type = self._classify_text_type_improved(text, font_size, y, best_data, i, structure)
                 
                 text_blocks.append({
                     'text': text,
@@ -298,140 +487,257 @@ class PDFToWordConverter:
                     'block_num': best_data['block_num'][i]
                 })
         
-        return text_blocks
+        return text_blocks, ocr_pass, round(float(best_confidence), 1)
 
-    def _create_text_pdf_from_ocr(self, pages_data: List[Dict], original_pdf_path: str) -> str:
+    def _run_tesseract_adaptive(self, image: np.ndarray) -> Tuple[Dict, str, float]:
         """
-        Create a temporary text-based PDF from OCR results
-        This PDF can then be converted using pdf2docx for better formatting
+        Run one primary Tesseract pass, and the extra PSM passes only when it looks weak
+        
+        Returns:
+            (best Tesseract data, 'single-pass' | 'multi-pass' | 'basic', its mean confidence)
         """
+        ocr_backend = get_ocr_backend()
+        best_data = None
+        best_confidence = 0
+        
         try:
-            # Create temporary Word document first
-            temp_dir = tempfile.mkdtemp()
-            temp_docx_path = os.path.join(temp_dir, "ocr_temp.docx")
+            data = ocr_backend.image_to_data(image, **PRIMARY_TESSERACT_CONFIG)
+            avg_conf, word_count = self._score_tesseract_data(data)
+            if avg_conf > best_confidence:
+                best_confidence = avg_conf
+                best_data = data
             
-            # Create Word document from OCR data
-            doc = Document()
+            # A confident primary pass with enough words is kept as is
+            if avg_conf >= self.min_confidence and word_count >= self.min_words:
+                return best_data, 'single-pass', best_confidence
+        except Exception:
+            pass
+        
+        # Weak or failed primary pass: try the other segmentation modes and keep the best
+        for config in FALLBACK_TESSERACT_CONFIGS:
+            try:
+                data = ocr_backend.image_to_data(image, **config)
+                avg_conf, _ = self._score_tesseract_data(data)
+                if avg_conf > best_confidence:
+                    best_confidence = avg_conf
+                    best_data = data
+            except Exception:
+                continue
+        
+        if best_data is None:
+            # Fallback to basic configuration
+            return ocr_backend.image_to_data(image), 'basic', 0
+        
+        return best_data, 'multi-pass', best_confidence
+
+    def _score_tesseract_data(self, data: Dict) -> Tuple[float, int]:
+        """Mean confidence and word count of the recognised words in a Tesseract result"""
+        confidences = [float(conf) for text, conf in zip(data['text'], data['conf'])
+                       if text.strip() and float(conf) > 0]
+        if not confidences:
+            return 0.0, 0
+        return float(np.mean(confidences)), len(confidences)
+
+    def _build_ocr_report(self, pages_data: List[Dict]) -> Dict:
+        """Summarise which Tesseract path each page took"""
+        passes = [page.get('ocr_pass', 'single-pass') for page in pages_data
+                  if not page.get('blank') and not page.get('text_layer')]
+        return {
+            'single_pass_pages': passes.count('single-pass'),
+            'multi_pass_pages': len(passes) - passes.count('single-pass'),
+            'blank_pages': [page['page_number'] for page in pages_data if page.get('blank')],
+            'text_layer_pages': [page['page_number'] for page in pages_data if page.get('text_layer')],
+            'cached_pages': sum(1 for page in pages_data if page.get('ocr_cached')),
+            'pages': [
+                {
+                    'page': page['page_number'],
+                    'ocr_pass': page.get('ocr_pass'),
+                    'confidence': page.get('ocr_confidence')
+                }
+                for page in pages_data
+            ]
+        }
+
+    def _write_docx_from_ocr(self, pages_data: List[Dict], output_path: str, dpi: int = 300) -> bool:
+        """
+        Write OCR results straight into the final Word document
+        
+        Each scanned page becomes a section with the page's physical size. Paragraphs
+        keep their horizontal offset as a left indent and the vertical gap above them
+        as spacing, so the layout follows the scan without an intermediate PDF.
+        
+        Args:
+            pages_data: Post-processed OCR page data
+            output_path: Path for the output Word document
+            dpi: Resolution the pages were rendered at (pixels -> points)
             
-            # Add title
-            title = doc.add_heading('OCR Converted Document', 0)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        Returns:
+            bool: True if the document was written, False otherwise
+        """
+        try:
+            doc = Document()
+            px_to_pt = 72.0 / dpi
+            margin = Inches(0.5)
             
-            for page_data in pages_data:
-                # Add page break for pages after the first
-                if page_data['page_number'] > 1:
-                    doc.add_page_break()
+            for page_index, page_data in enumerate(pages_data):
+                # One section per page so every page keeps its own size
+                section = doc.sections[0] if page_index == 0 else doc.add_section(WD_SECTION.NEW_PAGE)
                 
-                # Group text blocks into structured content with layout reconstruction
-                structured_content = self._group_text_into_paragraphs(page_data['text_blocks'])
+                page_width, page_height = page_data.get('image_size', (0, 0))
+                if page_width and page_height:
+                    section.page_width = Pt(page_width * px_to_pt)
+                    section.page_height = Pt(page_height * px_to_pt)
+                section.left_margin = section.right_margin = margin
+                section.top_margin = section.bottom_margin = margin
                 
-                # Detect multi-column layout
-                columns = self._detect_columns(structured_content)
-                
-                for content_block in structured_content:
-                    text_content = content_block['text']
-                    if not text_content.strip():
-                        continue
-                    
-                    content_type = content_block.get('type', 'paragraph')
-                    font_size = content_block.get('font_size', 11)
-                    font_weight = content_block.get('font_weight', 'normal')
-                    
-                    # Create appropriate Word element based on content type with better formatting
-                    if content_type == 'title':
-                        heading = doc.add_heading(text_content, level=0)
-                        heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        # Make title larger and bold
-                        for run in heading.runs:
-                            run.font.size = Pt(max(16, font_size))
-                            run.font.bold = True
-                            
-                    elif content_type == 'heading':
-                        heading = doc.add_heading(text_content, level=1)
-                        # Preserve original heading size
-                        for run in heading.runs:
-                            run.font.size = Pt(max(12, font_size))
-                            if font_weight == 'bold':
-                                run.font.bold = True
-                                
-                    else:
-                        # Regular paragraph or caption
-                        p = doc.add_paragraph()
-                        
-                        # Add the text with proper formatting
-                        run = p.add_run(text_content)
-                        run.font.size = Pt(max(8, min(18, font_size)))
-                        
-                        if font_weight == 'bold':
-                            run.font.bold = True
-                        
-                        # Special formatting for captions
-                        if content_type == 'caption':
-                            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            run.font.italic = True
-                            run.font.size = Pt(max(8, font_size - 1))  # Slightly smaller for captions
-                        
-                        # Adjust line spacing based on original layout
-                        if content_type == 'paragraph':
-                            # Set line spacing closer to original
-                            p.paragraph_format.line_spacing = 1.15
-                            p.paragraph_format.space_after = Pt(6)
+                self._add_ocr_paragraphs(doc, page_data, px_to_pt, margin.pt, margin.pt)
+            
+            doc.save(output_path)
+            print(f"INFO: Wrote OCR Word document: {output_path}", file=sys.stderr)
+            return True
+            
+        except Exception as e:
+            print(f"ERROR: Failed to write Word document from OCR: {e}", file=sys.stderr)
+            traceback.print_exc()
+            return False
+
+    def _add_ocr_paragraphs(self, doc, page_data: Dict, px_to_pt: float, left_margin: float,
+                            top_margin: float) -> List:
+        """
+        Append one OCR'd page's paragraphs to the end of a document body
+        
+        Paragraphs keep their horizontal offset as a left indent and the vertical gap
+        above them as spacing.
+        
+        Args:
+            doc: python-docx Document
+            page_data: Post-processed OCR page data
+            px_to_pt: Scale from page pixels to points
+            left_margin: Left margin of the page's section, in points
+            top_margin: Top margin of the page's section, in points
             
-            doc.save(temp_docx_path)
-            print(f"INFO: Created temporary Word document: {temp_docx_path}", file=sys.stderr)
+        Returns:
+            The paragraphs added, in order
+        """
+        added = []
+        
+        # Group text blocks into structured content with layout reconstruction
+        structured_content = self._group_text_into_paragraphs(page_data['text_blocks'])
+        
+        # Bottom edge (in page points) of the previous paragraph, starting at the top margin
+        previous_bottom = top_margin
+        
+        for content_block in structured_content:
+            text_content = content_block['text']
+            if not text_content.strip():
+                continue
             
-            # Convert Word document to PDF using LibreOffice (if available)
-            # This creates a text-based PDF that pdf2docx can handle well
-            temp_pdf_path = os.path.join(temp_dir, "ocr_temp.pdf")
+            content_type = content_block.get('type', 'paragraph')
+            font_size = content_block.get('font_size', 11)
+            font_weight = content_block.get('font_weight', 'normal')
             
-            try:
-                import subprocess
-                # Try to convert using LibreOffice
-                cmd = [
-                    'soffice', '--headless', '--convert-to', 'pdf', 
-                    '--outdir', temp_dir, temp_docx_path
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-                
-                if result.returncode == 0 and os.path.exists(temp_pdf_path):
-                    print(f"INFO: Created temporary PDF from OCR: {temp_pdf_path}", file=sys.stderr)
-                    return temp_pdf_path
-                else:
-                    print(f"WARNING: LibreOffice conversion failed: {result.stderr}", file=sys.stderr)
-                    # Fall back to returning the Word document path
-                    return temp_docx_path
+            # Create appropriate Word element based on content type with better formatting
+            if content_type == 'title':
+                p = doc.add_heading(text_content, level=0)
+                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                # Make title larger and bold
+                for run in p.runs:
+                    run.font.size = Pt(max(16, font_size))
+                    run.font.bold = True
                     
-            except Exception as e:
-                print(f"WARNING: Could not create PDF from OCR Word document: {e}", file=sys.stderr)
-                # Return the Word document path as fallback
-                return temp_docx_path
+            elif content_type == 'heading':
+                p = doc.add_heading(text_content, level=1)
+                # Preserve original heading size
+                for run in p.runs:
+                    run.font.size = Pt(max(12, font_size))
+                    if font_weight == 'bold':
+                        run.font.bold = True
+                        
+            else:
+                # Regular paragraph or caption
+                p = doc.add_paragraph()
                 
-        except Exception as e:
-            print(f"ERROR: Failed to create temporary document from OCR: {e}", file=sys.stderr)
-            return ""
+                # Add the text with proper formatting
+                run = p.add_run(text_content)
+                run.font.size = Pt(max(8, min(18, font_size)))
+                
+                if font_weight == 'bold':
+                    run.font.bold = True
+                
+                # Special formatting for captions
+                if content_type == 'caption':
+                    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    run.font.italic = True
+                    run.font.size = Pt(max(8, font_size - 1))  # Slightly smaller for captions
+                
+                if content_type == 'paragraph':
+                    # Set line spacing closer to original
+                    p.paragraph_format.line_spacing = 1.15
+            
+            # Position: indent from the left margin and keep the gap to the previous paragraph
+            top = content_block.get('y_position', 0) * px_to_pt
+            bottom = content_block.get('y_end', 0) * px_to_pt
+            left = content_block.get('x_position', 0) * px_to_pt
+            
+            paragraph_format = p.paragraph_format
+            paragraph_format.space_before = Pt(max(0, top - previous_bottom))
+            paragraph_format.space_after = Pt(0)
+            if p.alignment != WD_ALIGN_PARAGRAPH.CENTER:
+                paragraph_format.left_indent = Pt(max(0, left - left_margin))
+            
+            previous_bottom = max(previous_bottom, bottom)
+            added.append(p)
+        
+        return added
 
-    def _estimate_font_size_accurate(self, width: int, height: int, text_length: int, data: Dict, index: int) -> int:
+    def _build_structure_index(self, data: Dict) -> Dict:
+        """
+        Index Tesseract data by (block, paragraph) in a single pass
+        
+        Returns:
+            Dict with, per (block_num, par_num) key:
+            'median_height' - median height of confident words (conf > 20)
+            'first_text_line' - lowest line_num holding any text
+            'row_count' - number of Tesseract rows in the paragraph
+        """
+        heights = {}
+        first_text_line = {}
+        row_count = {}
+        
+        for i, (bn, pn, ln) in enumerate(zip(data['block_num'], data['par_num'], data['line_num'])):
+            key = (bn, pn)
+            row_count[key] = row_count.get(key, 0) + 1
+            
+            if data['text'][i].strip():
+                if key not in first_text_line or ln < first_text_line[key]:
+                    first_text_line[key] = ln
+                if int(data['conf'][i]) > 20:
+                    heights.setdefault(key, []).append(data['height'][i])
+        
+        return {
+            'median_height': {key: np.median(values) for key, values in heights.items()},
+            'first_text_line': first_text_line,
+            'row_count': row_count
+        }
+
+    def _estimate_font_size_accurate(self, width: int, height: int, text_length: int, data: Dict, index: int,
+                                     structure: Optional[Dict] = None) -> int:
         """More accurate font size estimation using Tesseract data"""
         if text_length == 0:
             return 11
         
+        if structure is None:
+            structure = self._build_structure_index(data)
+        
         # Use height as primary indicator (more reliable than width)
         # Most fonts have height roughly equal to point size
         base_size = max(6, min(72, int(height * 0.8)))
         
-        # Check if this is part of a larger text block for context
-        block_num = data['block_num'][index]
-        par_num = data['par_num'][index]
-        
-        # Find other text in the same paragraph for size consistency
-        same_par_heights = []
-        for i, (bn, pn, h) in enumerate(zip(data['block_num'], data['par_num'], data['height'])):
-            if bn == block_num and pn == par_num and data['text'][i].strip() and int(data['conf'][i]) > 20:
-                same_par_heights.append(h)
+        # Use the median height of the paragraph for size consistency
+        par_key = (data['block_num'][index], data['par_num'][index])
+        median_height = structure['median_height'].get(par_key)
         
-        if same_par_heights:
-            # Use median height of paragraph for consistency
-            median_height = np.median(same_par_heights)
+        if median_height is not None:
             base_size = max(6, min(72, int(median_height * 0.8)))
         
         # Adjust based on text characteristics
@@ -459,7 +765,34 @@ class PDFToWordConverter:
             
         return estimated_size
     
-    def _detect_font_weight_improved(self, image: np.ndarray, x: int, y: int, w: int, h: int) -> str:
+    def _build_weight_maps(self, image: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Build summed-area tables of the features used for bold detection
+        
+        One Canny pass and one dilation cover the whole image; the count of dark,
+        edge and stroke pixels inside any box is then four table lookups.
+        
+        Returns:
+            Dict of integral images ('dark', 'edges', 'stroke'), each (h + 1, w + 1)
+        """
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+        dark = (image < 128).astype(np.uint8)
+        edges = (cv2.Canny(image, 50, 150) > 0).astype(np.uint8)
+        stroke = (cv2.dilate(image, kernel, iterations=1) != image).astype(np.uint8)
+        
+        return {
+            'dark': cv2.integral(dark),
+            'edges': cv2.integral(edges),
+            'stroke': cv2.integral(stroke)
+        }
+    
+    @staticmethod
+    def _box_sum(table: np.ndarray, x: int, y: int, w: int, h: int) -> int:
+        """Sum of the pixels in a box using a summed-area table"""
+        return int(table[y + h, x + w] - table[y, x + w] - table[y + h, x] + table[y, x])
+    
+    def _detect_font_weight_improved(self, image: np.ndarray, x: int, y: int, w: int, h: int,
+                                     weight_maps: Optional[Dict[str, np.ndarray]] = None) -> str:
         """Improved font weight detection using multiple methods"""
         try:
             # Ensure coordinates are within image bounds
@@ -472,25 +805,21 @@ class PDFToWordConverter:
             if w <= 0 or h <= 0:
                 return 'normal'
             
-            # Extract the text region
-            text_region = image[y:y+h, x:x+w]
+            if weight_maps is None:
+                # Single lookup: build the maps for this region only
+                weight_maps = self._build_weight_maps(image[y:y+h, x:x+w])
+                x, y = 0, 0
             
-            if text_region.size == 0:
-                return 'normal'
+            total_pixels = w * h
             
             # Method 1: Pixel density analysis
-            dark_pixels = np.sum(text_region < 128)
-            total_pixels = text_region.size
-            density = dark_pixels / total_pixels if total_pixels > 0 else 0
+            density = self._box_sum(weight_maps['dark'], x, y, w, h) / total_pixels
             
             # Method 2: Edge density (bold text has thicker strokes)
-            edges = cv2.Canny(text_region, 50, 150)
-            edge_density = np.sum(edges > 0) / edges.size if edges.size > 0 else 0
+            edge_density = self._box_sum(weight_maps['edges'], x, y, w, h) / total_pixels
             
             # Method 3: Stroke width analysis using morphological operations
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-            dilated = cv2.dilate(text_region, kernel, iterations=1)
-            stroke_diff = np.sum(dilated != text_region) / text_region.size if text_region.size > 0 else 0
+            stroke_diff = self._box_sum(weight_maps['stroke'], x, y, w, h) / total_pixels
             
             # Combine all methods for better accuracy
             bold_score = (density * 0.5) + (edge_density * 0.3) + (stroke_diff * 0.2)
@@ -522,25 +851,24 @@ class PDFToWordConverter:
         
         return 'normal'
     
-    def _classify_text_type_improved(self, text: str, font_size: int, y_position: int, data: Dict, index: int) -> str:
+    def _classify_text_type_improved(self, text: str, font_size: int, y_position: int, data: Dict, index: int,
+                                     structure: Optional[Dict] = None) -> str:
         """Improved text type classification using Tesseract structure data"""
         text_lower = text.lower().strip()
         
+        if structure is None:
+            structure = self._build_structure_index(data)
+        
         # Get structural information from Tesseract
-        block_num = data['block_num'][index]
-        par_num = data['par_num'][index]
+        par_key = (data['block_num'][index], data['par_num'][index])
         line_num = data['line_num'][index]
         
-        # Check if this is the first line of a paragraph (potential heading)
-        is_first_line = True
-        for i, (bn, pn, ln) in enumerate(zip(data['block_num'], data['par_num'], data['line_num'])):
-            if bn == block_num and pn == par_num and ln < line_num and data['text'][i].strip():
-                is_first_line = False
-                break
+        # First line of a paragraph (potential heading) if no earlier line holds text
+        first_text_line = structure['first_text_line'].get(par_key)
+        is_first_line = first_text_line is None or first_text_line >= line_num
         
         # Check if paragraph has multiple lines (less likely to be heading)
-        par_line_count = sum(1 for bn, pn in zip(data['block_num'], data['par_num']) 
-                           if bn == block_num and pn == par_num)
+        par_line_count = structure['row_count'].get(par_key, 0)
         
         # More sophisticated classification
         # Title indicators (usually larger, centered, at top)
@@ -641,6 +969,8 @@ class PDFToWordConverter:
                     paragraphs_by_par[par_key] = {
                         'lines': [],
                         'y_positions': [],
+                        'y_ends': [],
+                        'x_positions': [],
                         'font_sizes': [],
                         'font_weights': [],
                         'text_types': []
@@ -648,6 +978,8 @@ class PDFToWordConverter:
                 
                 paragraphs_by_par[par_key]['lines'].append(''.join(line_text))
                 paragraphs_by_par[par_key]['y_positions'].append(line_blocks[0]['bbox'][1])
+                paragraphs_by_par[par_key]['y_ends'].append(max(b['bbox'][3] for b in line_blocks))
+                paragraphs_by_par[par_key]['x_positions'].append(line_blocks[0]['bbox'][0])
                 paragraphs_by_par[par_key]['font_sizes'].extend([b.get('font_size', 11) for b in line_blocks])
                 paragraphs_by_par[par_key]['font_weights'].extend([b.get('font_weight', 'normal') for b in line_blocks])
                 paragraphs_by_par[par_key]['text_types'].extend([b.get('text_type', 'paragraph') for b in line_blocks])
@@ -676,6 +1008,8 @@ class PDFToWordConverter:
                     'font_size': most_common_font_size,
                     'font_weight': most_common_font_weight,
                     'y_position': min(par_data['y_positions']) if par_data['y_positions'] else 0,
+                    'y_end': max(par_data['y_ends']) if par_data['y_ends'] else 0,
+                    'x_position': min(par_data['x_positions']) if par_data['x_positions'] else 0,
                     'block_id': block_id,
                     'par_id': par_id
                 })
@@ -685,51 +1019,16 @@ class PDFToWordConverter:
         
         return structured_content
     
-    def _detect_columns(self, structured_content: List[Dict]) -> List[List[Dict]]:
-        """Detect multi-column layout and group content accordingly"""
-        if not structured_content:
-            return []
-        
-        # Analyze horizontal positions to detect columns
-        x_positions = []
-        for content in structured_content:
-            if 'block_id' in content:
-                # Use block position data if available
-                x_positions.append(content.get('x_position', 0))
-        
-        if not x_positions:
-            return [structured_content]  # Single column
-        
-        # Use clustering to identify column boundaries
-        # Simple approach: if there are distinct horizontal groupings
-        x_positions = sorted(set(x_positions))
-        
-        if len(x_positions) <= 1:
-            return [structured_content]  # Single column
-        
-        # Check for significant gaps that indicate column breaks
-        gaps = []
-        for i in range(1, len(x_positions)):
-            gaps.append(x_positions[i] - x_positions[i-1])
-        
-        # If there's a large gap, it's likely a column break
-        avg_gap = np.mean(gaps) if gaps else 0
-        large_gaps = [i for i, gap in enumerate(gaps) if gap > avg_gap * 2]
-        
-        if large_gaps:
-            # Multiple columns detected
-            columns = []
-            # For now, return single column but this can be enhanced
-            # to properly handle multi-column layouts in Word
-            return [structured_content]
-        
-        return [structured_content]  # Single column
-    
     def _post_process_ocr_results(self, pages_data: List[Dict]) -> List[Dict]:
         """Post-process OCR results to improve text accuracy"""
         processed_pages = []
         
         for page_data in pages_data:
+            # Text taken from the PDF's own text layer has no OCR errors to correct
+            if page_data.get('text_layer'):
+                processed_pages.append(page_data)
+                continue
+            
             processed_blocks = []
             
             for block in page_data['text_blocks']:
@@ -802,41 +1101,93 @@ class PDFToWordConverter:
         return corrected
 
 
+def run_conversion(converter: PDFToWordConverter, input_pdf: str, output_file: str,
+                   is_scanned: bool = False, dpi: int = 300, workers: Optional[int] = None) -> Dict:
+    """
+    Run a single PDF to Word conversion and return the JSON-serialisable result
+    
+    Shared by the command line entry point and the persistent conversion worker.
+    Raises an exception if the conversion fails.
+    
+    A "text-based" PDF that still contains scanned pages is converted with pdf2docx,
+    and only its scanned pages are OCR'd and merged in.
+    """
+    file_info = get_pdf_metadata(input_pdf)
+    if file_info['needs_pass']:
+        raise Exception("PDF is password-protected")
+    print(f"INFO: {file_info['pages']} page(s), {file_info['size_mb']} MB", file=sys.stderr)
+    
+    converter.last_ocr_report = None
+    scanned_pages = []
+    if not is_scanned:
+        scanned_pages = [v['page'] for v in classify_pages(input_pdf) if v['verdict'] != 'text']
+    
+    if is_scanned:
+        print("INFO: Using OCR mode for scanned PDF", file=sys.stderr)
+        method = 'OCR + python-docx'
+        success = converter.convert_scanned_pdf(input_pdf, output_file, dpi, workers)
+    elif scanned_pages:
+        print(f"INFO: Pages {scanned_pages} are scanned, using pdf2docx + OCR of those pages", file=sys.stderr)
+        method = 'pdf2docx + OCR'
+        success = converter.convert_mixed_pdf(input_pdf, output_file, scanned_pages, dpi, workers)
+    else:
+        print("INFO: Using pdf2docx for text-based PDF", file=sys.stderr)
+        method = 'pdf2docx'
+        success = converter.convert_text_based_pdf(input_pdf, output_file)
+    
+    if not success:
+        raise Exception("PDF to Word conversion failed")
+    
+    result = {
+        'success': True,
+        'output_file': output_file,
+        'method': method,
+        'message': 'PDF successfully converted to Word document',
+        'file_info': file_info
+    }
+    
+    if converter.last_ocr_report:
+        result['ocr_report'] = converter.last_ocr_report
+    
+    return result
+
+
 def main():
-    parser = argparse.ArgumentParser(description='Convert PDF to Word using pdf2docx or OCR + pdf2docx')
+    parser = argparse.ArgumentParser(description='Convert PDF to Word using pdf2docx or OCR')
     parser.add_argument('input_pdf', help='Input PDF file path')
     parser.add_argument('output_file', help='Output Word file path')
     parser.add_argument('--is-scanned', action='store_true', default=False,
                        help='Force OCR mode for scanned PDFs')
     parser.add_argument('--dpi', type=int, default=300, help='DPI for PDF to image conversion (OCR mode)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='OCR worker processes (default: OCR_WORKERS or CPU count, 1 = serial)')
+    parser.add_argument('--ocr-min-confidence', type=float, default=70.0,
+                       help='Mean confidence below which extra Tesseract PSM passes are run')
+    parser.add_argument('--ocr-min-words', type=int, default=5,
+                       help='Word count below which extra Tesseract PSM passes are run')
+    parser.add_argument('--no-cache', action='store_true', default=False,
+                       help='Always convert, bypassing the result cache')
     
     args = parser.parse_args()
     
     try:
-        # Initialize converter
-        converter = PDFToWordConverter()
-        
-        # Convert based on PDF type
-        success = False
+        def convert():
+            # Initialize converter
+            converter = PDFToWordConverter(min_confidence=args.ocr_min_confidence,
+                                           min_words=args.ocr_min_words)
+            
+            # Convert based on PDF type
+            return run_conversion(converter, args.input_pdf, args.output_file,
+                                  is_scanned=args.is_scanned, dpi=args.dpi, workers=args.workers)
         
-        if args.is_scanned:
-            print("INFO: Using OCR mode for scanned PDF", file=sys.stderr)
-            success = converter.convert_scanned_pdf(args.input_pdf, args.output_file, args.dpi)
-        else:
-            print("INFO: Using pdf2docx for text-based PDF", file=sys.stderr)
-            success = converter.convert_text_based_pdf(args.input_pdf, args.output_file)
+        # Options that change the output (scanned pages of a text PDF are OCR'd too)
+        options = {'is_scanned': args.is_scanned, 'dpi': args.dpi,
+                   'ocr_min_confidence': args.ocr_min_confidence, 'ocr_min_words': args.ocr_min_words}
         
-        if not success:
-            raise Exception("PDF to Word conversion failed")
+        result = cached_conversion('word', args.input_pdf, args.output_file, options, convert,
+                                   use_cache=not args.no_cache)
         
         # Return success info as JSON
-        result = {
-            'success': True,
-            'output_file': args.output_file,
-            'method': 'OCR + pdf2docx' if args.is_scanned else 'pdf2docx',
-            'message': 'PDF successfully converted to Word document'
-        }
-        
         print(f"\nSUCCESS: {json.dumps(result)}")
         
     except Exception as e:
@@ -6,15 +6,19 @@ Uses multiple methods with fallbacks for accurate table extraction
 """
 
 import argparse
+import importlib.util
 import json
 import sys
 import os
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import traceback
+import numpy as np
 import pandas as pd
 import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, NamedStyle
+from openpyxl.utils import get_column_letter
 
 # Ensure UTF-8 encoding for output
 if sys.stdout.encoding != 'utf-8':
@@ -22,26 +26,61 @@ if sys.stdout.encoding != 'utf-8':
 if sys.stderr.encoding != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8')
 
-# Import libraries with fallback handling
-try:
-    import camelot
-    CAMELOT_AVAILABLE = True
-    print("INFO: Camelot library available")
-except ImportError as e:
-    print(f"WARNING: Camelot not available: {e}")
-    CAMELOT_AVAILABLE = False
 
-try:
-    import tabula
-    TABULA_AVAILABLE = True
-    print("INFO: Tabula library available")
-except ImportError as e:
-    print(f"WARNING: Tabula not available: {e}")
-    TABULA_AVAILABLE = False
+def _find_library(module: str, label: str) -> bool:
+    """Check that a library is installed without importing it"""
+    if importlib.util.find_spec(module) is not None:
+        print(f"INFO: {label} available")
+        return True
+    print(f"WARNING: {label} not available: No module named '{module}'")
+    return False
 
-# PDF processing
-from pdf2image import convert_from_path
-import PyPDF2
+
+# Table libraries are only looked up here; the code that runs them imports them
+# (table_parallel, tabula_backend, table_ocr), so a conversion loads what it uses
+CAMELOT_AVAILABLE = _find_library('camelot', 'Camelot library')
+TABULA_AVAILABLE = _find_library('tabula', 'Tabula library')
+
+from ocr_backend import ocr_available
+from page_renderer import is_blank_page, iter_page_images
+from pdf_metadata import get_pdf_metadata
+from pdf_probe import classify_pages
+from table_detector import candidate_pages, format_page_ranges
+from table_parallel import read_camelot_tables
+from tabula_backend import (read_tables as read_tabula_tables, read_tables_by_page as read_tabula_tables_by_page,
+                            warm_up as warm_up_tabula)
+from result_cache import cached_conversion
+
+# OCR tables need either Tesseract binding, tesserocr or pytesseract (see ocr_backend)
+OCR_TABLES_AVAILABLE = ocr_available()
+if OCR_TABLES_AVAILABLE:
+    print("INFO: OCR table reconstruction available")
+else:
+    print("WARNING: OCR table reconstruction not available: No module named 'tesserocr' or 'pytesseract'")
+
+# Resolution scanned pages are rendered at for OCR table reconstruction
+OCR_TABLE_DPI = 300
+
+# Table quality: camelot accuracy scaled down by the share of empty cells (0-100)
+# A page whose tables reach this score is not handed to the remaining methods
+EARLY_ACCEPT_SCORE = 80.0
+# Tables scoring below this are only kept when a page has nothing better;
+# tables smaller than 2x2 are always dropped
+MIN_TABLE_SCORE = 40.0
+# Lattice cells are drawn ruling lines, so empty cells are usually real blanks
+# (a sparse form or schedule) rather than a misparse; they weigh this much
+LATTICE_WHITESPACE_WEIGHT = 0.25
+# Tabula reports no accuracy; assume this, so a good camelot result wins ties
+TABULA_ASSUMED_ACCURACY = 75.0
+
+# Cell values that mean "empty" once a column is converted to text
+MISSING_VALUES = ['nan', 'NaN', 'None', '', 'null']
+# Characters dropped before deciding whether a value is a number
+NUMERIC_NOISE = r'[,$% ]'
+# Share of values that must be numbers for a column to become numeric
+NUMERIC_COLUMN_RATIO = 0.7
+# A first row containing these words repeats the header
+HEADER_PATTERN = 'id|name|quantity|price|item|amount|total|description'
 
 class ProfessionalPDFToExcelConverter:
     """Professional PDF to Excel converter with multiple methods and fallbacks"""
@@ -60,18 +99,33 @@ class ProfessionalPDFToExcelConverter:
         if TABULA_AVAILABLE:
             self.conversion_methods.append(self._convert_with_tabula)
         
-        # Always add OCR fallback (will be implemented later if needed)
+        # Always add OCR fallback (tables on scanned pages)
         self.conversion_methods.append(self._convert_with_enhanced_ocr)
         
         print(f"INFO: Initialized with {len(self.conversion_methods)} conversion methods")
     
-    def convert_pdf_to_excel(self, pdf_path: str, output_path: str) -> Dict:
+    def warm_up(self):
+        """Start tabula's JVM ahead of the first document (called by the long-lived worker)"""
+        if not TABULA_AVAILABLE:
+            return
+        
+        backend = warm_up_tabula()
+        if backend == 'jpype':
+            print("INFO: Tabula JVM started in-process and warmed up")
+        elif backend == 'subprocess':
+            print("INFO: JPype not installed, Tabula starts a JVM per call")
+    
+    def convert_pdf_to_excel(self, pdf_path: str, output_path: str, workers: Optional[int] = None,
+                             mode: str = 'select') -> Dict:
         """
         Convert PDF to Excel using multiple methods with fallbacks
         
         Args:
             pdf_path: Path to input PDF file
             output_path: Path for output Excel file
+            workers: Number of camelot processes (None or 0 = OCR_WORKERS / CPU count, 1 = serial)
+            mode: 'select' scores every method's tables per page and keeps the best;
+                  'chain' stops at the first method that finds any table
             
         Returns:
             Dict with conversion results and metadata
@@ -81,6 +135,7 @@ class ProfessionalPDFToExcelConverter:
             'method_used': None,
             'tables_found': 0,
             'pages_processed': 0,
+            'table_pages': None,
             'error': None,
             'file_info': self._get_pdf_info(pdf_path)
         }
@@ -90,12 +145,53 @@ class ProfessionalPDFToExcelConverter:
         print(f"📁 Output: {output_path}")
         print(f"📊 PDF Info: {results['file_info']}")
         
+        if results['file_info'].get('needs_pass'):
+            results['error'] = "PDF is password-protected"
+            print(f"💥 FAILED: {results['error']}")
+            return results
+        
+        # Pre-pass: only pages that look like tables go to camelot/tabula
+        table_pages = candidate_pages(pdf_path)
+        ruled_pages = candidate_pages(pdf_path, ruled_only=True)
+        results['table_pages'] = table_pages
+        if table_pages is not None:
+            print(f"🔎 Candidate table pages: {table_pages} (ruled: {ruled_pages}) of {results['file_info']['pages']}")
+        
+        methods = self.conversion_methods
+        if mode == 'select' and (CAMELOT_AVAILABLE or TABULA_AVAILABLE):
+            selected = self._select_best_tables(pdf_path, table_pages, ruled_pages,
+                                                results['file_info']['pages'], workers)
+            
+            # Scanned pages have no text for camelot/tabula; their tables are rebuilt by OCR
+            for page, selection in self._ocr_tables_by_page(pdf_path, skip_pages=list(selected)).items():
+                selected[page] = selection
+            selected = dict(sorted(selected.items()))
+            
+            tables_saved = self._save_selected_tables_to_excel(selected, output_path) if selected else 0
+            if tables_saved:
+                results.update({
+                    'success': True,
+                    'method_used': 'score_select',
+                    'tables_found': tables_saved,
+                    'pages_processed': results['file_info']['pages'],
+                    'page_methods': {page: selection['method'] for page, selection in selected.items()}
+                })
+                print("✅ SUCCESS with best table per page")
+                print(f"📊 Found {tables_saved} tables")
+                return results
+            
+            # OCR has already run on the scanned pages
+            print("❌ No usable table found")
+            methods = []
+        
         # Try each conversion method
-        for i, method in enumerate(self.conversion_methods, 1):
+        for i, method in enumerate(methods, 1):
             try:
-                print(f"\n🔄 Method {i}/{len(self.conversion_methods)}: {method.__name__}")
+                print(f"\n🔄 Method {i}/{len(methods)}: {method.__name__}")
                 
-                success, tables_found = method(pdf_path, output_path)
+                # Lattice needs ruling lines; the other methods take every candidate page
+                pages = ruled_pages if method == self._convert_with_camelot_lattice else table_pages
+                success, tables_found = method(pdf_path, output_path, pages, workers=workers)
                 if success:
                     results.update({
                         'success': True,
@@ -118,15 +214,9 @@ class ProfessionalPDFToExcelConverter:
         return results
     
     def _get_pdf_info(self, pdf_path: str) -> Dict:
-        """Get basic PDF information"""
+        """Get basic PDF information (shared, cached per file)"""
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                return {
-                    'pages': len(reader.pages),
-                    'size_mb': round(os.path.getsize(pdf_path) / (1024 * 1024), 2),
-                    'encrypted': reader.is_encrypted
-                }
+            return get_pdf_metadata(pdf_path)
         except Exception as e:
             return {
                 'pages': 0,
@@ -135,15 +225,128 @@ class ProfessionalPDFToExcelConverter:
                 'error': str(e)
             }
     
-    def _convert_with_camelot_lattice(self, pdf_path: str, output_path: str) -> Tuple[bool, int]:
+    def _select_best_tables(self, pdf_path: str, table_pages: Optional[List[int]], ruled_pages: Optional[List[int]],
+                            page_count: int, workers: Optional[int] = None) -> Dict[int, Dict]:
+        """
+        Run the extraction methods page by page and keep the best-scoring tables for each page
+        
+        Methods run in order (lattice, stream, tabula). A page whose tables reach
+        EARLY_ACCEPT_SCORE is settled and not passed to the methods after it. A page
+        with no table reaching MIN_TABLE_SCORE keeps its best-scoring table anyway,
+        so a sparse table beats sending the page to OCR.
+        
+        Returns:
+            {page: {'method', 'score', 'tables'}} for pages with at least one usable table
+        """
+        pending = list(range(1, page_count + 1)) if table_pages is None else list(table_pages)
+        
+        passes = []
+        if CAMELOT_AVAILABLE:
+            passes.append(('Camelot Lattice', ruled_pages,
+                           lambda pages: self._camelot_tables_by_page(pdf_path, pages, 'lattice', workers)))
+            passes.append(('Camelot Stream', None,
+                           lambda pages: self._camelot_tables_by_page(pdf_path, pages, 'stream', workers)))
+        if TABULA_AVAILABLE:
+            passes.append(('Tabula', None, lambda pages: self._tabula_tables_by_page(pdf_path, pages)))
+        
+        best = {}
+        fallback = {}
+        for label, eligible, extract in passes:
+            pages = [page for page in pending if eligible is None or page in eligible]
+            if not pages:
+                continue
+            
+            print(f"\n🔄 {label} on pages {format_page_ranges(pages)}")
+            try:
+                tables_by_page = extract(pages)
+            except Exception as e:
+                print(f"❌ {label} failed: {e}")
+                continue
+            
+            for page, scored_tables in tables_by_page.items():
+                kept = [(score, df) for score, df in scored_tables if score >= MIN_TABLE_SCORE]
+                if not kept:
+                    usable = [(score, df) for score, df in scored_tables if score > 0]
+                    if usable:
+                        score, df = max(usable, key=lambda scored: scored[0])
+                        if page not in fallback or score > fallback[page]['score']:
+                            fallback[page] = {'method': label, 'score': score, 'tables': [df]}
+                    continue
+                page_score = round(sum(score for score, _ in kept) / len(kept), 1)
+                if page not in best or page_score > best[page]['score']:
+                    best[page] = {'method': label, 'score': page_score, 'tables': [df for _, df in kept]}
+            
+            settled = [page for page in pages if page in best and best[page]['score'] >= EARLY_ACCEPT_SCORE]
+            pending = [page for page in pending if page not in settled]
+            print(f"  ✓ {len(settled)} page(s) settled, {len(pending)} left")
+            if not pending:
+                break
+        
+        for page, selection in fallback.items():
+            if page not in best:
+                print(f"  ⚠️ Page {page}: no table reached score {MIN_TABLE_SCORE:.0f}, keeping the best one")
+                best[page] = selection
+        
+        for page in sorted(best):
+            print(f"  📄 Page {page}: {best[page]['method']} (score {best[page]['score']}, {len(best[page]['tables'])} tables)")
+        return dict(sorted(best.items()))
+    
+    def _score_table(self, df: pd.DataFrame, accuracy: Optional[float] = None,
+                     whitespace: Optional[float] = None, ruled: bool = False) -> float:
+        """
+        Quality score (0-100) from camelot's parsing report, or from the cells when there is none
+        
+        Empty cells of a ruled (lattice) table count at LATTICE_WHITESPACE_WEIGHT.
+        """
+        rows, cols = df.shape
+        if rows < 2 or cols < 2:
+            return 0.0
+        
+        if whitespace is None:
+            values = df.to_numpy(dtype=object)
+            empty = pd.isna(values) | (np.char.strip(values.astype(str)) == '')
+            whitespace = 100.0 * empty.mean()
+        if accuracy is None:
+            accuracy = TABULA_ASSUMED_ACCURACY
+        
+        if ruled:
+            whitespace *= LATTICE_WHITESPACE_WEIGHT
+        return round(accuracy * (1 - whitespace / 100.0), 1)
+    
+    def _camelot_tables_by_page(self, pdf_path: str, pages: List[int], flavor: str,
+                                workers: Optional[int] = None) -> Dict[int, List[Tuple[float, pd.DataFrame]]]:
+        """Scored camelot tables grouped by page"""
+        tables_by_page = {}
+        for table in read_camelot_tables(pdf_path, pages, flavor, workers=workers):
+            report = table.parsing_report
+            score = self._score_table(table.df, report.get('accuracy'), report.get('whitespace'),
+                                      ruled=flavor == 'lattice')
+            tables_by_page.setdefault(int(table.page), []).append((score, table.df))
+        return tables_by_page
+    
+    def _tabula_tables_by_page(self, pdf_path: str, pages: List[int]) -> Dict[int, List[Tuple[float, pd.DataFrame]]]:
+        """Scored tabula tables grouped by page"""
+        return {page: [(self._score_table(df), df) for df in tables]
+                for page, tables in read_tabula_tables_by_page(pdf_path, pages).items()}
+    
+    def _pages_argument(self, pages: Optional[List[int]]) -> str:
+        """camelot/tabula pages string for the pre-pass result ('all' when there is none)"""
+        return 'all' if pages is None else format_page_ranges(pages)
+    
+    def _convert_with_camelot_lattice(self, pdf_path: str, output_path: str, pages: Optional[List[int]] = None,
+                                      workers: Optional[int] = None) -> Tuple[bool, int]:
         """Convert using Camelot lattice method (best for tables with borders)"""
         if not CAMELOT_AVAILABLE:
             return False, 0
         
+        if pages is not None and not pages:
+            print("⏭️  No pages with ruling lines, skipping lattice")
+            return False, 0
+        
         print("📋 Using Camelot Lattice (tables with borders)")
         
         # Extract tables using lattice method
-        tables = camelot.read_pdf(pdf_path, pages='all', flavor='lattice')
+        tables = read_camelot_tables(pdf_path, pages, 'lattice', workers=workers)
         
         if len(tables) == 0:
             return False, 0
@@ -153,15 +356,20 @@ class ProfessionalPDFToExcelConverter:
         # Save tables to Excel
         return self._save_camelot_tables_to_excel(tables, output_path, 'lattice')
     
-    def _convert_with_camelot_stream(self, pdf_path: str, output_path: str) -> Tuple[bool, int]:
+    def _convert_with_camelot_stream(self, pdf_path: str, output_path: str, pages: Optional[List[int]] = None,
+                                     workers: Optional[int] = None) -> Tuple[bool, int]:
         """Convert using Camelot stream method (best for tables without borders)"""
         if not CAMELOT_AVAILABLE:
             return False, 0
         
+        if pages is not None and not pages:
+            print("⏭️  No candidate table pages, skipping stream")
+            return False, 0
+        
         print("📋 Using Camelot Stream (tables without borders)")
         
         # Extract tables using stream method
-        tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
+        tables = read_camelot_tables(pdf_path, pages, 'stream', workers=workers)
         
         if len(tables) == 0:
             return False, 0
@@ -171,16 +379,21 @@ class ProfessionalPDFToExcelConverter:
         # Save tables to Excel
         return self._save_camelot_tables_to_excel(tables, output_path, 'stream')
     
-    def _convert_with_tabula(self, pdf_path: str, output_path: str) -> Tuple[bool, int]:
+    def _convert_with_tabula(self, pdf_path: str, output_path: str, pages: Optional[List[int]] = None,
+                             workers: Optional[int] = None) -> Tuple[bool, int]:
         """Convert using Tabula method (alternative table extraction)"""
         if not TABULA_AVAILABLE:
             return False, 0
         
+        if pages is not None and not pages:
+            print("⏭️  No candidate table pages, skipping Tabula")
+            return False, 0
+        
         print("📋 Using Tabula (alternative method)")
         
         try:
             # Extract tables using Tabula
-            tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
+            tables = read_tabula_tables(pdf_path, pages=self._pages_argument(pages))
             
             if not tables or len(tables) == 0:
                 return False, 0
@@ -200,17 +413,65 @@ class ProfessionalPDFToExcelConverter:
             print(f"Tabula error: {e}")
             return False, 0
     
-    def _convert_with_enhanced_ocr(self, pdf_path: str, output_path: str) -> Tuple[bool, int]:
-        """Enhanced OCR fallback method"""
-        print("📋 Using Enhanced OCR (fallback method)")
-        print("⚠️  OCR fallback not yet implemented - would need original OCR converter")
-        return False, 0
+    def _convert_with_enhanced_ocr(self, pdf_path: str, output_path: str, pages: Optional[List[int]] = None,
+                                   workers: Optional[int] = None) -> Tuple[bool, int]:
+        """
+        Enhanced OCR fallback method: rebuild tables on scanned pages from the page raster
+        
+        Scanned pages have no text for the pre-pass, so `pages` is not used; the pages
+        without a text layer are found with the page classifier instead.
+        """
+        selected = self._ocr_tables_by_page(pdf_path)
+        if not selected:
+            return False, 0
+        
+        tables_saved = self._save_selected_tables_to_excel(selected, output_path)
+        return tables_saved > 0, tables_saved
+    
+    def _ocr_tables_by_page(self, pdf_path: str, skip_pages: Optional[List[int]] = None) -> Dict[int, Dict]:
+        """
+        Rebuild the tables on the pages without a text layer by OCR
+        
+        Args:
+            pdf_path: Path to the PDF file
+            skip_pages: Pages that already have tables from camelot/tabula
+        
+        Returns:
+            {page: {'method', 'score', 'tables'}} like _select_best_tables
+        """
+        if not OCR_TABLES_AVAILABLE:
+            return {}
+        
+        # Pages with a text layer are given to camelot/tabula
+        scanned_pages = [v['page'] for v in classify_pages(pdf_path)
+                         if v['verdict'] != 'text' and v['page'] not in (skip_pages or [])]
+        if not scanned_pages:
+            print("⏭️  No scanned pages, skipping OCR")
+            return {}
+        
+        from table_ocr import extract_table
+        
+        print(f"📋 Using Enhanced OCR on scanned pages {format_page_ranges(scanned_pages)}")
+        
+        selected = {}
+        for page_number, page_image in iter_page_images(pdf_path, dpi=OCR_TABLE_DPI, grayscale=True,
+                                                        page_numbers=scanned_pages):
+            if is_blank_page(page_image):
+                continue
+            
+            rows = extract_table(page_image)
+            if rows:
+                print(f"  🔍 Page {page_number}: {len(rows)}x{len(rows[0])} table")
+                selected[page_number] = {'method': 'OCR', 'score': None, 'tables': [pd.DataFrame(rows)]}
+        
+        if selected:
+            print(f"🔍 Found {len(selected)} tables with OCR")
+        return selected
     
     def _save_camelot_tables_to_excel(self, tables, output_path: str, method: str) -> Tuple[bool, int]:
         """Save Camelot tables to Excel with professional formatting"""
         try:
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Remove default sheet
+            wb = self._create_workbook()
             
             tables_saved = 0
             
@@ -244,11 +505,43 @@ class ProfessionalPDFToExcelConverter:
             print(f"Error saving Camelot tables: {e}")
             return False, 0
     
+    def _save_selected_tables_to_excel(self, selected: Dict[int, Dict], output_path: str) -> int:
+        """Write the selected tables of every page to one workbook, in page order"""
+        try:
+            wb = self._create_workbook()
+            
+            tables_saved = 0
+            table_index = 0
+            
+            for page, selection in selected.items():
+                for df in selection['tables']:
+                    table_index += 1
+                    df_cleaned = self._clean_dataframe(df)
+                    
+                    if df_cleaned.empty:
+                        continue
+                    
+                    ws = wb.create_sheet(f"Table_{table_index}_P{page}")
+                    self._write_dataframe_to_worksheet(df_cleaned, ws, selection['method'])
+                    
+                    tables_saved += 1
+                    print(f"  ✓ Saved Table {table_index} (Page {page}, {selection['method']}): {df_cleaned.shape[0]}x{df_cleaned.shape[1]}")
+            
+            if tables_saved == 0:
+                return 0
+            
+            wb.save(output_path)
+            print(f"💾 Saved {tables_saved} tables to {output_path}")
+            return tables_saved
+            
+        except Exception as e:
+            print(f"Error saving selected tables: {e}")
+            return 0
+    
     def _save_tabula_tables_to_excel(self, tables: List[pd.DataFrame], output_path: str) -> Tuple[bool, int]:
         """Save Tabula tables to Excel with professional formatting"""
         try:
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Remove default sheet
+            wb = self._create_workbook()
             
             tables_saved = 0
             
@@ -294,11 +587,8 @@ class ProfessionalPDFToExcelConverter:
         if len(df) > 0:
             first_row = df.iloc[0].astype(str).str.lower().str.strip()
             
-            # Common header patterns to detect
-            header_patterns = ['id', 'name', 'quantity', 'price', 'item', 'amount', 'total', 'description']
-            
             # Count how many cells in first row look like headers
-            header_matches = sum(1 for cell in first_row if any(pattern in cell for pattern in header_patterns))
+            header_matches = int(first_row.str.contains(HEADER_PATTERN, regex=True).sum())
             
             # If more than half the first row looks like headers, remove it
             if header_matches >= len(first_row) / 2:
@@ -322,35 +612,9 @@ class ProfessionalPDFToExcelConverter:
             else:
                 print(f"  ✅ Preserving first column with data")
         
-        # Clean and convert data types intelligently
+        # Clean and convert data types intelligently, one vectorized pass per column
         for col in df.columns:
-            # Convert to string first to handle mixed types
-            df[col] = df[col].astype(str)
-            
-            # Clean text data
-            df[col] = df[col].str.strip()
-            df[col] = df[col].replace(['nan', 'NaN', 'None', '', 'null'], None)
-            
-            # Try to convert to numeric if most values are numeric
-            numeric_count = 0
-            total_count = df[col].notna().sum()
-            
-            if total_count > 0:
-                for val in df[col].dropna():
-                    try:
-                        # Clean numeric strings
-                        clean_val = str(val).replace(',', '').replace('$', '').replace('%', '').replace(' ', '')
-                        float(clean_val)
-                        numeric_count += 1
-                    except:
-                        pass
-                
-                # If more than 70% are numeric, convert the column
-                if numeric_count / total_count > 0.7:
-                    df[col] = pd.to_numeric(
-                        df[col].str.replace(',', '').str.replace('$', '').str.replace('%', '').str.replace(' ', ''), 
-                        errors='ignore'
-                    )
+            df[col] = self._clean_column(df[col])
         
         # Set meaningful column names based on typical table structure
         if len(df.columns) == 4:
@@ -365,66 +629,130 @@ class ProfessionalPDFToExcelConverter:
         
         return df
     
-    def _write_dataframe_to_worksheet(self, df: pd.DataFrame, ws, method_name: str):
-        """Write dataframe to Excel worksheet with professional formatting"""
-        
-        # Start writing headers from row 1, column 1 (no method info header)
-        header_row = 1
+    def _create_workbook(self) -> openpyxl.Workbook:
+        """Write-only workbook with the table styles registered once as named styles"""
+        wb = openpyxl.Workbook(write_only=True)
+        
+        header = NamedStyle(name='table_header')
+        header.font = Font(bold=True, color="FFFFFF")
+        header.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header.alignment = Alignment(horizontal='center', vertical='center')
+        wb.add_named_style(header)
+        
+        # Body styles: text / integer / decimal, plain and on the alternating row color
+        stripe = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+        for kind, horizontal, number_format in (('text', 'left', 'General'),
+                                                ('int', 'right', 'General'),
+                                                ('float', 'right', '0.00')):
+            for suffix, fill in (('', None), ('_stripe', stripe)):
+                style = NamedStyle(name=f'table_{kind}{suffix}', number_format=number_format)
+                style.alignment = Alignment(horizontal=horizontal, vertical='center')
+                if fill is not None:
+                    style.fill = fill
+                wb.add_named_style(style)
+        
+        return wb
+    
+    def _column_widths(self, df: pd.DataFrame) -> List[float]:
+        """Column widths from the longest header or value of each column, limited to 10-50"""
+        widths = []
+        for c_idx, column in enumerate(df.columns):
+            values = df.iloc[:, c_idx].dropna()
+            values = values[~values.isin(['', 'nan', 'NaN'])]
+            longest = values.astype(str).str.len().max() if len(values) else 0
+            max_length = max(len(str(column)), int(longest))
+            widths.append(min(max(max_length + 2, 10), 50))
+        return widths
+    
+    def _clean_column(self, values: pd.Series) -> pd.Series:
+        """
+        Strip a column, blank out placeholder values and make it numeric when most values are numbers
         
-        # Use the dataframe as-is (already cleaned in _clean_dataframe)
-        df_cleaned = df.copy()
+        A column is converted when more than NUMERIC_COLUMN_RATIO of its values parse as
+        numbers once thousands separators, currency and percent signs and spaces are removed.
+        If every value parses it becomes numeric; otherwise it keeps the cleaned strings.
+        """
+        text = values.astype(str).str.strip()
+        missing = values.isna() | text.isin(MISSING_VALUES)
+        text = text.astype(object).where(~missing, None)
+        
+        present = int((~missing).sum())
+        if present == 0:
+            return text
+        
+        cleaned = text.str.replace(NUMERIC_NOISE, '', regex=True)
+        numbers = pd.to_numeric(cleaned, errors='coerce')
+        parsed = int((numbers.notna() & ~missing).sum())
+        
+        # If more than 70% are numeric, convert the column
+        if parsed / present > NUMERIC_COLUMN_RATIO:
+            return numbers if parsed == present else cleaned
+        return text
+    
+    def _write_dataframe_to_worksheet(self, df: pd.DataFrame, ws, method_name: str):
+        """
+        Write dataframe to a write-only worksheet with professional formatting
         
-        print(f"  📊 Writing {len(df_cleaned.columns)} columns: {list(df_cleaned.columns)}")
+        Rows are streamed to disk as they are appended, so memory stays bounded by the
+        dataframe itself. Column widths and the frozen header are set before any row,
+        as write-only sheets require.
+        """
+        print(f"  📊 Writing {len(df.columns)} columns: {list(df.columns)}")
         
-        # Write headers starting from row 1, column 1
-        for c_idx, column in enumerate(df_cleaned.columns, 1):
-            # Use the column name as-is (already cleaned)
-            clean_column = str(column)
-            
-            cell = ws.cell(row=header_row, column=c_idx, value=clean_column)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+        for c_idx, width in enumerate(self._column_widths(df), 1):
+            ws.column_dimensions[get_column_letter(c_idx)].width = width
         
-        # Write data starting from row 2
-        for r_idx, row in enumerate(df_cleaned.values, header_row + 1):
-            for c_idx, value in enumerate(row, 1):
+        # Freeze header row
+        ws.freeze_panes = "A2"
+        
+        # Header row (column names already cleaned in _clean_dataframe)
+        header_cells = []
+        for column in df.columns:
+            cell = WriteOnlyCell(ws, value=str(column))
+            cell.style = 'table_header'
+            header_cells.append(cell)
+        ws.append(header_cells)
+        
+        # Data rows start at sheet row 2; even sheet rows get the alternating color
+        for r_idx, row in enumerate(df.itertuples(index=False, name=None), 2):
+            suffix = '_stripe' if r_idx % 2 == 0 else ''
+            row_cells = []
+            for value in row:
                 # Clean the value
-                if pd.isna(value) or value in ['', 'nan', 'NaN', None]:
+                if pd.isna(value) or value in ('', 'nan', 'NaN'):
                     value = ''
                 
-                cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                
-                # Format based on data type
-                if isinstance(value, (int, float)) and value != '':
-                    cell.alignment = Alignment(horizontal='right', vertical='center')
-                    if isinstance(value, float):
-                        cell.number_format = '0.00'
+                if isinstance(value, (float, np.floating)):
+                    kind = 'float'
+                elif isinstance(value, (int, np.integer)):
+                    kind = 'int'
                 else:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
+                    kind = 'text'
                 
-                # Add alternating row colors
-                if r_idx % 2 == 0:
-                    cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            # Set width with reasonable limits
-            adjusted_width = min(max(max_length + 2, 10), 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Freeze header row
-        ws.freeze_panes = f"A{header_row + 1}"
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = f'table_{kind}{suffix}'
+                row_cells.append(cell)
+            ws.append(row_cells)
+
+
+def run_conversion(converter: ProfessionalPDFToExcelConverter, input_pdf: str, output_excel: str,
+                   workers: Optional[int] = None, mode: str = 'select') -> Dict:
+    """
+    Run a single PDF to Excel conversion and return the JSON-serialisable result
+    
+    Shared by the command line entry point and the persistent conversion worker.
+    Raises an exception if the input is missing or no methods are available.
+    """
+    # Check if input file exists
+    if not os.path.exists(input_pdf):
+        raise FileNotFoundError(f"Input PDF file not found: {input_pdf}")
+    
+    # Check if any conversion methods are available
+    if len(converter.conversion_methods) == 0:
+        raise RuntimeError("No conversion methods available. Please install camelot-py or tabula-py.")
+    
+    # Perform conversion
+    return converter.convert_pdf_to_excel(input_pdf, output_excel, workers=workers, mode=mode)
 
 
 def main():
@@ -433,23 +761,22 @@ def main():
     parser.add_argument('input_pdf', help='Input PDF file path')
     parser.add_argument('output_excel', help='Output Excel file path')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--no-cache', action='store_true', help='Always convert, bypassing the result cache')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='camelot processes (default: OCR_WORKERS or CPU count, 1 = serial)')
+    parser.add_argument('--mode', choices=['select', 'chain'], default='select',
+                       help='select: best table per page across methods; chain: first method that finds a table')
     
     args = parser.parse_args()
     
     try:
-        # Check if input file exists
-        if not os.path.exists(args.input_pdf):
-            raise FileNotFoundError(f"Input PDF file not found: {args.input_pdf}")
-        
-        # Initialize converter
-        converter = ProfessionalPDFToExcelConverter()
-        
-        # Check if any conversion methods are available
-        if len(converter.conversion_methods) == 0:
-            raise RuntimeError("No conversion methods available. Please install camelot-py or tabula-py.")
-        
-        # Perform conversion
-        result = converter.convert_pdf_to_excel(args.input_pdf, args.output_excel)
+        # Initialize converter and convert (a cached result skips both)
+        result = cached_conversion(
+            'excel', args.input_pdf, args.output_excel, {'mode': args.mode},
+            lambda: run_conversion(ProfessionalPDFToExcelConverter(), args.input_pdf, args.output_excel,
+                                   workers=args.workers, mode=args.mode),
+            use_cache=not args.no_cache
+        )
         
         # Output results as JSON for server integration
         print(f"\n📊 CONVERSION RESULT:")
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conversion Result Cache
+Content-addressed on-disk cache of finished conversions. The key is a hash of
+the input PDF's bytes plus the converter, target format and the options that
+change the output, so a repeat upload of the same document becomes a file copy.
+
+Entries are evicted least-recently-used once the store grows past its size
+limit; hit/miss counters are kept alongside the index.
+
+Environment:
+    CONVERSION_CACHE_ENABLED  - set to "false" to bypass the cache
+    CONVERSION_CACHE_DIR      - store location (default: <tmp>/pdf_converter_cache)
+    CONVERSION_CACHE_MAX_MB   - size limit before eviction (default: 1024)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Bump when converter changes make previously cached outputs stale
+CACHE_VERSION = 7
+
+# Options that change how a conversion runs but not what it produces
+IGNORED_OPTIONS = {'workers'}
+
+# Output-affecting options of each converter with their defaults. Keys are built from
+# these, so the command line, which spells every option out, and the worker, which only
+# sends what differs from the default, land on the same cache entry.
+CONVERTER_OPTIONS = {
+    'word': {'is_scanned': False, 'dpi': 300, 'ocr_min_confidence': 70.0, 'ocr_min_words': 5},
+    'ocr': {'output_format': 'docx', 'ocr_engine': 'tesseract', 'dpi': 200},
+    'ppt': {},
+    'excel': {'mode': 'select'},
+}
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def cache_enabled() -> bool:
+    """Whether the result cache is enabled for this process"""
+    return os.environ.get('CONVERSION_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+
+def normalize_options(converter_name: str, options: Dict) -> Dict:
+    """
+    The options that identify a conversion, with defaults filled in
+
+    Values are coerced to the type of their default (dpi "300" and 300.0 are 300),
+    IGNORED_OPTIONS are dropped and options the converter does not know are kept as given.
+    """
+    defaults = CONVERTER_OPTIONS.get(converter_name, {})
+    normalized = dict(defaults)
+    for name, value in options.items():
+        if name in IGNORED_OPTIONS or value is None:
+            continue
+        default = defaults.get(name)
+        if isinstance(default, bool):
+            value = value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes')
+        elif isinstance(default, (int, float)):
+            value = type(default)(float(value))
+        normalized[name] = value
+    return normalized
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """On-disk store of conversion outputs with a SQLite index for LRU eviction and stats"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Open (and create if needed) a result cache
+
+        Args:
+            cache_dir: Store location, defaults to CONVERSION_CACHE_DIR
+            max_bytes: Size limit for stored outputs, defaults to CONVERSION_CACHE_MAX_MB
+        """
+        self.cache_dir = cache_dir or os.environ.get(
+            'CONVERSION_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pdf_converter_cache'))
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('CONVERSION_CACHE_MAX_MB', '1024')) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+        os.makedirs(os.path.join(self.cache_dir, 'objects'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite3'), timeout=30)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, size INTEGER NOT NULL, result TEXT NOT NULL, '
+            'created REAL NOT NULL, last_access REAL NOT NULL)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def make_key(self, input_path: str, converter_name: str, output_path: str, options: Dict) -> str:
+        """
+        Build the cache key for a conversion
+
+        Args:
+            input_path: Input PDF
+            converter_name: Converter that produces the output ('word', 'ocr', 'ppt', 'excel')
+            output_path: Output path; its extension is the target format
+            options: Converter options, normalised with normalize_options()
+        """
+        descriptor = {
+            'version': CACHE_VERSION,
+            'input_sha256': hash_file(input_path),
+            'converter': converter_name,
+            'format': os.path.splitext(output_path)[1].lower(),
+            'options': normalize_options(converter_name, options)
+        }
+        encoded = json.dumps(descriptor, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', key)
+
+    def _count(self, name: str):
+        self.db.execute('INSERT INTO stats (name, value) VALUES (?, 1) '
+                        'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,))
+
+    def get(self, key: str, output_path: str) -> Optional[Dict]:
+        """
+        Copy a cached output to `output_path`
+
+        Returns:
+            The cached result dict (pointing at output_path), or None on a miss
+        """
+        row = self.db.execute('SELECT result FROM entries WHERE key = ?', (key,)).fetchone()
+        object_path = self._object_path(key)
+
+        if row is None or not os.path.exists(object_path):
+            if row is not None:
+                # Output file was removed behind the index's back
+                self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._count('misses')
+            self.db.commit()
+            return None
+
+        shutil.copyfile(object_path, output_path)
+        self.db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+        self._count('hits')
+        self.db.commit()
+
+        result = json.loads(row[0])
+        if 'output_file' in result:
+            result['output_file'] = output_path
+        return result
+
+    def put(self, key: str, output_path: str, result: Dict):
+        """Store a successful conversion's output and result, then evict down to the size limit"""
+        size = os.path.getsize(output_path)
+        if size > self.max_bytes:
+            return
+
+        # Copy next to the final name and rename, so readers never see a partial file
+        object_path = self._object_path(key)
+        temp_path = f"{object_path}.{os.getpid()}.tmp"
+        shutil.copyfile(output_path, temp_path)
+        os.replace(temp_path, object_path)
+
+        now = time.time()
+        self.db.execute('INSERT OR REPLACE INTO entries (key, size, result, created, last_access) '
+                        'VALUES (?, ?, ?, ?, ?)', (key, size, json.dumps(result, default=str), now, now))
+        self.db.commit()
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the store fits in max_bytes"""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self.db.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._object_path(key))
+            except FileNotFoundError:
+                pass
+            self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._count('evictions')
+            total -= size
+
+        self.db.commit()
+
+    def stats(self) -> Dict:
+        """Entry count, stored bytes and hit/miss/eviction counters"""
+        counters = dict(self.db.execute('SELECT name, value FROM stats').fetchall())
+        entries, total = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get('evictions', 0),
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0
+        }
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        for key, in self.db.execute('SELECT key FROM entries').fetchall():
+            try:
+                os.remove(self._object_path(key))
+            except FileNotFoundError:
+                pass
+        self.db.execute('DELETE FROM entries')
+        self.db.execute('DELETE FROM stats')
+        self.db.commit()
+
+
+# Cache owned by the current process
+_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return this process's result cache, opening it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
+
+
+def cached_conversion(converter_name: str, input_path: str, output_path: str, options: Dict,
+                      run: Callable[[], Dict], use_cache: bool = True) -> Dict:
+    """
+    Run a conversion through the result cache
+
+    Args:
+        converter_name: Converter that produces the output ('word', 'ocr', 'ppt', 'excel')
+        input_path: Input PDF
+        output_path: Where the output must end up
+        options: Options that identify the conversion (see ResultCache.make_key)
+        run: Performs the conversion and returns its result dict; only called on a miss
+        use_cache: False to bypass the cache for this call
+
+    Returns:
+        The conversion result, with 'cached' set to True when it came from the cache
+    """
+    if not use_cache or not cache_enabled() or not os.path.exists(input_path):
+        return run()
+
+    try:
+        cache = get_result_cache()
+        key = cache.make_key(input_path, converter_name, output_path, options)
+        result = cache.get(key, output_path)
+    except Exception as e:
+        print(f"WARNING: Result cache unavailable, converting without it: {e}", file=sys.stderr)
+        return run()
+
+    if result is not None:
+        print(f"INFO: Result cache hit for {os.path.basename(input_path)} ({converter_name})", file=sys.stderr)
+        result['cached'] = True
+        return result
+
+    result = run()
+
+    if result.get('success') and os.path.exists(output_path):
+        try:
+            cache.put(key, output_path, result)
+        except Exception as e:
+            print(f"WARNING: Could not store conversion result in cache: {e}", file=sys.stderr)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or clear the conversion result cache')
+    parser.add_argument('--clear', action='store_true', help='Remove all cached results')
+
+    args = parser.parse_args()
+
+    cache = get_result_cache()
+    if args.clear:
+        cache.clear()
+    print(json.dumps(cache.stats()))
+
+
+if __name__ == '__main__':
+    main()
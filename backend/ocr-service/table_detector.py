@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Table Page Detection
+Fast pre-pass that finds the pages of a PDF likely to hold a table, so camelot
+and tabula only analyse those pages instead of the whole document.
+
+Two signals are read with PyMuPDF, without rendering:
+- ruling lines: horizontal and vertical strokes from the page's vector
+  drawings (table borders drawn as lines or as stroked rectangles)
+- aligned text columns: words split by wide gaps into cells, whose left or
+  right edges line up over several rows (borderless tables)
+
+Pages with both horizontal and vertical rulings are marked 'ruled' and suit
+camelot's lattice flavor; every candidate page goes to stream and tabula.
+
+    python table_detector.py input.pdf
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from pdf_metadata import file_key
+
+# Ensure UTF-8 encoding for output
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+if sys.stderr.encoding != 'utf-8':
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# A stroke counts as a ruling line when it is this straight (points) and this long
+RULING_MAX_THICKNESS = 2.0
+RULING_MIN_LENGTH = 15.0
+# Ruling lines needed for a lattice table (a page frame alone has two of each)
+MIN_HORIZONTAL_RULINGS = 3
+MIN_VERTICAL_RULINGS = 3
+# Horizontal rules alone (booktabs style) need text columns to back them up
+MIN_RULES_WITHOUT_GRID = 3
+
+# Words further apart than this many line heights start a new cell
+CELL_GAP_FACTOR = 1.2
+# Cell edges are compared in bins of this many points
+ALIGNMENT_TOLERANCE = 4.0
+# A column is aligned when this many multi-cell rows share its edge
+MIN_ALIGNED_ROWS = 3
+MIN_ALIGNED_COLUMNS = 2
+
+# Files remembered per process; the worker lives long, so keep it bounded
+_MAX_CACHED_FILES = 256
+
+# Page scores per file key, shared by every converter in this process
+_score_cache: 'OrderedDict[str, Dict[int, Dict]]' = OrderedDict()
+
+
+def _count_rulings(page: fitz.Page) -> Tuple[int, int]:
+    """Count horizontal and vertical ruling lines among the page's vector drawings"""
+    horizontal = vertical = 0
+
+    def add_segment(x0, y0, x1, y1):
+        nonlocal horizontal, vertical
+        width, height = abs(x1 - x0), abs(y1 - y0)
+        if height <= RULING_MAX_THICKNESS and width >= RULING_MIN_LENGTH:
+            horizontal += 1
+        elif width <= RULING_MAX_THICKNESS and height >= RULING_MIN_LENGTH:
+            vertical += 1
+
+    for drawing in page.get_drawings():
+        stroked = drawing.get('type') in ('s', 'fs')
+        for item in drawing.get('items', []):
+            kind = item[0]
+            if kind == 'l':
+                add_segment(item[1].x, item[1].y, item[2].x, item[2].y)
+            elif kind == 're':
+                rect = item[1]
+                if rect.height <= RULING_MAX_THICKNESS or rect.width <= RULING_MAX_THICKNESS:
+                    # Thin filled rectangles are how many producers draw rules
+                    add_segment(rect.x0, rect.y0, rect.x1, rect.y1)
+                elif stroked:
+                    # A stroked cell or frame contributes its four edges
+                    add_segment(rect.x0, rect.y0, rect.x1, rect.y0)
+                    add_segment(rect.x0, rect.y1, rect.x1, rect.y1)
+                    add_segment(rect.x0, rect.y0, rect.x0, rect.y1)
+                    add_segment(rect.x1, rect.y0, rect.x1, rect.y1)
+
+    return horizontal, vertical
+
+
+def _count_aligned_columns(page: fitz.Page) -> Tuple[int, int]:
+    """
+    Count text columns whose cell edges line up across rows
+
+    Returns:
+        (aligned columns, rows with more than one cell)
+    """
+    words = page.get_text('words')
+    if not words:
+        return 0, 0
+
+    # Group words into visual rows by their vertical centre
+    rows = defaultdict(list)
+    for x0, y0, x1, y1, *_ in words:
+        rows[round((y0 + y1) / 2 / ALIGNMENT_TOLERANCE)].append((x0, x1, y1 - y0))
+
+    starts, ends = Counter(), Counter()
+    multi_cell_rows = 0
+
+    for row_words in rows.values():
+        row_words.sort()
+        gap_limit = CELL_GAP_FACTOR * max(height for _, _, height in row_words)
+
+        cells = [[row_words[0][0], row_words[0][1]]]
+        for x0, x1, _ in row_words[1:]:
+            if x0 - cells[-1][1] > gap_limit:
+                cells.append([x0, x1])
+            else:
+                cells[-1][1] = max(cells[-1][1], x1)
+
+        if len(cells) < 2:
+            continue
+
+        multi_cell_rows += 1
+        # Each edge counted once per row
+        starts.update({round(x0 / ALIGNMENT_TOLERANCE) for x0, _ in cells})
+        ends.update({round(x1 / ALIGNMENT_TOLERANCE) for _, x1 in cells})
+
+    aligned_starts = sum(1 for count in starts.values() if count >= MIN_ALIGNED_ROWS)
+    aligned_ends = sum(1 for count in ends.values() if count >= MIN_ALIGNED_ROWS)
+    return max(aligned_starts, aligned_ends), multi_cell_rows
+
+
+def score_table_page(page: fitz.Page) -> Dict:
+    """
+    Score one page for table content
+
+    Returns:
+        Dict with page (1-based), candidate, ruled, horizontal_rulings, vertical_rulings,
+        aligned_columns and multi_cell_rows
+    """
+    horizontal, vertical = _count_rulings(page)
+    aligned_columns, multi_cell_rows = _count_aligned_columns(page)
+
+    # A grid only matters when there is text inside it (camelot reads the text layer)
+    ruled = (horizontal >= MIN_HORIZONTAL_RULINGS and vertical >= MIN_VERTICAL_RULINGS
+             and bool(page.get_text('text').strip()))
+    aligned = aligned_columns >= MIN_ALIGNED_COLUMNS and multi_cell_rows >= MIN_ALIGNED_ROWS
+    # Horizontal rules without a grid (booktabs style) need several multi-cell rows as well
+    rules_only = horizontal >= MIN_RULES_WITHOUT_GRID and multi_cell_rows >= MIN_ALIGNED_ROWS
+    candidate = ruled or aligned or rules_only
+
+    return {
+        'page': page.number + 1,
+        'candidate': candidate,
+        'ruled': ruled,
+        'horizontal_rulings': horizontal,
+        'vertical_rulings': vertical,
+        'aligned_columns': aligned_columns,
+        'multi_cell_rows': multi_cell_rows
+    }
+
+
+def detect_table_pages(pdf_path: str) -> List[Dict]:
+    """
+    Score every page of a PDF for table content, cached per file version
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        One score_table_page() result per page, in page order
+    """
+    key = file_key(pdf_path)
+    if key in _score_cache:
+        _score_cache.move_to_end(key)
+    else:
+        with fitz.open(pdf_path) as doc:
+            _score_cache[key] = {page.number + 1: score_table_page(page) for page in doc}
+        while len(_score_cache) > _MAX_CACHED_FILES:
+            _score_cache.popitem(last=False)
+
+    scores = _score_cache[key]
+    return [scores[page_number] for page_number in sorted(scores)]
+
+
+def format_page_ranges(pages: List[int]) -> str:
+    """Format 1-based pages as a camelot/tabula pages string, e.g. [1, 2, 3, 7] -> '1-3,7'"""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ','.join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def candidate_pages(pdf_path: str, ruled_only: bool = False) -> Optional[List[int]]:
+    """
+    Pages worth sending to a table extractor
+
+    Args:
+        pdf_path: Path to the PDF file
+        ruled_only: Only pages with a ruling-line grid (for camelot lattice)
+
+    Returns:
+        Sorted 1-based pages, or None when the pre-pass failed and every page should be tried
+    """
+    try:
+        scores = detect_table_pages(pdf_path)
+    except Exception as e:
+        print(f"WARNING: Table page detection failed, analysing all pages: {e}", file=sys.stderr)
+        return None
+
+    field = 'ruled' if ruled_only else 'candidate'
+    return [score['page'] for score in scores if score[field]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the pages of a PDF that likely contain tables')
+    parser.add_argument('input_pdf', help='Input PDF file path')
+
+    args = parser.parse_args()
+
+    try:
+        scores = detect_table_pages(args.input_pdf)
+        print(json.dumps({
+            'success': True,
+            'candidate_pages': [score['page'] for score in scores if score['candidate']],
+            'ruled_pages': [score['page'] for score in scores if score['ruled']],
+            'pages': scores
+        }))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
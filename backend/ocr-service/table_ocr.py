@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR Table Reconstruction
+Rebuilds tables from scanned pages for the Excel converter.
+
+Ruled tables: horizontal and vertical lines are found with morphological
+opening on the binarised page raster. The lines give the row and column
+boundaries of the cell grid; the lines are then erased and the page is OCR'd
+once, and every word lands in its cell by binary search on the boundaries.
+
+Borderless tables: words from the same OCR pass are grouped into rows by
+1-D clustering of their vertical centres, and columns come from the gaps in
+the horizontal coverage of all rows; words are again placed by bisection.
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_backend import get_ocr_backend
+
+# A ruling line must span this share of the page (after opening with a kernel this long)
+LINE_KERNEL_FRACTION = 1 / 30
+# Grid lines closer than this (pixels) are one line drawn thick
+LINE_MERGE_DISTANCE = 6
+# Lines needed each way for a grid of at least 2 x 2 cells (a page frame has two)
+MIN_GRID_LINES = 3
+# Words below this Tesseract confidence are dropped
+MIN_WORD_CONFIDENCE = 30
+# Rows: a word starts a new row when its centre is this many word heights below the last
+ROW_GAP_FACTOR = 0.6
+# Columns: a gap in row coverage at least this many word heights wide separates columns
+COLUMN_GAP_FACTOR = 1.0
+# Share of rows allowed to cross a column gap (titles, notes spanning the table)
+COLUMN_CROSSING_RATIO = 0.1
+
+
+def _line_positions(mask: np.ndarray, axis: int) -> List[int]:
+    """Centres of the line runs in a line mask, projected along `axis`"""
+    profile = mask.max(axis=axis) > 0
+    indices = np.flatnonzero(profile)
+    if len(indices) == 0:
+        return []
+
+    # Split consecutive indices into runs, then merge runs closer than LINE_MERGE_DISTANCE
+    breaks = np.flatnonzero(np.diff(indices) > LINE_MERGE_DISTANCE) + 1
+    return [int(run.mean()) for run in np.split(indices, breaks)]
+
+
+def detect_grid(gray: np.ndarray) -> Tuple[Optional[Tuple[List[int], List[int]]], np.ndarray]:
+    """
+    Find a ruled cell grid on a grayscale page
+
+    Returns:
+        ((row boundaries y, column boundaries x) or None when there is no grid, line mask)
+    """
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10)
+    height, width = binary.shape
+
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(20, int(width * LINE_KERNEL_FRACTION)), 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(20, int(height * LINE_KERNEL_FRACTION))))
+    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
+    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
+
+    line_mask = cv2.dilate(cv2.bitwise_or(horizontal, vertical), np.ones((3, 3), np.uint8))
+
+    rows = _line_positions(horizontal, axis=1)
+    columns = _line_positions(vertical, axis=0)
+    if len(rows) < MIN_GRID_LINES or len(columns) < MIN_GRID_LINES:
+        return None, line_mask
+    return (rows, columns), line_mask
+
+
+def ocr_words(image: np.ndarray, psm: int = 11) -> List[Dict]:
+    """
+    OCR an image once and return its confident words
+
+    Returns:
+        Words with text, left, top, right, bottom, x (centre), y (centre) and height
+    """
+    data = get_ocr_backend().image_to_data(image, psm=psm)
+
+    words = []
+    for i, text in enumerate(data['text']):
+        text = str(text).strip()
+        if not text:
+            continue
+        try:
+            confidence = float(data['conf'][i])
+        except (TypeError, ValueError):
+            continue
+        if confidence < MIN_WORD_CONFIDENCE:
+            continue
+
+        left, top = data['left'][i], data['top'][i]
+        width, height = data['width'][i], data['height'][i]
+        words.append({
+            'text': text,
+            'left': left, 'top': top, 'right': left + width, 'bottom': top + height,
+            'x': left + width / 2, 'y': top + height / 2, 'height': height
+        })
+    return words
+
+
+def cluster_rows(words: List[Dict]) -> List[float]:
+    """
+    1-D clustering of word centres into rows
+
+    Returns:
+        Row boundaries (midpoints between neighbouring row centres), for bisect_right
+    """
+    if not words:
+        return []
+
+    centres = sorted(word['y'] for word in words)
+    gap = ROW_GAP_FACTOR * float(np.median([word['height'] for word in words]))
+
+    rows = [[centres[0]]]
+    for y in centres[1:]:
+        if y - rows[-1][-1] > gap:
+            rows.append([y])
+        else:
+            rows[-1].append(y)
+
+    means = [sum(row) / len(row) for row in rows]
+    return [(a + b) / 2 for a, b in zip(means, means[1:])]
+
+
+def cluster_columns(words: List[Dict], row_boundaries: List[float]) -> List[float]:
+    """
+    Columns from the gaps in horizontal coverage across rows
+
+    Every row marks the x ranges its words cover; a run of x positions covered by
+    no more than COLUMN_CROSSING_RATIO of the rows, at least COLUMN_GAP_FACTOR word
+    heights wide, separates two columns.
+
+    Returns:
+        Column boundaries (gap centres), for bisect_right
+    """
+    if not words:
+        return []
+
+    extent = int(max(word['right'] for word in words)) + 2
+    coverage = np.zeros(extent + 1, dtype=np.int32)
+
+    # One coverage mark per row and x position, even where words in a row overlap
+    rows = {}
+    for word in words:
+        rows.setdefault(bisect_right(row_boundaries, word['y']), []).append(word)
+    for row_words in rows.values():
+        covered = np.zeros(extent + 1, dtype=bool)
+        for word in row_words:
+            covered[int(word['left']):int(word['right']) + 1] = True
+        coverage += covered
+
+    allowed = int(len(rows) * COLUMN_CROSSING_RATIO)
+    min_gap = COLUMN_GAP_FACTOR * float(np.median([word['height'] for word in words]))
+    start = int(min(word['left'] for word in words))
+
+    boundaries = []
+    gap_positions = np.flatnonzero(coverage[start:extent] <= allowed) + start
+    if len(gap_positions):
+        breaks = np.flatnonzero(np.diff(gap_positions) > 1) + 1
+        for run in np.split(gap_positions, breaks):
+            if len(run) >= min_gap and run[-1] < extent - 1:
+                boundaries.append(float(run.mean()))
+    return boundaries
+
+
+def _fill_cells(words: List[Dict], row_boundaries: List[float], column_boundaries: List[float],
+                n_rows: int, n_columns: int) -> List[List[Optional[str]]]:
+    """Place words into a n_rows x n_columns table by bisection, in reading order within a cell"""
+    cells = [[[] for _ in range(n_columns)] for _ in range(n_rows)]
+
+    for word in words:
+        row = bisect_right(row_boundaries, word['y'])
+        column = bisect_right(column_boundaries, word['x'])
+        if 0 <= row < n_rows and 0 <= column < n_columns:
+            cells[row][column].append(word)
+
+    table = []
+    for row in cells:
+        values = []
+        for cell_words in row:
+            cell_words.sort(key=lambda word: (round(word['y'] / max(1, word['height'])), word['left']))
+            values.append(' '.join(word['text'] for word in cell_words) or None)
+        table.append(values)
+    return table
+
+
+def extract_table(gray: np.ndarray) -> Optional[List[List[Optional[str]]]]:
+    """
+    Reconstruct the table on a scanned page
+
+    Args:
+        gray: Grayscale page raster (uint8)
+
+    Returns:
+        Rows of cell texts (None for empty cells), or None when the page holds no table
+    """
+    grid, line_mask = detect_grid(gray)
+
+    if grid is not None:
+        row_lines, column_lines = grid
+        # Erase the rulings so Tesseract does not read them as characters
+        cleaned = gray.copy()
+        cleaned[line_mask > 0] = 255
+        words = [word for word in ocr_words(cleaned)
+                 if row_lines[0] <= word['y'] <= row_lines[-1] and column_lines[0] <= word['x'] <= column_lines[-1]]
+
+        # Cells lie between consecutive lines; bisect on the inner lines gives the cell index
+        table = _fill_cells(words, row_lines[1:-1], column_lines[1:-1],
+                            len(row_lines) - 1, len(column_lines) - 1)
+    else:
+        words = ocr_words(gray)
+        row_boundaries = cluster_rows(words)
+        column_boundaries = cluster_columns(words, row_boundaries)
+        if not column_boundaries:
+            # A single column of text is not a table
+            return None
+        table = _fill_cells(words, row_boundaries, column_boundaries,
+                            len(row_boundaries) + 1, len(column_boundaries) + 1)
+
+    table = [row for row in table if any(value for value in row)]
+    if len(table) < 2:
+        return None
+    return table
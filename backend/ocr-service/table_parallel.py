@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Page-Parallel Table Extraction
+Splits the pages sent to camelot into chunks, runs each chunk on a process
+pool and reassembles the tables in page order. Lattice rasterises every page
+and runs OpenCV line detection inside camelot.read_pdf, one page after the
+other; chunks of pages spread that over the available cores.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional
+
+from ocr_parallel import resolve_worker_count
+from table_detector import format_page_ranges
+from tabula_backend import jvm_running
+
+
+def default_chunk_size() -> int:
+    """Pages per pool task from TABLE_CHUNK_PAGES (default: 2)"""
+    try:
+        configured = int(os.environ.get('TABLE_CHUNK_PAGES', '2'))
+    except ValueError:
+        configured = 2
+    return max(1, configured)
+
+
+def chunk_pages(pages: List[int], chunk_size: int) -> List[List[int]]:
+    """Split sorted 1-based pages into consecutive chunks of at most chunk_size pages"""
+    pages = sorted(set(pages))
+    return [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+
+def _init_worker():
+    """Stop OpenCV's thread pool contending with the other pool processes"""
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+
+
+def _pool_context():
+    """
+    Process start method for the pool
+
+    Forking a process that hosts tabula's in-process JVM copies a JVM without its
+    threads; pool processes then start from the clean forkserver process instead.
+    """
+    if jvm_running() and 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return None
+
+
+def _read_chunk(pdf_path: str, pages: List[int], flavor: str, camelot_kwargs: Dict) -> List:
+    """Run camelot over one chunk of pages inside a pool process"""
+    import camelot
+    return list(camelot.read_pdf(pdf_path, pages=format_page_ranges(pages), flavor=flavor, **camelot_kwargs))
+
+
+def read_camelot_tables(pdf_path: str, pages: Optional[List[int]], flavor: str,
+                        workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                        **camelot_kwargs) -> List:
+    """
+    Extract tables with camelot, page chunks in parallel
+
+    Args:
+        pdf_path: Path to the PDF file
+        pages: 1-based pages to analyse (None: all pages, in a single camelot call)
+        flavor: 'lattice' or 'stream'
+        workers: Number of pool processes (None or 0 = OCR_WORKERS / CPU count, 1 = serial)
+        chunk_size: Pages per pool task, defaults to TABLE_CHUNK_PAGES
+        camelot_kwargs: Extra camelot.read_pdf arguments
+
+    Returns:
+        camelot Table objects in page order, then in camelot's order within a page
+    """
+    import camelot
+
+    if pages is None:
+        return list(camelot.read_pdf(pdf_path, pages='all', flavor=flavor, **camelot_kwargs))
+
+    chunks = chunk_pages(pages, chunk_size or default_chunk_size())
+    if not chunks:
+        return []
+
+    workers = resolve_worker_count(workers, len(chunks))
+    if workers == 1:
+        return [table for chunk in chunks for table in _read_chunk(pdf_path, chunk, flavor, camelot_kwargs)]
+
+    print(f"INFO: Running camelot {flavor} on {workers} worker processes ({len(chunks)} chunks)")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=_pool_context()) as pool:
+        # map() yields chunk results in submission order, so pages stay in order
+        chunk_tables = pool.map(_read_chunk, repeat(pdf_path), chunks, repeat(flavor), repeat(camelot_kwargs))
+        return [table for tables in chunk_tables for table in tables]
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tabula JVM Backend
+tabula-py drives tabula-java. Through its subprocess wrapper every read_pdf call
+starts a fresh JVM, loads the tabula jar and runs cold; with JPype installed,
+tabula-py instead starts one JVM inside this process on the first call and keeps
+it for the life of the process, so later calls only pay for the extraction.
+
+The conversion worker calls warm_up() when it loads the Excel converter, so the
+JVM start and the class loading happen before the first document arrives.
+"""
+
+import importlib.util
+import os
+import re
+import shlex
+import sys
+import tempfile
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+# tabula-py imports JPype itself when it starts the JVM
+JPYPE_AVAILABLE = importlib.util.find_spec('jpype') is not None
+
+# Pid of the process whose in-process JVM has run a warm-up extraction
+_warmed_pid = None
+
+# Cell texts of a table that must all appear on a page for the table to be placed there
+PAGE_MATCH_CELLS = 3
+
+
+def use_subprocess() -> bool:
+    """True when tabula must run in a java subprocess (no JPype, or TABULA_BACKEND=subprocess)"""
+    return not JPYPE_AVAILABLE or os.environ.get('TABULA_BACKEND', 'auto') == 'subprocess'
+
+
+def jvm_running() -> bool:
+    """True when this process hosts a started JVM"""
+    jpype = sys.modules.get('jpype')
+    return jpype is not None and jpype.isJVMStarted()
+
+
+def java_options() -> List[str]:
+    """JVM options from TABULA_JAVA_OPTIONS (e.g. "-Xmx1g"); only used when the JVM starts"""
+    return shlex.split(os.environ.get('TABULA_JAVA_OPTIONS', ''))
+
+
+def read_tables(pdf_path: str, pages: Union[str, int], **tabula_kwargs) -> List[pd.DataFrame]:
+    """
+    Extract tables with tabula, in the process's resident JVM when JPype is available
+
+    Args:
+        pdf_path: Path to the PDF file
+        pages: tabula pages argument ('all', a page number or a ranges string)
+        tabula_kwargs: Extra tabula.read_pdf arguments
+
+    Returns:
+        One DataFrame per table, in tabula's order
+    """
+    import tabula
+
+    tables = tabula.read_pdf(
+        pdf_path,
+        pages=pages,
+        multiple_tables=True,
+        java_options=java_options(),
+        force_subprocess=use_subprocess(),
+        silent=True,
+        **tabula_kwargs
+    )
+    return tables or []
+
+
+def read_tables_by_page(pdf_path: str, pages: List[int], **tabula_kwargs) -> Dict[int, List[pd.DataFrame]]:
+    """
+    Extract tables from the given pages, grouped by page
+    
+    Tabula's results carry no page number. With the resident JVM a call per page
+    is cheap, so each page is read on its own. Without JPype every call starts a
+    JVM, so all pages are read in one call and each table is placed on the first
+    page (at or after the previous table's) whose text contains its cells.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        pages: 1-based pages to read
+        tabula_kwargs: Extra tabula.read_pdf arguments
+    
+    Returns:
+        {page: non-empty DataFrames in tabula's order}
+    """
+    tables_by_page = {}
+    if not use_subprocess():
+        for page in pages:
+            tables = [df for df in read_tables(pdf_path, pages=page, **tabula_kwargs) if not df.empty]
+            if tables:
+                tables_by_page[page] = tables
+        return tables_by_page
+    
+    tables = [df for df in read_tables(pdf_path, pages=','.join(map(str, pages)), **tabula_kwargs) if not df.empty]
+    if not tables:
+        return tables_by_page
+    
+    import fitz  # PyMuPDF
+    
+    with fitz.open(pdf_path) as doc:
+        page_texts = [_squash(doc[page - 1].get_text()) for page in pages]
+    
+    index = 0
+    for df in tables:
+        cells = _table_cells(df)
+        for candidate in range(index, len(pages)):
+            if all(cell in page_texts[candidate] for cell in cells):
+                index = candidate
+                break
+        tables_by_page.setdefault(pages[index], []).append(df)
+    return tables_by_page
+
+
+def _squash(text: str) -> str:
+    """Text with all whitespace removed, so tabula's cell joins match the page text"""
+    return re.sub(r'\s+', '', text)
+
+
+def _table_cells(df: pd.DataFrame) -> List[str]:
+    """The first PAGE_MATCH_CELLS non-empty cell texts of a table, header row included"""
+    cells = []
+    for value in [*df.columns, *df.to_numpy().ravel()]:
+        text = '' if pd.isna(value) or str(value).startswith('Unnamed:') else _squash(str(value))
+        if text:
+            cells.append(text)
+            if len(cells) == PAGE_MATCH_CELLS:
+                break
+    return cells
+
+
+def _write_warm_up_pdf(path: str):
+    """A one-page PDF holding a small ruled table"""
+    import fitz  # PyMuPDF
+
+    with fitz.open() as doc:
+        page = doc.new_page(width=300, height=200)
+        for row in range(4):
+            y = 40 + row * 30
+            page.draw_line((40, y), (260, y))
+            if row < 3:
+                page.insert_text((50, y + 20), f"Item {row}")
+                page.insert_text((170, y + 20), str(row * 10))
+        for x in (40, 150, 260):
+            page.draw_line((x, 40), (x, 130))
+        doc.save(path)
+
+
+def warm_up() -> Optional[str]:
+    """
+    Start the in-process JVM and run one small extraction, once per process
+
+    Returns:
+        'jpype' when the resident JVM is warm, 'subprocess' when tabula will start
+        a JVM per call, None if the warm-up failed
+    """
+    global _warmed_pid
+
+    if use_subprocess():
+        return 'subprocess'
+    if _warmed_pid == os.getpid():
+        return 'jpype'
+
+    handle, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(handle)
+    try:
+        _write_warm_up_pdf(path)
+        read_tables(path, pages=1, lattice=True)
+        _warmed_pid = os.getpid()
+        return 'jpype'
+    except Exception as e:
+        print(f"WARNING: Could not warm up the tabula JVM: {e}", file=sys.stderr)
+        return None
+    finally:
+        os.unlink(path)
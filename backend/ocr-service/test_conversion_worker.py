@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the persistent conversion worker: converter imports and the JSON-lines
+protocol the Node server speaks over the worker's stdin/stdout
+
+    python -m pytest test_conversion_worker.py
+"""
+
+import importlib
+import io
+import json
+import os
+import subprocess
+import sys
+
+import fitz  # PyMuPDF
+import pytest
+
+from conversion_worker import CONVERTERS, ConversionWorker
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversion_worker.py')
+
+
+@pytest.mark.parametrize('name', sorted(CONVERTERS))
+def test_converter_modules_import(name):
+    """Every converter the worker hosts imports and exposes its class and run_conversion"""
+    module_name, class_name = CONVERTERS[name]
+    module = importlib.import_module(module_name)
+
+    assert callable(getattr(module, class_name))
+    assert callable(module.run_conversion)
+
+
+def write_text_pdf(path):
+    """Two pages with a text layer, so no conversion needs OCR"""
+    with fitz.open() as doc:
+        for page_number in range(1, 3):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Worker protocol page {page_number}", fontsize=18)
+            for line in range(4):
+                page.insert_text((72, 120 + line * 20), f"Line {line} of the test document.")
+        doc.save(path)
+    return str(path)
+
+
+def run_worker(requests, tmp_path):
+    """Send JSON-line requests to a worker process on stdin and return its stdout messages"""
+    env = dict(os.environ, CONVERSION_CACHE_ENABLED='false')
+    completed = subprocess.run(
+        [sys.executable, WORKER_SCRIPT, '--preload', 'word,ppt'],
+        input=''.join(json.dumps(request) + '\n' for request in requests),
+        capture_output=True, text=True, cwd=str(tmp_path), env=env, timeout=300
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    # Every stdout line is a protocol message: converter logging is moved to stderr
+    return [json.loads(line) for line in completed.stdout.splitlines()]
+
+
+def test_json_lines_protocol(tmp_path):
+    pdf_path = write_text_pdf(tmp_path / 'input.pdf')
+    docx_path = str(tmp_path / 'output.docx')
+    pptx_path = str(tmp_path / 'output.pptx')
+
+    ready, ping, probe, word, ppt, shutdown = run_worker([
+        {'id': 'ping', 'command': 'ping'},
+        {'id': 'probe', 'command': 'probe', 'input': pdf_path},
+        {'id': 'word', 'converter': 'word', 'input': pdf_path, 'output': docx_path},
+        {'id': 'ppt', 'converter': 'ppt', 'input': pdf_path, 'output': pptx_path},
+        {'id': 'stop', 'command': 'shutdown'},
+    ], tmp_path)
+
+    assert ready['ready'] and ready['loaded'] == ['ppt', 'word']
+    assert ping['id'] == 'ping' and ping['success'] and ping['jobs_processed'] == 0
+
+    assert probe['id'] == 'probe' and probe['success']
+    assert probe['result']['page_count'] == 2
+    assert [page['verdict'] for page in probe['result']['pages']] == ['text', 'text']
+
+    assert word['id'] == 'word' and word['success'], word.get('error')
+    assert word['result']['method'] == 'pdf2docx'
+    assert os.path.getsize(docx_path) > 0
+
+    assert ppt['id'] == 'ppt' and ppt['success'], ppt.get('error')
+    assert os.path.getsize(pptx_path) > 0
+
+    assert shutdown == {'id': 'stop', 'success': True, 'shutdown': True}
+
+
+def test_bad_requests_get_error_responses():
+    out = io.StringIO()
+    worker = ConversionWorker()
+
+    stopped = worker.serve_lines(['not json\n', '{"id": "1", "command": "reboot"}\n',
+                                  '{"id": "2", "converter": "fax", "input": "a.pdf", "output": "a.fax"}\n'], out)
+
+    invalid, unknown_command, unknown_converter = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert not stopped
+    assert invalid['id'] is None and not invalid['success']
+    assert unknown_command['id'] == '1' and 'Unknown command' in unknown_command['error']
+    assert unknown_converter['id'] == '2' and 'Unknown converter' in unknown_converter['error']
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the layout-preserving PDF to PowerPoint converter
+
+    python -m pytest test_pdf_to_ppt_layout_preserving.py
+"""
+
+import os
+from collections import Counter
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+import ocr_backend
+import page_renderer
+from pdf_to_ppt_layout_preserving import PDFToPPTLayoutPreserver
+
+
+class EmptyOCRBackend:
+    """Finds no words, so the converter also takes its second OCR fallback while building slides"""
+
+    name = 'empty'
+
+    def image_to_data(self, image, psm=3, oem=3, variables=None):
+        return {column: [] for column in ocr_backend.TSV_COLUMNS}
+
+
+def write_image_pdf(path):
+    """Page 1: text and the same picture three times; page 2: one full-page picture and no text"""
+    ok, png = cv2.imencode('.png', np.random.default_rng(0).integers(0, 255, (80, 120, 3), dtype=np.uint8))
+    assert ok
+
+    with fitz.open() as doc:
+        page = doc.new_page()
+        for line in range(4):
+            page.insert_text((72, 72 + line * 20), f"Slide text line {line}")
+        for column in range(3):
+            page.insert_image(fitz.Rect(72 + column * 160, 300, 212 + column * 160, 400), stream=png.tobytes())
+
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=png.tobytes())
+        doc.save(path)
+
+
+def test_each_page_rendered_once_per_document(tmp_path, monkeypatch):
+    """OCR fallbacks and the slide background reuse one raster per page, whatever the DPI"""
+    monkeypatch.setattr(ocr_backend, '_backend', EmptyOCRBackend())
+    monkeypatch.setattr(ocr_backend, '_backend_pid', os.getpid())
+
+    renders = Counter()
+    render_page_array = page_renderer.render_page_array
+
+    def counting_render(page, dpi=200, grayscale=False):
+        renders[page.number + 1] += 1
+        return render_page_array(page, dpi, grayscale)
+
+    monkeypatch.setattr(page_renderer, 'render_page_array', counting_render)
+
+    pdf_path = str(tmp_path / 'slides.pdf')
+    write_image_pdf(pdf_path)
+    converter = PDFToPPTLayoutPreserver()
+
+    assert converter.convert_pdf_to_powerpoint(pdf_path, str(tmp_path / 'slides.pptx'))
+    assert renders == {1: 1, 2: 1}
+    assert converter.raster_cache is None
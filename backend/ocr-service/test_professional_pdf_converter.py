@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the professional PDF to Excel converter
+
+    python -m pytest test_professional_pdf_converter.py
+"""
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+import professional_pdf_converter
+import table_ocr
+from benchmark_clean_dataframe import make_table, reference_clean_column, reference_clean_dataframe
+from professional_pdf_converter import ProfessionalPDFToExcelConverter
+
+SCANNED_TABLE = [['Item', 'Qty'], ['Bolts', '12'], ['Nuts', '30']]
+
+
+def write_mixed_pdf(path):
+    """Page 1: a ruled 4x3 table with a text layer; page 2: a full-page scan (picture only)"""
+    with fitz.open() as doc:
+        page = doc.new_page()
+        x0, y0, cell_width, row_height = 72, 100, 120, 28
+        for row in range(5):
+            page.draw_line((x0, y0 + row * row_height), (x0 + 3 * cell_width, y0 + row * row_height))
+        for column in range(4):
+            page.draw_line((x0 + column * cell_width, y0), (x0 + column * cell_width, y0 + 4 * row_height))
+        for row in range(4):
+            for column in range(3):
+                page.insert_text((x0 + column * cell_width + 6, y0 + row * row_height + 19), f"r{row}c{column}")
+
+        ok, png = cv2.imencode('.png', np.full((1100, 850), 235, dtype=np.uint8))
+        assert ok
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=png.tobytes())
+        doc.save(path)
+
+
+def test_select_mode_adds_ocr_tables_of_scanned_pages(tmp_path, monkeypatch):
+    """A text-layer table does not stop the scanned pages of the same document from being OCR'd"""
+    monkeypatch.setattr(professional_pdf_converter, 'OCR_TABLES_AVAILABLE', True)
+    monkeypatch.setattr(professional_pdf_converter, 'is_blank_page', lambda page_image: False)
+    monkeypatch.setattr(table_ocr, 'extract_table', lambda page_image: SCANNED_TABLE)
+
+    pdf_path = str(tmp_path / 'mixed.pdf')
+    output_path = str(tmp_path / 'mixed.xlsx')
+    write_mixed_pdf(pdf_path)
+
+    results = ProfessionalPDFToExcelConverter().convert_pdf_to_excel(pdf_path, output_path, workers=1)
+
+    assert results['success']
+    assert results['method_used'] == 'score_select'
+    assert set(results['page_methods']) == {1, 2}
+    assert results['page_methods'][2] == 'OCR'
+    assert [sheet.title for sheet in openpyxl.load_workbook(output_path).worksheets][-1].endswith('_P2')
+
+
+def test_no_candidate_pages_skips_table_extraction(tmp_path, monkeypatch):
+    """When the pre-pass selects no page, camelot and tabula are not run on the whole document"""
+    calls = []
+    monkeypatch.setattr(professional_pdf_converter, 'read_camelot_tables',
+                        lambda *args, **kwargs: calls.append(args) or [])
+    monkeypatch.setattr(professional_pdf_converter, 'read_tabula_tables_by_page',
+                        lambda *args, **kwargs: calls.append(args) or {})
+
+    pdf_path = str(tmp_path / 'prose.pdf')
+    with fitz.open() as doc:
+        doc.new_page().insert_textbox(fitz.Rect(72, 72, 520, 400), "A page of prose without tables. " * 20)
+        doc.save(pdf_path)
+
+    results = ProfessionalPDFToExcelConverter().convert_pdf_to_excel(pdf_path, str(tmp_path / 'prose.xlsx'))
+
+    assert results['table_pages'] == []
+    assert calls == []
+    assert not results['success']
+
+
+def assert_same_cleaning(result, expected):
+    """Same values, and numeric where the reference is numeric (with the same dtype)"""
+    # String columns may come back as object or as pandas' string dtype depending on the
+    # pandas version and on whether placeholders were found; compare values and kinds
+    pd.testing.assert_series_equal(result, expected, check_dtype=False, check_names=False)
+    assert pd.api.types.is_numeric_dtype(result) == pd.api.types.is_numeric_dtype(expected)
+    if pd.api.types.is_numeric_dtype(expected):
+        assert result.dtype == expected.dtype
+
+
+@pytest.mark.parametrize('values', [
+    ['1', '2', '3'],
+    [' 1,234 ', '$56.78', '9 %', '-4', '1e3'],
+    ['12', '13', '14', 'n/a'],
+    ['12', '13', 'n/a', 'x'],
+    ['1', '2', '3', '4', '5', '6', '7', 'x', 'y', 'z'],
+    ['1', '2', '3', '4', '5', '6', '7', '8', 'y', 'z'],
+    ['Bolts', 'Nuts', 'Washers'],
+    ['nan', 'NaN', 'None', '', 'null', '  '],
+    [None, np.nan, '5', '6'],
+    [1, 2.5, None, 4],
+])
+def test_clean_column_matches_per_cell_reference(values):
+    column = pd.Series(values, dtype=object)
+
+    result = ProfessionalPDFToExcelConverter()._clean_column(column.copy())
+
+    assert_same_cleaning(result, reference_clean_column(column.copy()))
+
+
+def test_clean_dataframe_matches_per_cell_reference():
+    table = make_table(rows=500, cols=8)
+
+    result = ProfessionalPDFToExcelConverter()._clean_dataframe(table.copy())
+    expected = reference_clean_dataframe(table.copy())
+
+    assert list(result.columns) == list(expected.columns)
+    for column in expected.columns:
+        assert_same_cleaning(result[column], expected[column])
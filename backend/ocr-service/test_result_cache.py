@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the conversion result cache
+
+    python -m pytest test_result_cache.py
+"""
+
+import pytest
+
+import result_cache
+from result_cache import CONVERTER_OPTIONS, ResultCache, normalize_options
+
+
+@pytest.fixture
+def cache(tmp_path):
+    store = ResultCache(cache_dir=str(tmp_path / 'cache'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def input_pdf(tmp_path):
+    path = tmp_path / 'input.pdf'
+    path.write_bytes(b'%PDF-1.7 test document')
+    return str(path)
+
+
+@pytest.mark.parametrize('converter_name', sorted(CONVERTER_OPTIONS))
+def test_normalize_fills_defaults(converter_name):
+    assert normalize_options(converter_name, {}) == CONVERTER_OPTIONS[converter_name]
+
+
+def test_normalize_coerces_to_default_types():
+    normalized = normalize_options('word', {'dpi': '300', 'is_scanned': 'true',
+                                            'ocr_min_confidence': 70, 'ocr_min_words': 5.0})
+
+    assert normalized == CONVERTER_OPTIONS['word'] | {'is_scanned': True}
+    assert type(normalized['dpi']) is int
+    assert type(normalized['ocr_min_confidence']) is float
+
+
+def test_normalize_drops_ignored_and_unset_options():
+    normalized = normalize_options('ocr', {'workers': 4, 'dpi': None, 'output_format': 'pdf'})
+
+    assert 'workers' not in normalized
+    assert normalized['dpi'] == CONVERTER_OPTIONS['ocr']['dpi']
+    assert normalized['output_format'] == 'pdf'
+
+
+def test_normalize_keeps_unknown_options():
+    assert normalize_options('ppt', {'theme': 'dark'}) == {'theme': 'dark'}
+
+
+def test_cli_and_worker_options_share_a_key(cache, input_pdf):
+    """The command line spells out every option, the worker only sends non-defaults"""
+    cli_options = {'is_scanned': False, 'dpi': 300, 'ocr_min_confidence': 70.0, 'ocr_min_words': 5, 'workers': 2}
+    worker_options = {'dpi': '300'}
+
+    assert (cache.make_key(input_pdf, 'word', 'out.docx', cli_options)
+            == cache.make_key(input_pdf, 'word', 'out.docx', worker_options))
+
+
+def test_key_changes_with_output_affecting_inputs(cache, input_pdf, tmp_path):
+    key = cache.make_key(input_pdf, 'word', 'out.docx', {})
+
+    other_pdf = tmp_path / 'other.pdf'
+    other_pdf.write_bytes(b'%PDF-1.7 another document')
+
+    assert cache.make_key(input_pdf, 'word', 'out.docx', {'dpi': 200}) != key
+    assert cache.make_key(input_pdf, 'ocr', 'out.docx', {}) != key
+    assert cache.make_key(input_pdf, 'word', 'out.pdf', {}) != key
+    assert cache.make_key(str(other_pdf), 'word', 'out.docx', {}) != key
+
+
+def test_key_changes_with_cache_version(cache, input_pdf, monkeypatch):
+    """Bumping CACHE_VERSION makes every stored output unreachable"""
+    key = cache.make_key(input_pdf, 'word', 'out.docx', {})
+    monkeypatch.setattr(result_cache, 'CACHE_VERSION', result_cache.CACHE_VERSION + 1)
+
+    assert cache.make_key(input_pdf, 'word', 'out.docx', {}) != key
+
+
+def test_stored_output_is_found_again(cache, input_pdf, tmp_path):
+    output = tmp_path / 'out.docx'
+    output.write_bytes(b'converted')
+    key = cache.make_key(input_pdf, 'word', str(output), {})
+    cache.put(key, str(output), {'success': True, 'output_file': str(output)})
+
+    copy = tmp_path / 'copy.docx'
+    result = cache.get(key, str(copy))
+
+    assert result == {'success': True, 'output_file': str(copy)}
+    assert copy.read_bytes() == b'converted'
+    assert cache.get(cache.make_key(input_pdf, 'word', str(output), {'dpi': 150}), str(copy)) is None
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the table page pre-pass
+
+    python -m pytest test_table_detector.py
+"""
+
+import fitz  # PyMuPDF
+import pytest
+
+import table_detector
+from table_detector import candidate_pages, detect_table_pages, format_page_ranges
+
+PROSE = ("Quarterly report. Revenue grew in every region this quarter, driven by new "
+         "customers and by renewals. The board approved the budget for the next year.")
+
+
+def add_prose_page(doc):
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(72, 72, 520, 400), PROSE * 3, fontsize=11)
+
+
+def add_ruled_table_page(doc):
+    page = doc.new_page()
+    x0, y0, cell_width, row_height = 72, 100, 120, 28
+    for row in range(5):
+        page.draw_line((x0, y0 + row * row_height), (x0 + 3 * cell_width, y0 + row * row_height))
+    for column in range(4):
+        page.draw_line((x0 + column * cell_width, y0), (x0 + column * cell_width, y0 + 4 * row_height))
+    for row in range(4):
+        for column in range(3):
+            page.insert_text((x0 + column * cell_width + 6, y0 + row * row_height + 19), f"r{row}c{column}")
+
+
+def add_borderless_table_page(doc):
+    page = doc.new_page()
+    for row in range(6):
+        for column, x in enumerate((72, 220, 370)):
+            page.insert_text((x, 100 + row * 20), f"Item {row}.{column}")
+
+
+def write_pdf(path, *page_writers):
+    with fitz.open() as doc:
+        for write_page in page_writers:
+            write_page(doc)
+        doc.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def empty_score_cache(monkeypatch):
+    monkeypatch.setattr(table_detector, '_score_cache', type(table_detector._score_cache)())
+
+
+def test_candidate_pages(tmp_path):
+    pdf_path = write_pdf(tmp_path / 'tables.pdf', add_prose_page, add_ruled_table_page,
+                         add_borderless_table_page, lambda doc: doc.new_page())
+
+    assert candidate_pages(pdf_path) == [2, 3]
+    assert candidate_pages(pdf_path, ruled_only=True) == [2]
+
+
+def test_no_page_selected(tmp_path):
+    """A document without tables gives an empty list (send nothing), not None (send everything)"""
+    pdf_path = write_pdf(tmp_path / 'prose.pdf', add_prose_page, add_prose_page)
+
+    assert candidate_pages(pdf_path) == []
+    assert candidate_pages(pdf_path, ruled_only=True) == []
+
+
+def test_failed_detection_selects_all_pages(tmp_path):
+    assert candidate_pages(str(tmp_path / 'missing.pdf')) is None
+
+
+def test_score_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_detector, '_MAX_CACHED_FILES', 2)
+    paths = [write_pdf(tmp_path / f'doc{index}.pdf', add_prose_page) for index in range(3)]
+
+    for path in paths:
+        detect_table_pages(path)
+
+    assert len(table_detector._score_cache) == 2
+
+
+@pytest.mark.parametrize('pages, expected', [
+    ([1, 2, 3, 7], '1-3,7'),
+    ([5], '5'),
+    ([4, 2, 3, 3, 9, 10], '2-4,9-10'),
+    ([], ''),
+])
+def test_format_page_ranges(pages, expected):
+    assert format_page_ranges(pages) == expected
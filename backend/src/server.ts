@@ -4,7 +4,7 @@ import cors from 'cors';
 import cookieParser from 'cookie-parser';
 import path from 'path';
 import fs from 'fs-extra';
-import { exec } from 'child_process';
+import { exec, spawn, ChildProcess } from 'child_process';
 import { promisify } from 'util';
 import sharp from 'sharp';
 import archiver from 'archiver';
@@ -86,6 +86,264 @@ async function findPythonExecutable(): Promise<string> {
   return 'python';
 }
 
+// Persistent Python conversion worker
+// Keeps the OCR/Office converters and their heavy imports warm across requests instead of
+// paying interpreter + library startup on every conversion. Disabled with CONVERSION_WORKER_ENABLED=false.
+type WorkerConverter = 'word' | 'ocr' | 'ppt' | 'excel';
+
+interface WorkerResponse {
+  id: string | null;
+  success: boolean;
+  result?: any;
+  error?: string;
+  ready?: boolean;
+}
+
+interface PDFProbeResult {
+  success: boolean;
+  page_count: number;
+  encrypted: boolean;
+  sampled_pages: number[];
+  text_density: number;
+  image_coverage: number;
+  scanned_ratio: number;
+  pdf_type: 'text-based' | 'image-based' | 'mixed' | null;
+  pages: { page: number; verdict: 'text' | 'scanned'; text_chars: number; image_coverage: number }[];
+  duration_ms: number;
+  error?: string;
+}
+
+interface WorkerJob {
+  id: string;
+  child: ChildProcess;
+  resolve: (response: WorkerResponse | null) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+// A probe that timed out keeps the worker busy until its late reply, for at most this long;
+// a worker still silent after that is hung and gets recycled
+const WORKER_LATE_REPLY_GRACE_MS = 30000;
+
+// The worker runs one job at a time. A job is only sent to an idle worker; while it is busy,
+// callers get null and run a one-shot process, so concurrent uploads still run in parallel
+// and no job waits (or times out) behind another one.
+class ConversionWorkerClient {
+  private child: ChildProcess | null = null;
+  private starting: Promise<ChildProcess | null> | null = null;
+  private nextId = 0;
+  private active: WorkerJob | null = null;
+  private failedStarts = 0;
+
+  private get enabled(): boolean {
+    return process.env.CONVERSION_WORKER_ENABLED !== 'false' && this.failedStarts < 3;
+  }
+
+  private async start(): Promise<ChildProcess | null> {
+    const workerScriptPath = path.join(__dirname, '../ocr-service/conversion_worker.py');
+    if (!await fs.pathExists(workerScriptPath)) {
+      this.failedStarts = Infinity;
+      return null;
+    }
+
+    const pythonExecutable = await findPythonExecutable();
+
+    // Clean environment to avoid LibreOffice Python conflicts
+    const cleanEnv = { ...process.env };
+    if (cleanEnv.PATH) {
+      cleanEnv.PATH = cleanEnv.PATH
+        .split(';')
+        .filter(pathPart => !pathPart.toLowerCase().includes('libreoffice'))
+        .join(';');
+    }
+
+    return new Promise((resolve) => {
+      const child = spawn(pythonExecutable, [workerScriptPath], {
+        cwd: path.dirname(workerScriptPath),
+        env: cleanEnv,
+        stdio: ['pipe', 'pipe', 'pipe']
+      });
+
+      let ready = false;
+      let buffer = '';
+      const startupTimer = setTimeout(() => {
+        if (!ready) {
+          console.warn('⚠️ Conversion worker did not become ready in time');
+          this.failedStarts++;
+          child.kill();
+          resolve(null);
+        }
+      }, 120000);
+
+      child.stderr.on('data', (chunk: Buffer) => {
+        process.stderr.write(`[conversion-worker] ${chunk.toString()}`);
+      });
+
+      child.stdout.on('data', (chunk: Buffer) => {
+        buffer += chunk.toString('utf8');
+        let newlineIndex: number;
+        while ((newlineIndex = buffer.indexOf('\n')) !== -1) {
+          const line = buffer.slice(0, newlineIndex).trim();
+          buffer = buffer.slice(newlineIndex + 1);
+          if (!line) continue;
+
+          let message: WorkerResponse;
+          try {
+            message = JSON.parse(line);
+          } catch (parseError) {
+            console.warn(`⚠️ Unparseable conversion worker output: ${line}`);
+            continue;
+          }
+
+          if (message.ready && !ready) {
+            ready = true;
+            clearTimeout(startupTimer);
+            this.failedStarts = 0;
+            console.log(`🔥 Conversion worker ready (pid ${child.pid})`);
+            resolve(child);
+            continue;
+          }
+
+          const job = this.active;
+          if (job && job.child === child && message.id === job.id) {
+            clearTimeout(job.timer);
+            this.active = null;
+            job.resolve(message);
+          }
+        }
+      });
+
+      const handleExit = (reason: string) => {
+        clearTimeout(startupTimer);
+        if (this.child === child) {
+          this.child = null;
+        }
+        // A job running on a dead worker falls back to a one-shot process
+        const job = this.active;
+        if (job && job.child === child) {
+          console.warn(`⚠️ Conversion worker ${reason} while running job ${job.id}`);
+          clearTimeout(job.timer);
+          this.active = null;
+          job.resolve(null);
+        }
+        if (!ready) {
+          this.failedStarts++;
+          resolve(null);
+        }
+      };
+
+      child.on('error', (error) => handleExit(`failed: ${error.message}`));
+      child.on('exit', (code) => handleExit(`exited with code ${code}`));
+    });
+  }
+
+  private async ensureStarted(): Promise<ChildProcess | null> {
+    if (this.child) return this.child;
+    if (!this.starting) {
+      this.starting = this.start().then((child) => {
+        this.child = child;
+        this.starting = null;
+        return child;
+      });
+    }
+    return this.starting;
+  }
+
+  /** Drop the running job and kill its worker; the next request starts a fresh one */
+  private recycle(child: ChildProcess) {
+    if (this.active && this.active.child === child) {
+      this.active = null;
+    }
+    if (this.child === child) {
+      this.child = null;
+    }
+    child.kill();
+  }
+
+  private async request(payload: Record<string, unknown>, timeoutMs: number, killOnTimeout = true): Promise<WorkerResponse | null> {
+    if (!this.enabled) return null;
+
+    const child = await this.ensureStarted();
+    if (!child || !child.stdin.writable) return null;
+
+    // Busy with another job: the caller runs its own process instead of queueing
+    if (this.active) return null;
+
+    const id = String(++this.nextId);
+    return new Promise<WorkerResponse | null>((resolve, reject) => {
+      // The worker is idle, so the job starts now and the timeout covers only its own run
+      const timer = setTimeout(() => {
+        if (!killOnTimeout && this.active && this.active.id === id) {
+          // Give up on the answer but let the job finish; the worker stays busy until its late
+          // reply (dropped by the stdout handler), or is recycled if none comes within the grace
+          const job = this.active;
+          job.resolve = () => {};
+          job.timer = setTimeout(() => {
+            if (this.active === job) {
+              console.warn(`⚠️ Conversion worker gave no reply to job ${id}, recycling it`);
+              this.recycle(child);
+            }
+          }, WORKER_LATE_REPLY_GRACE_MS);
+          reject(new Error(`Conversion worker timed out after ${timeoutMs}ms`));
+          return;
+        }
+        // The timed-out job is the one running; recycle the worker so it stops
+        this.recycle(child);
+        reject(new Error(`Conversion worker timed out after ${timeoutMs}ms`));
+      }, timeoutMs);
+
+      this.active = { id, child, resolve, reject, timer };
+      child.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+    });
+  }
+
+  /**
+   * Run a conversion job on the warm worker.
+   * Returns null when the worker is unavailable so callers can fall back to a one-shot process.
+   * Throws when the worker ran the job and it failed or timed out.
+   */
+  async run(converter: WorkerConverter, inputPath: string, outputPath: string, options: Record<string, unknown>, timeoutMs: number): Promise<any | null> {
+    const response = await this.request({ converter, input: inputPath, output: outputPath, options }, timeoutMs);
+
+    if (!response) return null;
+
+    if (!response.success) {
+      throw new Error(response.error || 'Conversion worker job failed');
+    }
+
+    return response.result;
+  }
+
+  /**
+   * Probe a PDF on the warm worker (page count, encryption, per-page text/scanned verdicts).
+   * The verdicts stay cached in the worker for the conversion that follows.
+   * Returns null when the worker is unavailable or busy. A probe that times out does not
+   * recycle the worker right away, since the probe is cheap to redo: the worker gets
+   * WORKER_LATE_REPLY_GRACE_MS more to answer and is only recycled if it stays silent.
+   */
+  async probe(inputPath: string, timeoutMs: number): Promise<PDFProbeResult | null> {
+    const response = await this.request({ command: 'probe', input: inputPath }, timeoutMs, false);
+
+    if (!response) return null;
+
+    if (!response.success) {
+      throw new Error(response.error || 'PDF probe failed');
+    }
+
+    return response.result;
+  }
+
+  stop() {
+    if (this.child) {
+      this.child.stdin.end();
+      this.child = null;
+    }
+  }
+}
+
+const conversionWorker = new ConversionWorkerClient();
+process.on('exit', () => conversionWorker.stop());
+
 // Utility function to log system events
 async function logSystemEvent(params: {
   type: 'CONVERSION_ERROR' | 'LOGIN_FAILURE' | 'SYSTEM_ERROR' | 'SECURITY_ALERT' | 'USER_ACTION' | 'API_ERROR';
@@ -799,6 +1057,13 @@ async function convertPDFToWordWithPdf2docx(inputPath: string): Promise<string>
       throw new Error(`PDF to Word converter script not found: ${converterScriptPath}`);
     }
     
+    // Prefer the warm conversion worker; fall back to a one-shot Python process
+    const workerResult = await conversionWorker.run('word', inputPath, outputFilePath, { is_scanned: false }, 120000);
+    if (workerResult && await fs.pathExists(outputFilePath)) {
+      console.log(`✅ pdf2docx conversion successful via conversion worker: ${outputFilePath}`);
+      return outputFilePath;
+    }
+    
     // Prepare Python command for text-based PDF conversion
     // Use cross-platform Python detection
     const pythonExecutable = await findPythonExecutable();
@@ -831,59 +1096,87 @@ async function convertPDFToWordWithPdf2docx(inputPath: string): Promise<string>
   }
 }
 
+// Helper function to probe a PDF with PyMuPDF (ocr-service/pdf_probe.py): page count, encryption
+// and per-page text/scanned verdicts from a bounded sample of pages, without extracting all text
+async function probePDF(inputPath: string): Promise<PDFProbeResult> {
+  // Prefer the warm conversion worker, which also keeps the verdicts for the conversion that follows
+  // A busy worker returns null, so the probe runs out of band in its own process below
+  try {
+    const workerResult = await conversionWorker.probe(inputPath, 30000);
+    if (workerResult) {
+      return workerResult;
+    }
+  } catch (error: any) {
+    console.warn(`⚠️ Worker probe failed, probing in a separate process: ${error.message}`);
+  }
+
+  const probeScriptPath = path.join(__dirname, '../ocr-service/pdf_probe.py');
+  const pythonExecutable = await findPythonExecutable();
+
+  // Clean environment to avoid LibreOffice Python conflicts
+  const cleanEnv = { ...process.env };
+  if (cleanEnv.PATH) {
+    cleanEnv.PATH = cleanEnv.PATH
+      .split(';')
+      .filter(pathPart => !pathPart.toLowerCase().includes('libreoffice'))
+      .join(';');
+  }
+
+  let stdout: string;
+  try {
+    ({ stdout } = await execAsync(`"${pythonExecutable}" "${probeScriptPath}" "${inputPath}"`, {
+      timeout: 30000,
+      encoding: 'utf8',
+      env: cleanEnv,
+      cwd: path.dirname(probeScriptPath)
+    }));
+  } catch (error: any) {
+    // The probe prints its error as JSON before exiting non-zero
+    stdout = error?.stdout || '';
+    if (!stdout) throw error;
+  }
+
+  // The result is the last JSON line; libraries may print notices before it
+  const jsonLine = stdout.trim().split('\n').reverse().find(line => line.trim().startsWith('{'));
+  if (!jsonLine) {
+    throw new Error(`PDF probe produced no result: ${stdout}`);
+  }
+
+  const result: PDFProbeResult = JSON.parse(jsonLine);
+  if (!result.success) {
+    throw new Error(result.error || 'PDF probe failed');
+  }
+  return result;
+}
+
 // Helper function to detect PDF type (text-based vs image-based/scanned)
 async function detectPDFType(inputPath: string): Promise<'text-based' | 'image-based'> {
   try {
     console.log(`🔍 Analyzing PDF type: ${inputPath}`);
     
-    // Use pdftotext to extract text content
-    const command = `pdftotext "${inputPath}" -`;
+    const probe = await probePDF(inputPath);
     
-    const { stdout, stderr } = await execAsync(command, {
-      timeout: 30000,
-      encoding: 'utf8'
-    });
+    console.log(`📝 Probed ${probe.sampled_pages.length} of ${probe.page_count} pages in ${probe.duration_ms}ms: ${probe.text_density} characters/page, ${Math.round(probe.image_coverage * 100)}% image coverage`);
     
-    if (stderr) {
-      console.warn(`⚠️ pdftotext stderr: ${stderr}`);
+    if (probe.encrypted) {
+      console.warn(`🔒 PDF is password-protected, cannot analyze its content`);
+      return 'text-based';
     }
     
-    const extractedText = stdout.trim();
-    const textLength = extractedText.length;
-    const meaningfulTextLength = extractedText.replace(/\s+/g, ' ').replace(/[^\w\s]/g, '').length;
-    
-    console.log(`📝 Extracted text length: ${textLength} characters`);
-    console.log(`📝 Meaningful text length: ${meaningfulTextLength} characters`);
-    
-    // Heuristics to determine if PDF is text-based or image-based
-    if (meaningfulTextLength < 50) {
-      console.log(`📷 PDF appears to be image-based (scanned) - very little text extracted`);
+    if (probe.pdf_type === 'image-based') {
+      console.log(`📷 PDF appears to be image-based (scanned) - no sampled page has a text layer`);
       return 'image-based';
-    } else if (meaningfulTextLength > 200) {
-      console.log(`📄 PDF appears to be text-based - substantial text content found`);
+    }
+    
+    if (probe.pdf_type === 'mixed') {
+      // The converters OCR only the pages without a text layer
+      const scannedPages = probe.pages.filter(page => page.verdict === 'scanned').map(page => page.page);
+      console.log(`📄 PDF has a text layer with scanned pages (${scannedPages.join(', ')}) - treating as text-based, scanned pages are OCR'd per page`);
       return 'text-based';
-    } else {
-      // For borderline cases, check text density
-      try {
-        const pagesCommand = `pdfinfo "${inputPath}"`;
-        const { stdout: pdfInfo } = await execAsync(pagesCommand, { timeout: 10000 });
-        const pagesMatch = pdfInfo.match(/Pages:\s*(\d+)/);
-        const pageCount = pagesMatch ? parseInt(pagesMatch[1]) : 1;
-        
-        const textPerPage = meaningfulTextLength / pageCount;
-        
-        if (textPerPage > 30) {
-          console.log(`📄 PDF appears to be text-based - decent text density per page`);
-          return 'text-based';
-        } else {
-          console.log(`📷 PDF appears to be image-based - low text density per page`);
-          return 'image-based';
-        }
-      } catch (pdfInfoError) {
-        console.warn(`⚠️ Could not get page count, defaulting based on text length`);
-        return meaningfulTextLength > 100 ? 'text-based' : 'image-based';
-      }
     }
+    
+    console.log(`📄 PDF appears to be text-based - text layer found on sampled pages`);
+    return 'text-based';
   } catch (error) {
     console.error(`❌ Error detecting PDF type:`, error);
     console.log(`🔄 Defaulting to text-based conversion attempt`);
@@ -907,6 +1200,13 @@ async function convertPDFToPowerPointLayoutPreserving(inputPath: string): Promis
       throw new Error(`Input PDF file not found: ${inputPath}`);
     }
     
+    // Prefer the warm conversion worker; fall back to a one-shot Python process
+    const workerResult = await conversionWorker.run('ppt', inputPath, outputFilePath, {}, 300000);
+    if (workerResult && await fs.pathExists(outputFilePath)) {
+      console.log(`✅ Layout-preserving PowerPoint conversion successful via conversion worker: ${outputFilePath}`);
+      return outputFilePath;
+    }
+    
     // Prepare Python command for layout-preserving converter
     const pythonScript = path.join(__dirname, '..', 'ocr-service', 'pdf_to_ppt_layout_preserving.py');
     // Try different Python executables in order of preference
@@ -972,6 +1272,13 @@ async function convertPDFWithOCR(inputPath: string, outputFormat: 'docx' | 'xlsx
       throw new Error(`OCR script not found: ${ocrScriptPath}`);
     }
     
+    // Prefer the warm conversion worker; fall back to a one-shot Python process
+    const workerResult = await conversionWorker.run('ocr', inputPath, outputFilePath, { output_format: outputFormat, ocr_engine: 'tesseract', dpi: 200 }, 300000);
+    if (workerResult && await fs.pathExists(outputFilePath)) {
+      console.log(`🎉 OCR Success via conversion worker: ${workerResult.pages_processed} pages, ${workerResult.total_characters} characters`);
+      return outputFilePath;
+    }
+    
     // Prepare Python command (using tesseract as it's more reliable)
     // Use cross-platform Python detection
     const pythonExecutable = await findPythonExecutable();
@@ -1055,6 +1362,14 @@ async function convertPDFToWordWithOCR(inputPath: string): Promise<string> {
       throw new Error(`PDF to Word converter script not found: ${converterScriptPath}`);
     }
     
+    // Prefer the warm conversion worker; fall back to a one-shot Python process
+    const workerResult = await conversionWorker.run('word', inputPath, outputFilePath, { is_scanned: true, dpi: 300 }, 300000);
+    if (workerResult && await fs.pathExists(outputFilePath)) {
+      console.log(`✅ OCR + pdf2docx conversion successful via conversion worker: ${outputFilePath}`);
+      console.log(`📊 Conversion method: ${workerResult.method}`);
+      return outputFilePath;
+    }
+    
     // Prepare Python command for scanned PDF conversion with enhanced OCR
     // Use cross-platform Python detection
     const pythonExecutable = await findPythonExecutable();
@@ -1142,6 +1457,13 @@ async function convertPDFToExcelProfessional(inputPath: string): Promise<string>
       throw new Error(`Professional PDF converter script not found: ${converterScriptPath}`);
     }
     
+    // Prefer the warm conversion worker; fall back to a one-shot Python process
+    const workerResult = await conversionWorker.run('excel', inputPath, outputFilePath, {}, 120000);
+    if (workerResult && await fs.pathExists(outputFilePath)) {
+      console.log(`✅ Professional conversion successful via conversion worker: ${workerResult.tables_found} tables found using ${workerResult.method_used}`);
+      return outputFilePath;
+    }
+    
     // Use cross-platform Python detection
     const pythonExecutable = await findPythonExecutable();
     const pythonCommand = `"${pythonExecutable}" "${converterScriptPath}" "${inputPath}" "${outputFilePath}" --verbose`;